@@ -0,0 +1,143 @@
+"""
+Load-test the server over the streamable HTTP transport with an increasing number of concurrent MCP sessions.
+
+Usage:
+    python benchmark/load_test.py [--project-path test/resources/daytrader8] [--sessions 64] [--calls 20]
+    python benchmark/load_test.py --url http://127.0.0.1:8000/mcp/ [--sessions 64]
+
+Unless `--url` is given, starts a server on `--project-path` (`cocoa toolbox --transport streamable-http`). Then, for
+1, 2, 4, ... up to `--sessions` concurrent sessions, opens the sessions, makes each of them call `--calls` lookup tools,
+and reports the call latency quantiles, the throughput and the failures. All the sessions share the analysis loaded
+once by the server. Exits with status 1 if any session or call failed.
+"""
+
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+LOG = "com.ibm.websphere.samples.daytrader.util.Log"
+
+# Tool calls made in turn by every session, from cheap lookups to a search.
+CALLS = [
+    ("get_java_file_tool", {"qualified_class_name": LOG}),
+    ("get_methods_in_class_tool", {"qualified_class_name": LOG}),
+    ("get_callers_tool", {"target_class_name": LOG, "target_method_declaration": "error(Throwable, String)"}),
+    ("get_class_tool", {"qualified_class_name": LOG, "include": ["callable_declarations.*.signature"]}),
+    ("search_code_tool", {"query": "executeQuery", "limit": 10}),
+]
+
+
+async def wait_until_ready(url: str, timeout: float) -> None:
+    """Wait for the server to accept sessions and for its analysis to be ready."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with streamablehttp_client(url) as (read, write, _):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    while time.monotonic() < deadline:
+                        status = json.loads((await session.call_tool("are_we_ready_tool", arguments={})).content[0].text)
+                        if status["ready"] or status["error"] is not None:
+                            return
+                        await asyncio.sleep(0.5)
+                    raise TimeoutError("The analysis is not ready.")
+        except (OSError, ExceptionGroup):
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.5)
+
+
+async def run_session(url: str, calls: int, latencies: list[float]) -> int:
+    """Open a session and make `calls` tool calls, returning the number of failed calls."""
+    failures = 0
+    async with streamablehttp_client(url) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for i in range(calls):
+                name, arguments = CALLS[i % len(CALLS)]
+                start = time.perf_counter()
+                result = await session.call_tool(name, arguments=arguments)
+                latencies.append(time.perf_counter() - start)
+                failures += result.isError
+    return failures
+
+
+async def run_level(url: str, sessions: int, calls: int) -> dict:
+    """Run `sessions` concurrent sessions and summarize their calls."""
+    latencies: list[float] = []
+    start = time.perf_counter()
+    results = await asyncio.gather(*[run_session(url, calls, latencies) for _ in range(sessions)], return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "sessions": sessions,
+        "failed_sessions": sum(isinstance(result, BaseException) for result in results),
+        "failed_calls": sum(result for result in results if isinstance(result, int)),
+        "calls": len(latencies),
+        "calls_per_second": len(latencies) / elapsed,
+        "p50_ms": quantiles[49] * 1000 if latencies else None,
+        "p95_ms": quantiles[94] * 1000 if latencies else None,
+        "p99_ms": quantiles[98] * 1000 if latencies else None,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def load_test(url: str, max_sessions: int, calls: int, ready_timeout: float) -> bool:
+    await wait_until_ready(url, ready_timeout)
+    print(f"{'sessions':>8} {'failed':>7} {'calls':>6} {'calls/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    ok = True
+    sessions = 1
+    while True:
+        level = await run_level(url, sessions, calls)
+        failed = level["failed_sessions"] + level["failed_calls"]
+        ok = ok and failed == 0
+        print(
+            f"{level['sessions']:>8} {failed:>7} {level['calls']:>6} {level['calls_per_second']:>8.1f} "
+            f"{level['p50_ms'] or 0:>8.1f} {level['p95_ms'] or 0:>8.1f} {level['p99_ms'] or 0:>8.1f}"
+        )
+        if sessions >= max_sessions:
+            return ok
+        sessions = min(sessions * 2, max_sessions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL of a running server, e.g. http://127.0.0.1:8000/mcp/")
+    parser.add_argument("--project-path", type=Path, default=Path(__file__).parent.parent / "test" / "resources" / "daytrader8")
+    parser.add_argument("--sessions", type=int, default=64, help="Target number of concurrent sessions")
+    parser.add_argument("--calls", type=int, default=20, help="Tool calls per session")
+    parser.add_argument("--ready-timeout", type=float, default=600, help="Seconds to wait for the analysis")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}/mcp/"
+        command = [sys.executable, "-m", "cocoa.cli", "toolbox", "-p", str(args.project_path), "--transport", "streamable-http", "--port", str(port)]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ok = asyncio.run(load_test(url, args.sessions, args.calls, args.ready_timeout))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
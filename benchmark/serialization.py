@@ -0,0 +1,83 @@
+"""
+Compare the tool serialization path (`cocoa.utils.serialization.dumps`) with the former `json.dumps(model_dump())` one.
+
+Usage:
+    python benchmark/serialization.py [--project-path test/resources/daytrader8] [--repeat 5]
+
+For every whole-project response, reports the best wall time over `--repeat` runs and the peak memory allocated while
+serializing (measured with tracemalloc in a separate run, since tracing slows everything down).
+"""
+
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+from cocoa.analysis import CLDKAnalysis
+from cocoa.utils.cache import AnalysisCache
+from cocoa.utils.serialization import dumps
+
+RESPONSES = {
+    "get_symbol_table_tool": (
+        lambda analysis: json.dumps({k: v.model_dump() for k, v in analysis.get_symbol_table().items()}),
+        lambda analysis: dumps(analysis.get_symbol_table(), 1),
+    ),
+    "get_classes_tool": (
+        lambda analysis: json.dumps({cls: typ.model_dump() for cls, typ in analysis.get_classes().items()}),
+        lambda analysis: dumps(analysis.get_classes(), 1),
+    ),
+    "get_methods_tool": (
+        lambda analysis: json.dumps({cls: {meth: call.model_dump() for meth, call in methods.items()} for cls, methods in analysis.get_methods().items()}),
+        lambda analysis: dumps(analysis.get_methods(), 2),
+    ),
+    "get_all_comments_tool": (
+        lambda analysis: json.dumps({fp: [c.model_dump() for c in comments] for fp, comments in analysis.get_all_comments().items()}),
+        lambda analysis: dumps(analysis.get_all_comments(), 2),
+    ),
+}
+
+
+def measure(fn, analysis, repeat: int) -> tuple[float, int, int]:
+    """Return the best time in seconds, the peak traced memory in bytes and the size of the response."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        response = fn(analysis)
+        best = min(best, time.perf_counter() - start)
+    del response
+    gc.collect()
+    tracemalloc.start()
+    response = fn(analysis)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--project-path", type=Path, default=Path(__file__).parent.parent / "test" / "resources" / "daytrader8")
+    parser.add_argument("--cache-dir", type=Path, default=Path("~/.cache/cocoa"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    analysis = CLDKAnalysis(project_path=args.project_path, cache=AnalysisCache(args.cache_dir, max_size=2048 * 1024 * 1024)).load()
+    for fns in RESPONSES.values():
+        # Warm up the lazily computed CLDK views (e.g., get_classes) so they are not billed to the first path.
+        fns[1](analysis)
+
+    print(f"{'tool':<24} {'path':<10} {'time (ms)':>10} {'peak (MB)':>10} {'size (MB)':>10}")
+    for tool, (baseline, native) in RESPONSES.items():
+        results = {}
+        for path, fn in (("json", baseline), ("pydantic", native)):
+            results[path] = measure(fn, analysis, args.repeat)
+            seconds, peak, size = results[path]
+            print(f"{tool:<24} {path:<10} {seconds * 1000:>10.1f} {peak / 2**20:>10.1f} {size / 2**20:>10.1f}")
+        (json_time, json_peak, _), (native_time, native_peak, _) = results["json"], results["pydantic"]
+        print(f"{'':<24} {'speedup':<10} {json_time / native_time:>9.1f}x {json_peak / native_peak:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
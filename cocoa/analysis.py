@@ -0,0 +1,305 @@
+import os
+import copy
+import time
+import asyncio
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+from dataclasses import dataclass, field
+
+from cldk import CLDK
+from cldk.analysis import AnalysisLevel
+from cldk.analysis.java import JavaAnalysis
+from cldk.models.java.models import JCompilationUnit
+
+from cocoa.analysis_snapshot import AnalysisSnapshot
+from cocoa.query_store import QueryStore
+from cocoa.utils.cache import AnalysisCache
+from cocoa.utils.executor import ToolExecutor
+from cocoa.utils.response_cache import ResponseCache
+from cocoa.utils.snapshot import Snapshot
+from cocoa.utils.watcher import SourceWatcher
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Rough share of the startup work done once each phase is reached, reported to clients polling for readiness.
+PHASE_PROGRESS = {
+    "queued": 0,
+    "fingerprinting": 5,
+    "analyzing": 10,
+    "loading": 50,
+    "ready": 100,
+    "failed": 100,
+}
+
+
+@dataclass
+class CLDKAnalysis:
+    """
+    Data class to hold the CLDK analysis instance.
+    """
+
+    project_path: Path
+    analysis_level: AnalysisLevel = AnalysisLevel.symbol_table
+    cache: AnalysisCache | None = None
+    # Seconds a tool waits for the analysis to become ready before giving up, None waits forever.
+    ready_timeout: float | None = None
+    # Runs the blocking CLDK calls of the tools off the event loop.
+    executor: ToolExecutor = field(default_factory=ToolExecutor)
+    # Memoizes serialized tool responses, None disables it.
+    response_cache: ResponseCache | None = None
+    # Snapshot written by `cocoa index`, read lazily instead of running or loading the analysis.
+    snapshot_path: Path | None = None
+    # Whole-project responses shared by the pre-fork workers, only valid for the first generation of the analysis.
+    response_snapshot: Snapshot | None = field(default=None, init=False)
+    # Indexed copy of the symbol table some lookups are answered from, only valid for the first generation of the analysis.
+    query_store: QueryStore | None = field(default=None, init=False)
+    analysis_instance: JavaAnalysis | None = field(default=None, init=False)
+    # Bumped every time the analysis is patched, so anything derived from it can tell it is stale.
+    generation: int = field(default=0, init=False)
+    phase: str = field(default="queued", init=False)
+    started_at: float | None = field(default=None, init=False)
+    finished_at: float | None = field(default=None, init=False)
+    # Whether to measure `size`, which is only needed to keep the loaded analyses within a memory budget.
+    measure_size: bool = False
+    # Size in bytes of the analysis serialized as JSON, a proxy for its memory footprint. Known once the analysis is ready,
+    # and 0 unless it is measured.
+    size: int = field(default=0, init=False)
+    _snapshot: AnalysisSnapshot | None = field(default=None, init=False, repr=False)
+    _task: asyncio.Task | None = field(default=None, init=False, repr=False)
+    _derived: dict[Callable, tuple[int, Any]] = field(default_factory=dict, init=False, repr=False)
+    # Guards `_derived`, `_build_locks` and the swap of the analysis; never held while building a derived value.
+    _derived_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    # One lock per derived value, so that each is built once while lookups of the others go on.
+    _build_locks: dict[Callable, threading.Lock] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        # codeanalyzer keys the symbol table by the paths under the project path it is given: resolving it once makes them
+        # match the resolved paths `refresh` is given, whatever symbolic links lead to the project.
+        self.project_path = Path(self.project_path).resolve()
+
+    def start(self) -> None:
+        """Start the analysis on a worker thread and return immediately."""
+        if self._task is None:
+            self._task = asyncio.create_task(asyncio.to_thread(self.load))
+
+    def add_done_callback(self, callback: Callable[["CLDKAnalysis"], None]) -> None:
+        """Call a function on the event loop once the analysis started by `start` succeeds or fails.
+
+        Args:
+            callback (Callable[[CLDKAnalysis], None]): Called with this analysis.
+        """
+        self.start()
+        self._task.add_done_callback(lambda _: callback(self))
+
+    def load(self) -> JavaAnalysis:
+        """Run (or load from the cache or the snapshot) the analysis, blocking until it is done.
+
+        Returns:
+            JavaAnalysis: The analysis instance.
+        """
+        self.started_at = time.monotonic()
+        try:
+            if self.snapshot_path is not None:
+                self.phase = "loading"
+                self._snapshot = AnalysisSnapshot(self.snapshot_path)
+                self.analysis_instance = self._snapshot.load()
+                if self._snapshot.query_store_path is not None:
+                    self.query_store = QueryStore(self._snapshot.query_store_path)
+                # The compilation units are only decompressed as they are used, so this is a lower bound.
+                self.size = self.snapshot_path.stat().st_size
+            elif self.cache is None:
+                self.phase = "analyzing"
+                self.analysis_instance = self._analyze()
+                self.size = self._measure_size()
+            else:
+                self.phase = "fingerprinting"
+                key = self.cache.key(self.project_path, analysis_level=self.analysis_level.value)
+                self.phase = "loading" if key in self.cache else "analyzing"
+                self.analysis_instance = self.cache.load(key, self._analyze)
+                self.size = self._measure_size(key)
+        except Exception:
+            self.phase = "failed"
+            raise
+        finally:
+            self.finished_at = time.monotonic()
+        self.phase = "ready"
+        return self.analysis_instance
+
+    async def wait_until_ready(self, timeout: float | None = None) -> JavaAnalysis:
+        """Wait for the analysis started by `start` to complete.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to `ready_timeout`.
+
+        Raises:
+            TimeoutError: If the analysis is still running after `timeout` seconds.
+
+        Returns:
+            JavaAnalysis: The analysis instance.
+        """
+        if self.phase == "ready":
+            # Possibly loaded without ever being started, e.g. by the parent of the pre-fork workers.
+            return self.analysis_instance
+        self.start()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), self.ready_timeout if timeout is None else timeout)
+        except TimeoutError:
+            status = self.status()
+            raise TimeoutError(f"The analysis is not ready yet ({status['phase']}, {status['progress']}% done). Poll are_we_ready_tool and retry later.") from None
+        return self.analysis_instance
+
+    def derived(self, build: Callable[[JavaAnalysis], T], analysis: JavaAnalysis | None = None) -> T:
+        """Compute a value derived from the analysis once, and reuse it until the analysis changes.
+
+        Args:
+            build (Callable[[JavaAnalysis], T]): Module-level function (or class) computing the value; it also serves as the cache key.
+            analysis (JavaAnalysis, optional): The analysis instance to derive the value from, so that several values
+                describe the same generation even if `refresh` replaces it in between. Defaults to the current one.
+
+        Returns:
+            T: The value for the given analysis instance, or the current generation of the analysis.
+        """
+        with self._derived_lock:
+            build_lock = self._build_locks.setdefault(build, threading.Lock())
+        with build_lock:
+            with self._derived_lock:
+                built, value = self._derived.get(build, (None, None))
+                generation, current = self.generation, self.analysis_instance
+            if analysis is not None and analysis is not current:
+                # Replaced since, so only the caller still needs values of it.
+                return build(analysis)
+            analysis = current
+            if built == generation:
+                return value
+            value = None
+            if generation == 0 and self._snapshot is not None:
+                # The indexes written with the snapshot describe the analysis as it was indexed.
+                value = self._snapshot.restore(build, analysis)
+            if value is None:
+                value = build(analysis)
+            with self._derived_lock:
+                self._derived[build] = (generation, value)
+            return value
+
+    def status(self) -> dict:
+        """Report the progress of the analysis.
+
+        Returns:
+            dict: The readiness flag, the current phase, the percent done, the elapsed time and the error, if any.
+        """
+        error = None
+        if self._task is not None and self._task.done() and not self._task.cancelled() and self._task.exception() is not None:
+            error = str(self._task.exception())
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {
+            "ready": self.phase == "ready",
+            "phase": self.phase,
+            "progress": PHASE_PROGRESS[self.phase],
+            "elapsed_seconds": round(elapsed, 3),
+            "error": error,
+        }
+
+    def _measure_size(self, key: str | None = None) -> int:
+        if not self.measure_size:
+            return 0
+        analysis_file = None if key is None else self.cache.cache_dir / key / self.cache.ANALYSIS_FILE
+        if analysis_file is not None and analysis_file.exists():
+            return analysis_file.stat().st_size
+        # Without the file codeanalyzer wrote, the size of the sources is a cheap lower bound.
+        return _source_size(self.project_path)
+
+    def _analyze(self, analysis_json_path: Path | None = None, target_files: list[str] | None = None) -> JavaAnalysis:
+        return CLDK("java").analysis(
+            project_path=str(self.project_path),
+            analysis_level=self.analysis_level,
+            analysis_json_path=analysis_json_path,
+            target_files=target_files,
+        )
+
+    def refresh(self, changed: list[Path], removed: list[Path]) -> None:
+        """Re-analyze the changed compilation units and patch them into the analysis.
+
+        Only the changed files go through codeanalyzer. The patched symbol table goes into a new backend and analysis,
+        which replace the current ones in a single assignment: tools running concurrently keep the analysis they started
+        with, and never observe a half-applied update. Only supported at symbol table level, since codeanalyzer ignores
+        the target files when building the call graph.
+
+        Args:
+            changed (list[Path]): Java files created or modified since the last refresh.
+            removed (list[Path]): Java files deleted since the last refresh.
+
+        Raises:
+            ValueError: If the analysis is at call graph level.
+        """
+        current = self.analysis_instance
+        if current.analysis_level != AnalysisLevel.symbol_table:
+            raise ValueError("Incremental re-analysis is only supported at symbol table level.")
+        new_units: dict[str, JCompilationUnit] = {}
+        if changed:
+            # codeanalyzer logs to stdout when given target files, so the result has to go through an output directory.
+            with tempfile.TemporaryDirectory(prefix="cocoa-") as analysis_json_path:
+                partial = self._analyze(analysis_json_path=Path(analysis_json_path), target_files=[str(Path(f).resolve()) for f in changed])
+            new_units = dict(partial.get_symbol_table())
+            for unit in new_units.values():
+                unit.is_modified = True
+
+        # Reads whatever a snapshot has not read yet, since the whole symbol table is patched.
+        application = current.backend.get_application_view()
+        symbol_table = dict(application.symbol_table)
+        for file_path in [str(Path(f).resolve()) for f in [*changed, *removed]]:
+            symbol_table.pop(file_path, None)
+        symbol_table.update(new_units)
+
+        # Any call graph CLDK computed on demand describes the sources before the change: it is computed again if asked for.
+        backend = copy.copy(current.backend)
+        backend.application = application.model_copy(update={"symbol_table": symbol_table, "call_graph": None, "system_dependency_graph": None})
+        backend.call_graph = None
+        analysis = copy.copy(current)
+        analysis.backend = backend
+        with self._derived_lock:
+            self.analysis_instance = analysis
+            self.response_snapshot = None
+            self.query_store = None
+            self.generation += 1
+        logger.info(f"Re-analyzed {len(changed)} changed and {len(removed)} removed file(s)")
+
+    async def watch(self, watcher: SourceWatcher, interval: float) -> None:
+        """Keep the analysis in sync with the sources until cancelled.
+
+        Args:
+            watcher (SourceWatcher): Watcher over the project sources.
+            interval (float): Seconds between two polls.
+        """
+        self.start()
+        try:
+            await asyncio.shield(self._task)
+        except Exception:
+            # There is nothing to keep in sync, the failure is reported by `status`.
+            return
+        if self.analysis_instance.analysis_level != AnalysisLevel.symbol_table:
+            logger.warning(f"Not watching {self.project_path}: incremental re-analysis is only supported at symbol table level")
+            return
+        while True:
+            await asyncio.sleep(interval)
+            changed, removed = await asyncio.to_thread(watcher.poll)
+            if not changed and not removed:
+                continue
+            try:
+                await asyncio.to_thread(self.refresh, changed, removed)
+            except Exception as e:
+                logger.warning(f"Incremental re-analysis failed, keeping the previous analysis: {e}")
+
+
+def _source_size(project_path: Path) -> int:
+    size = 0
+    for root, dirs, files in os.walk(project_path):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        size += sum(os.path.getsize(os.path.join(root, name)) for name in files if name.endswith(".java"))
+    return size
@@ -0,0 +1,282 @@
+import json
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from collections.abc import Callable, Iterator, Mapping
+from typing import TYPE_CHECKING, Any
+
+import pydantic_core
+from pydantic import TypeAdapter
+from cldk.analysis import AnalysisLevel
+from cldk.analysis.commons.treesitter import TreesitterJava
+from cldk.analysis.java import JavaAnalysis
+from cldk.analysis.java.codeanalyzer import JCodeanalyzer
+from cldk.models.java.models import JApplication, JCallable, JComment, JCompilationUnit, JGraphEdges, JType
+
+from cocoa.indexes import CallGraph, CallIndex, ClassIndex, CommentIndex, CrudIndex, SearchIndex
+from cocoa.indexes.call_graph import MethodKey
+from cocoa.utils.cache.cache import _cldk_version
+from cocoa.utils.snapshot import Snapshot
+
+if TYPE_CHECKING:
+    from cocoa.analysis import CLDKAnalysis
+
+# Version of the layout of the sections, bumped whenever an older snapshot could not be read back as it was written.
+SNAPSHOT_VERSION = 1
+
+_GRAPH = TypeAdapter(list[JGraphEdges])
+
+
+class AnalysisSnapshot:
+    """Analysis of a project, and the indexes derived from it, written by `cocoa index`.
+
+    Every compilation unit of the symbol table is a zlib-compressed section of its own, so a server started from the
+    snapshot only decompresses the units the tools ask for: looking a class up reads the one unit declaring it, and
+    only the whole-project tools read them all. The indexes the tools derive from the analysis are stored already built,
+    without the models they point to, which are read from the compilation units as the lookups reach them.
+    """
+
+    def __init__(self, path: Path):
+        """Open a snapshot.
+
+        Args:
+            path (Path): A file written by `write`.
+
+        Raises:
+            ValueError: If the file is not an analysis snapshot, or was written by another version of cocoa or CLDK.
+        """
+        self.path = Path(path)
+        self.snapshot = Snapshot(self.path)
+        manifest = self.snapshot.get("manifest")
+        self.manifest: dict[str, Any] = {} if manifest is None else json.loads(manifest)
+        if self.manifest.get("version") != SNAPSHOT_VERSION or self.manifest.get("cldk_version") != _cldk_version():
+            self.snapshot.close()
+            raise ValueError(f"{self.path} was written by another version of cocoa or CLDK, re-run cocoa index.")
+        self.project_path = Path(self.manifest["project_path"])
+        self.analysis_level = AnalysisLevel(self.manifest["analysis_level"])
+        # Written next to the snapshot by `cocoa index --query-store`.
+        query_store = self.manifest.get("query_store")
+        self.query_store_path = None if query_store is None else self.path.parent / query_store
+
+    @classmethod
+    def write(cls, path: Path, project: "CLDKAnalysis", compression: int = 6, query_store: Path | None = None) -> None:
+        """Write the snapshot of a loaded analysis.
+
+        Args:
+            path (Path): The snapshot file, replaced if it exists.
+            project (CLDKAnalysis): The ready analysis; its derived indexes are built if they are not yet.
+            compression (int, optional): zlib compression level of the sections. Defaults to 6.
+            query_store (Path | None, optional): Query store of the analysis, in the directory of the snapshot, which the server then answers lookups from.
+        """
+        analysis = project.analysis_instance
+        application = analysis.backend.get_application_view()
+        classes: dict[str, str] = {}
+        for file_path, unit in application.symbol_table.items():
+            for class_name in unit.type_declarations:
+                # CLDK returns the first declaration it meets.
+                classes.setdefault(class_name, file_path)
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "cldk_version": _cldk_version(),
+            "project_path": str(Path(project.project_path).absolute()),
+            "analysis_level": project.analysis_level.value,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "files": list(application.symbol_table),
+            "classes": classes,
+            "query_store": None if query_store is None else Path(query_store).name,
+        }
+        sections: dict[str, str | bytes] = {"manifest": json.dumps(manifest)}
+        for file_path, unit in application.symbol_table.items():
+            sections[f"symbol_table/{file_path}"] = unit.model_dump_json()
+        for graph in ("call_graph", "system_dependency_graph"):
+            if getattr(application, graph) is not None:
+                sections[graph] = pydantic_core.to_json(getattr(application, graph))
+        sections["index/search"] = project.derived(SearchIndex).to_bytes()
+        sections["index/call_graph"] = project.derived(CallIndex).graph.to_bytes()
+        sections["index/classes"] = project.derived(ClassIndex).to_bytes()
+        sections["index/comments"] = project.derived(CommentIndex).to_bytes()
+        sections["index/crud"] = project.derived(CrudIndex).to_bytes()
+        Snapshot.write(path, sections, compression=compression)
+
+    def load(self) -> JavaAnalysis:
+        """Create the analysis, without reading any compilation unit yet.
+
+        Returns:
+            JavaAnalysis: An analysis whose backend reads the snapshot on demand.
+        """
+        # JavaAnalysis.__init__ would run codeanalyzer: its attributes are set the way it sets them instead.
+        analysis = JavaAnalysis.__new__(JavaAnalysis)
+        analysis.project_dir = str(self.project_path)
+        analysis.source_code = None
+        analysis.analysis_level = self.analysis_level
+        analysis.analysis_json_path = None
+        analysis.analysis_backend_path = None
+        analysis.eager_analysis = False
+        analysis.target_files = None
+        analysis.treesitter_java = TreesitterJava()
+        analysis.backend = SnapshotBackend(self)
+        return analysis
+
+    def restore(self, build: Callable, analysis: JavaAnalysis) -> Any:
+        """Read an index written with the analysis.
+
+        Args:
+            build (Callable): The index, as passed to `CLDKAnalysis.derived`.
+            analysis (JavaAnalysis): The analysis loaded from this snapshot.
+
+        Returns:
+            Any: The index, None if the snapshot does not hold it.
+        """
+        if build is SearchIndex and "index/search" in self.snapshot:
+            return SearchIndex.from_bytes(self.snapshot.read("index/search"))
+        if build is CallIndex and "index/call_graph" in self.snapshot:
+            graph = CallGraph.from_bytes(self.snapshot.read("index/call_graph"))
+            return CallIndex.from_graph(graph, _GraphMethods(graph, analysis))
+        if build is ClassIndex and "index/classes" in self.snapshot:
+            return ClassIndex.from_bytes(self.snapshot.read("index/classes"), analysis)
+        if build is CommentIndex and "index/comments" in self.snapshot:
+            return CommentIndex.from_bytes(self.snapshot.read("index/comments"))
+        if build is CrudIndex and "index/crud" in self.snapshot:
+            return CrudIndex.from_bytes(self.snapshot.read("index/crud"), analysis)
+        return None
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self.snapshot.close()
+
+
+class SnapshotBackend(JCodeanalyzer):
+    """CLDK backend answering from an analysis snapshot instead of codeanalyzer's output.
+
+    The lookups of one class, method, file or compilation unit only read the unit they are about; anything that needs
+    the whole symbol table (or the call graph) reads all of it once, after which the backend behaves as CLDK's own.
+    """
+
+    def __init__(self, snapshot: AnalysisSnapshot):
+        """Create the backend.
+
+        Args:
+            snapshot (AnalysisSnapshot): The snapshot it reads.
+        """
+        # JCodeanalyzer.__init__ would run codeanalyzer.
+        self.project_dir = str(snapshot.project_path)
+        self.source_code = None
+        self.analysis_backend_path = None
+        self.analysis_json_path = None
+        self.eager_analysis = False
+        self.analysis_level = snapshot.analysis_level
+        self.target_files = None
+        self.application = JApplication.model_construct(symbol_table={}, call_graph=None, system_dependency_graph=None)
+        self._snapshot = snapshot
+        self._call_graph = None
+        self._complete = False
+        self._lock = threading.Lock()
+
+    @property
+    def call_graph(self):
+        # Built on first use, at the analysis levels where CLDK builds it up front.
+        if self._call_graph is None and self.analysis_level == AnalysisLevel.call_graph:
+            self._call_graph = self._generate_call_graph(using_symbol_table=False)
+        return self._call_graph
+
+    @call_graph.setter
+    def call_graph(self, call_graph) -> None:
+        self._call_graph = call_graph
+
+    def load_all(self) -> None:
+        """Read every compilation unit and graph not read yet."""
+        if self._complete:
+            return
+        with self._lock:
+            if self._complete:
+                return
+            loaded = self.application.symbol_table
+            # In the order codeanalyzer produced them, whatever the order they were read in.
+            self.application.symbol_table = {file_path: loaded.get(file_path) or self._read_unit(file_path) for file_path in self._snapshot.manifest["files"]}
+            for graph in ("call_graph", "system_dependency_graph"):
+                data = self._snapshot.snapshot.read(graph)
+                setattr(self.application, graph, None if data is None else _GRAPH.validate_json(data))
+            self._complete = True
+
+    def get_symbol_table(self) -> dict[str, JCompilationUnit]:
+        self.load_all()
+        return super().get_symbol_table()
+
+    def get_application_view(self) -> JApplication:
+        self.load_all()
+        return super().get_application_view()
+
+    def get_compilation_units(self) -> list[JCompilationUnit]:
+        self.load_all()
+        return super().get_compilation_units()
+
+    def get_system_dependency_graph(self) -> list[JGraphEdges]:
+        self.load_all()
+        return super().get_system_dependency_graph()
+
+    def get_java_compilation_unit(self, file_path: str) -> JCompilationUnit:
+        if self._complete:
+            return super().get_java_compilation_unit(file_path)
+        unit = self._unit(file_path)
+        if unit is None:
+            raise KeyError(file_path)
+        return unit
+
+    def get_java_file(self, qualified_class_name: str) -> str:
+        if self._complete:
+            return super().get_java_file(qualified_class_name)
+        return self._snapshot.manifest["classes"].get(qualified_class_name)
+
+    def get_class(self, qualified_class_name: str) -> JType:
+        if self._complete:
+            return super().get_class(qualified_class_name)
+        file_path = self._snapshot.manifest["classes"].get(qualified_class_name)
+        unit = None if file_path is None else self._unit(file_path)
+        return None if unit is None else unit.type_declarations.get(qualified_class_name)
+
+    def get_method(self, qualified_class_name: str, method_signature: str) -> JCallable:
+        if self._complete:
+            return super().get_method(qualified_class_name, method_signature)
+        typ = self.get_class(qualified_class_name)
+        return None if typ is None else typ.callable_declarations.get(method_signature)
+
+    def get_comment_in_file(self, file_path: str) -> list[JComment]:
+        if self._complete:
+            return super().get_comment_in_file(file_path)
+        unit = self._unit(file_path)
+        if unit is None:
+            return super().get_comment_in_file(file_path)
+        return unit.comments
+
+    def _unit(self, file_path: str) -> JCompilationUnit | None:
+        with self._lock:
+            unit = self.application.symbol_table.get(file_path)
+            if unit is None and not self._complete:
+                unit = self._read_unit(file_path)
+                if unit is not None:
+                    self.application.symbol_table[file_path] = unit
+            return unit
+
+    def _read_unit(self, file_path: str) -> JCompilationUnit | None:
+        data = self._snapshot.snapshot.read(f"symbol_table/{file_path}")
+        return None if data is None else JCompilationUnit.model_validate_json(data)
+
+
+class _GraphMethods(Mapping[MethodKey, JCallable]):
+    # The methods of a call graph loaded from a snapshot, read from the analysis as the lookups reach them.
+
+    def __init__(self, graph: CallGraph, analysis: JavaAnalysis):
+        self.graph = graph
+        self.analysis = analysis
+
+    def __getitem__(self, key: MethodKey) -> JCallable:
+        callable = self.analysis.get_method(*key)
+        if callable is None:
+            raise KeyError(key)
+        return callable
+
+    def __iter__(self) -> Iterator[MethodKey]:
+        return (self.graph.key(method_id) for method_id in range(len(self.graph)))
+
+    def __len__(self) -> int:
+        return len(self.graph)
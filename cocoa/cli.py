@@ -1,40 +1,220 @@
 import typer
+import asyncio
+from enum import Enum
 from typing import *
-from cldk import CLDK
 from pathlib import Path
-from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
-from cldk.analysis.java import JavaAnalysis
-from fastmcp import FastMCP
 
-from cocoa.tools import iter_explainers, iter_tools
+# Only what `--help` needs is imported here: the server modules (fastmcp, CLDK through the tools) are imported when the
+# server starts, and CLDK only once the server runs, off the event loop.
+if TYPE_CHECKING:
+    from fastmcp import FastMCP
+    from starlette.requests import Request
+    from starlette.responses import Response
 
+    from cocoa.registry import ProjectRegistry
+    from cocoa.utils.startup import StartupProfile
 
-@dataclass
-class CLDKAnalysis:
-    """
-    Data class to hold the CLDK analysis instance.
-    """
 
-    project_path: Path
-    analysis_instance: JavaAnalysis | None = field(default=None, init=False)
+class AnalysisLevelOption(str, Enum):
+    """The values of CLDK's AnalysisLevel, which the CLI cannot import without importing all of CLDK."""
+
+    symbol_table = "symbol table"
+    call_graph = "call graph"
+    program_dependency_graph = "program dependency graph"
+    system_dependency_graph = "system dependency graph"
+
 
-    def __post_init__(self):
-        self.analysis_instance = CLDK("java").analysis(project_path=str(self.project_path))
+class TransportOption(str, Enum):
+    """The MCP transports the server runs over."""
+
+    stdio = "stdio"
+    streamable_http = "streamable-http"
+    sse = "sse"
+
+
+def create_lifespan(registry: "ProjectRegistry", warm: bool = False, profile: "StartupProfile | None" = None, shared: bool = False):
+    """
+    Create the lifespan of the MCP sessions, all of which work with the same project registry.
 
+    Over stdio, the only session starts the registry and closes it when it ends. Over HTTP, the registry is `shared` by
+    all the sessions, so they use the same analyses and caches: it runs as long as the application (see `serve_http`).
+    """
 
-def create_lifespan(project_path: Path):
     @asynccontextmanager
-    async def coco_lifespan(server: FastMCP) -> AsyncIterator[CLDKAnalysis]:
+    async def coco_lifespan(server: "FastMCP") -> AsyncIterator["ProjectRegistry"]:
         """
         Context manager to start the cocoa MCP server.
         """
-        yield CLDKAnalysis(project_path=project_path)
+        if shared:
+            yield registry
+            return
+        if profile is not None:
+            profile.mark("start the server")
+        async with run_registry(registry, warm, profile):
+            yield registry
 
     return coco_lifespan
 
 
+@asynccontextmanager
+async def run_registry(registry: "ProjectRegistry", warm: bool = False, profile: "StartupProfile | None" = None) -> AsyncIterator[None]:
+    """
+    Load the projects in the background while the server runs, then close the registry.
+    """
+    # The analyses run in the background, so the server can complete the MCP handshake right away.
+    start_task = asyncio.create_task(start_registry(registry, warm, profile))
+    try:
+        yield
+    finally:
+        start_task.cancel()
+        registry.close()
+
+
+async def start_registry(registry: "ProjectRegistry", warm: bool = False, profile: "StartupProfile | None" = None) -> None:
+    """
+    Import CLDK and the tool modules off the event loop, start loading the explicitly given projects, then warm the others.
+    """
+    from cocoa.tools.manifest import import_module, preload_tools
+
+    await asyncio.to_thread(import_module, "cocoa.analysis")
+    if profile is not None:
+        profile.mark("import CLDK")
+    analyses = {name: registry.get(name) for name in registry.paths}
+    await asyncio.to_thread(preload_tools)
+    if profile is not None:
+        profile.mark("import the tools")
+        for name, analysis in analyses.items():
+            try:
+                await analysis.wait_until_ready(timeout=None)
+            except Exception:
+                pass
+            profile.mark(f"load the analysis of {name} ({analysis.phase})")
+    if warm:
+        await registry.warm()
+
+
+def serve_http(
+    mcp: "FastMCP",
+    registry: "ProjectRegistry",
+    transport: str,
+    host: str,
+    port: int,
+    max_connections: int | None = None,
+    warm: bool = False,
+    profile: "StartupProfile | None" = None,
+) -> None:
+    """
+    Serve the MCP server over HTTP, with one project registry for all the sessions, until the process is stopped.
+
+    Connections beyond `max_connections` are answered with 503 Service Unavailable.
+    """
+    import uvicorn
+
+    http_app = mcp.http_app(transport=transport)
+    sessions_lifespan = http_app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app) -> AsyncIterator[None]:
+        if profile is not None:
+            profile.mark("start the server")
+        async with sessions_lifespan(app), run_registry(registry, warm, profile):
+            yield
+
+    http_app.router.lifespan_context = lifespan
+    uvicorn.run(http_app, host=host, port=port, limit_concurrency=max_connections, timeout_graceful_shutdown=0, log_level=mcp.settings.log_level.lower())
+
+
+def serve_workers(
+    mcp: "FastMCP",
+    registry: "ProjectRegistry",
+    host: str,
+    port: int,
+    workers: int,
+    max_connections: int | None = None,
+    profile: "StartupProfile | None" = None,
+) -> None:
+    """
+    Serve the MCP server over streamable HTTP from `workers` processes sharing the analyses, until the process is stopped.
+
+    The analyses of the explicitly given projects, their derived indexes and a snapshot of their whole-project responses
+    are built once, in this process, and frozen before the workers are forked: the workers share them copy-on-write (and
+    the memory-mapped snapshot through the page cache) instead of each holding a copy. The workers accept connections
+    on the same socket; the sessions are stateless, since their requests may reach any worker.
+    """
+    import gc
+    import os
+    import signal
+    import socket
+    import tempfile
+
+    import uvicorn
+
+    from cocoa.tools.manifest import preload_tools
+    from cocoa.tools.snapshot import freeze_project
+
+    preload_tools()
+    if profile is not None:
+        profile.mark("import CLDK and the tools")
+    mcp.settings.stateless_http = True
+    http_app = mcp.http_app(transport="streamable-http")
+    sessions_lifespan = http_app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app) -> AsyncIterator[None]:
+        async with sessions_lifespan(app), run_registry(registry):
+            yield
+
+    http_app.router.lifespan_context = lifespan
+    config = uvicorn.Config(http_app, limit_concurrency=max_connections, timeout_graceful_shutdown=0, log_level=mcp.settings.log_level.lower())
+
+    with tempfile.TemporaryDirectory(prefix="cocoa-snapshot-") as snapshot_dir:
+        for name in registry.paths:
+            freeze_project(registry, name, Path(snapshot_dir))
+            if profile is not None:
+                profile.mark(f"load and freeze the analysis of {name}")
+        # Keep the collector from writing to (and so copying) the pages of the objects shared with the workers.
+        gc.collect()
+        gc.freeze()
+        sock = socket.create_server((host, port))
+        pids = []
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    uvicorn.Server(config).run(sockets=[sock])
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+        sock.close()
+        if profile is not None:
+            profile.mark(f"fork {workers} workers")
+
+        def stop(signum, frame) -> None:
+            for pid in pids:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for pid in pids:
+            os.waitpid(pid, 0)
+
+
+async def metrics_endpoint(request: "Request") -> "Response":
+    """
+    Serve the tool metrics in the Prometheus text format.
+    """
+    from starlette.responses import PlainTextResponse
+
+    from cocoa.utils.metrics import METRICS
+
+    return PlainTextResponse(METRICS.prometheus(), media_type="text/plain; version=0.0.4")
+
+
 # The main entry point for the CLI application
 app = typer.Typer(
     name="cocoa",
@@ -58,24 +238,146 @@ def main():
 
 @app.command()
 def toolbox(
-    project_path: Annotated[Path, typer.Option("-p", "--project-path", help="Path to the project directory")],
+    project_paths: Annotated[
+        list[Path] | None, typer.Option("-p", "--project-path", help="Path to a project directory, repeat to serve several projects (the first one is the default)")
+    ] = None,
+    projects_root: Annotated[Path | None, typer.Option("--projects-root", help="Directory whose sub-directories are served as projects, loaded on first use")] = None,
+    analysis_level: Annotated[AnalysisLevelOption, typer.Option("--analysis-level", help="Depth of the CLDK analysis")] = AnalysisLevelOption.symbol_table,
+    cache_dir: Annotated[Path, typer.Option("--cache-dir", envvar="COCOA_CACHE_DIR", help="Directory of the persistent analysis cache")] = Path("~/.cache/cocoa"),
+    cache_size: Annotated[int, typer.Option("--cache-size", help="Maximum size of the analysis cache in MB")] = 2048,
+    no_cache: Annotated[bool, typer.Option("--no-cache", help="Always re-run the analysis and do not persist it")] = False,
+    watch: Annotated[bool, typer.Option("--watch", help="Re-analyze changed Java files while the server is running")] = False,
+    watch_interval: Annotated[float, typer.Option("--watch-interval", help="Seconds between two checks for changed files in watch mode")] = 2.0,
+    ready_timeout: Annotated[float, typer.Option("--ready-timeout", help="Seconds a tool call waits for the analysis to be ready")] = 120.0,
+    max_workers: Annotated[int, typer.Option("--max-workers", help="Number of threads running tool calls")] = 8,
+    max_heavy: Annotated[int, typer.Option("--max-heavy", help="Maximum number of whole-project tool calls running at once")] = 2,
+    response_cache_size: Annotated[int, typer.Option("--response-cache-size", help="Memory budget of the tool response cache of each project in MB, 0 disables it")] = 256,
+    memory_budget: Annotated[int, typer.Option("--memory-budget", help="Memory budget of the loaded analyses in MB, 0 for no bound")] = 0,
+    warm: Annotated[bool, typer.Option("--warm", help="Load the projects found in the analysis cache at startup, within the memory budget")] = False,
+    profile_startup: Annotated[bool, typer.Option("--profile-startup", help="Report the time spent in each phase of the startup on stderr")] = False,
+    transport: Annotated[TransportOption, typer.Option("--transport", help="MCP transport; the HTTP ones serve many sessions sharing the same analyses")] = TransportOption.stdio,
+    host: Annotated[str, typer.Option("--host", help="Address the HTTP transports listen on")] = "127.0.0.1",
+    port: Annotated[int, typer.Option("--port", help="Port the HTTP transports listen on")] = 8000,
+    max_connections: Annotated[int, typer.Option("--max-connections", help="Maximum number of concurrent HTTP connections, 0 for no limit")] = 0,
+    request_timeout: Annotated[float, typer.Option("--request-timeout", help="Seconds after which a tool call fails, 0 for no limit")] = 0,
+    workers: Annotated[int, typer.Option("--workers", help="Number of server processes sharing the analyses of the --project-path projects (streamable-http only)")] = 1,
+    snapshots: Annotated[
+        list[Path] | None, typer.Option("--snapshot", help="Analysis snapshot written by cocoa index, served instead of analyzing its project; repeat to serve several")
+    ] = None,
 ):
     """
     Start the cocoa MCP server.
     """
+    if not project_paths and projects_root is None and not snapshots:
+        raise typer.BadParameter("Pass at least one --project-path, --snapshot or a --projects-root.")
+    if workers < 1:
+        raise typer.BadParameter("--workers must be at least 1.")
+    if workers > 1 and (transport is not TransportOption.streamable_http or watch):
+        raise typer.BadParameter("--workers needs --transport streamable-http, and cannot be combined with --watch.")
+    if watch and analysis_level is not AnalysisLevelOption.symbol_table:
+        raise typer.BadParameter("--watch is only supported with --analysis-level 'symbol table'.")
+    if watch and snapshots:
+        raise typer.BadParameter("--watch cannot be combined with --snapshot, whose sources may be another checkout than the watched one.")
+    from cocoa.utils.startup import StartupProfile
+
+    profile = StartupProfile() if profile_startup else None
+    if profile is not None:
+        profile.mark("start Python and parse the options")
+
+    from fastmcp import FastMCP
+
+    from cocoa.registry import ProjectRegistry
+    from cocoa.tools import iter_resources, with_timeout
+    from cocoa.tools.manifest import load_tools
+    from cocoa.utils.cache import AnalysisCache
+    from cocoa.utils.executor import ToolExecutor
+    from cocoa.utils.metrics import METRICS
+
+    if profile is not None:
+        profile.mark("import fastmcp")
+    cache = None if no_cache else AnalysisCache(cache_dir, max_size=cache_size * 1024 * 1024)
+    executor = ToolExecutor(max_workers=max_workers, max_heavy=max_heavy)
+    registry = ProjectRegistry(
+        project_paths=project_paths,
+        projects_root=projects_root,
+        analysis_level=analysis_level.value,
+        cache=cache,
+        ready_timeout=ready_timeout,
+        executor=executor,
+        response_cache_size=response_cache_size * 1024 * 1024,
+        memory_budget=memory_budget * 1024 * 1024 or None,
+        watch_interval=watch_interval if watch else None,
+        snapshots=snapshots,
+    )
+    http = transport is not TransportOption.stdio
+
     # Create MCP instance with project-specific lifespan
-    mcp = FastMCP(name="cocoa", lifespan=create_lifespan(project_path), description="Code Context Agent (CoCoA) Toolbox as an MCP server")
+    mcp = FastMCP(
+        name="cocoa",
+        lifespan=create_lifespan(registry, warm, profile, shared=http),
+        description="Code Context Agent (CoCoA) Toolbox as an MCP server",
+    )
+
+    # Register the tools and explainers from the manifest; their modules are imported in the background once the server runs.
+    # FastMCP.add_tool only takes a function, which would import them right away, hence the tool manager and the pinned
+    # FastMCP version (see pyproject.toml).
+    for tool in load_tools(wrap=lambda fn: METRICS.instrument(with_timeout(fn, request_timeout or None))):
+        mcp._tool_manager.add_tool(tool)
 
-    # Register tools
-    for tool in iter_tools():
-        mcp.add_tool(tool)
+    # Serve the tool metrics to Prometheus over HTTP transports
+    mcp.custom_route("/metrics", methods=["GET"])(metrics_endpoint)
 
-    # Register explainers
-    for explainer in iter_explainers():
-        mcp.add_tool(explainer)
+    # Register resources
+    for uri, resource in iter_resources():
+        mcp.add_resource_fn(resource, uri=uri, mime_type="application/x-ndjson")
+    if profile is not None:
+        profile.mark("register the tools")
 
     # Run the MCP server
-    mcp.run()
+    if workers > 1:
+        serve_workers(mcp, registry, host, port, workers, max_connections or None, profile)
+    elif http:
+        serve_http(mcp, registry, transport.value, host, port, max_connections or None, warm, profile)
+    else:
+        mcp.run()
+
+
+@app.command()
+def index(
+    project_path: Annotated[Path, typer.Option("-p", "--project-path", help="Path to the project directory")],
+    output: Annotated[Path | None, typer.Option("-o", "--output", help="Snapshot file to write; defaults to <project name>.cocoa")] = None,
+    analysis_level: Annotated[AnalysisLevelOption, typer.Option("--analysis-level", help="Depth of the CLDK analysis")] = AnalysisLevelOption.symbol_table,
+    cache_dir: Annotated[Path, typer.Option("--cache-dir", envvar="COCOA_CACHE_DIR", help="Directory of the persistent analysis cache")] = Path("~/.cache/cocoa"),
+    cache_size: Annotated[int, typer.Option("--cache-size", help="Maximum size of the analysis cache in MB")] = 2048,
+    no_cache: Annotated[bool, typer.Option("--no-cache", help="Always re-run the analysis and do not persist it")] = False,
+    compression: Annotated[int, typer.Option("--compression", min=0, max=9, help="zlib compression level of the snapshot")] = 6,
+    query_store: Annotated[
+        bool, typer.Option("--query-store", help="Also write an indexed SQLite copy of the symbol table (<output>.sqlite) that class lookups are answered from")
+    ] = False,
+):
+    """
+    Analyze a project and write a snapshot of the analysis and its indexes, which cocoa toolbox --snapshot serves from.
+
+    The file paths in the snapshot are those of the analyzed checkout.
+    """
+    from cldk.analysis import AnalysisLevel
+
+    from cocoa.analysis import CLDKAnalysis
+    from cocoa.analysis_snapshot import AnalysisSnapshot
+    from cocoa.query_store import QueryStore
+    from cocoa.utils.cache import AnalysisCache
+
+    project_path = project_path.absolute()
+    output = output or Path(f"{project_path.name}.cocoa")
+    cache = None if no_cache else AnalysisCache(cache_dir, max_size=cache_size * 1024 * 1024)
+    analysis = CLDKAnalysis(project_path=project_path, analysis_level=AnalysisLevel(analysis_level.value), cache=cache)
+    analysis.load()
+    store_path = output.with_name(f"{output.name}.sqlite") if query_store else None
+    if store_path is not None:
+        QueryStore.write(store_path, analysis)
+    AnalysisSnapshot.write(output, analysis, compression=compression, query_store=store_path)
+    analysis.executor.shutdown()
+    typer.echo(f"Wrote {output} ({output.stat().st_size} bytes, {len(analysis.analysis_instance.get_symbol_table())} compilation units)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,22 @@
+################################################################################
+# Copyright IBM Corporation 2025
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+from .call_graph import CallGraph
+from .call_index import CallIndex
+from .class_index import ClassFilter, ClassIndex
+from .comment_index import CommentIndex
+from .crud_index import CrudIndex
+from .search_index import SearchIndex
+
+__all__ = ["CallGraph", "CallIndex", "ClassFilter", "ClassIndex", "CommentIndex", "CrudIndex", "SearchIndex"]
@@ -0,0 +1,205 @@
+import io
+import sys
+import json
+from typing import Any, Callable, Iterable
+
+import networkx as nx
+import numpy as np
+
+# A method, identified by its qualified class name and signature.
+MethodKey = tuple[str, str]
+
+
+class CallGraph:
+    """Compact, array-backed call graph.
+
+    Methods get integer IDs in (class, signature) order; their names live in two interned string tables. Edges are held
+    twice in CSR form, once per direction: the neighbors of method `i` are `targets[offsets[i]:offsets[i + 1]]`, in the
+    order the edges were given. Traversals work on whole frontiers at once with NumPy instead of per-node Python dicts.
+    """
+
+    def __init__(self, keys: Iterable[MethodKey], edges: Iterable[tuple[MethodKey, MethodKey]]):
+        """Build the graph.
+
+        Args:
+            keys (Iterable[MethodKey]): Every method of the graph.
+            edges (Iterable[tuple[MethodKey, MethodKey]]): The (caller, callee) pairs, without duplicates; both ends must be in `keys`.
+        """
+        keys = sorted(set(keys))
+        self.classes: list[str] = sorted({sys.intern(cls) for cls, _ in keys})
+        self.signatures: list[str] = sorted({sys.intern(sig) for _, sig in keys})
+        class_ids = {cls: i for i, cls in enumerate(self.classes)}
+        signature_ids = {sig: i for i, sig in enumerate(self.signatures)}
+        self.class_ids = np.fromiter((class_ids[cls] for cls, _ in keys), dtype=np.int32, count=len(keys))
+        self.signature_ids = np.fromiter((signature_ids[sig] for _, sig in keys), dtype=np.int32, count=len(keys))
+        self._ids: dict[MethodKey, int] = {key: i for i, key in enumerate(keys)}
+
+        pairs = np.array([(self._ids[source], self._ids[target]) for source, target in edges], dtype=np.int32).reshape(-1, 2)
+        self.offsets, self.targets = _csr(pairs[:, 0], pairs[:, 1], len(keys))
+        self.reverse_offsets, self.sources = _csr(pairs[:, 1], pairs[:, 0], len(keys))
+
+    @classmethod
+    def from_networkx(cls, graph: nx.DiGraph) -> "CallGraph":
+        """Build the graph from CLDK's call graph, whose nodes are (signature, class) pairs.
+
+        Args:
+            graph (nx.DiGraph): The call graph returned by `JavaAnalysis.get_call_graph`.
+
+        Returns:
+            CallGraph: The same graph.
+        """
+        return cls(((c, s) for s, c in graph.nodes), (((sc, ss), (tc, ts)) for (ss, sc), (ts, tc) in graph.edges))
+
+    def to_bytes(self) -> bytes:
+        """Serialize the graph, e.g. into an analysis snapshot: its arrays as they are, in NumPy's `.npz` format.
+
+        Returns:
+            bytes: The serialized graph, see `from_bytes`.
+        """
+        names = np.frombuffer(json.dumps([self.classes, self.signatures]).encode(), dtype=np.uint8)
+        arrays = {name: getattr(self, name) for name in ("class_ids", "signature_ids", "offsets", "targets", "reverse_offsets", "sources")}
+        buffer = io.BytesIO()
+        np.savez(buffer, names=names, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CallGraph":
+        """Load a graph serialized by `to_bytes`.
+
+        Args:
+            data (bytes): The serialized graph.
+
+        Returns:
+            CallGraph: The graph.
+        """
+        graph = cls.__new__(cls)
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            classes, signatures = json.loads(arrays["names"].tobytes())
+            graph.classes = [sys.intern(name) for name in classes]
+            graph.signatures = [sys.intern(name) for name in signatures]
+            for name in ("class_ids", "signature_ids", "offsets", "targets", "reverse_offsets", "sources"):
+                setattr(graph, name, arrays[name])
+        graph._ids = {graph.key(i): i for i in range(len(graph))}
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.class_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def id(self, key: MethodKey) -> int | None:
+        """Get the ID of a method, None if it is not in the graph."""
+        return self._ids.get(key)
+
+    def key(self, method_id: int) -> MethodKey:
+        """Get the (class, signature) key of a method ID."""
+        return self.classes[self.class_ids[method_id]], self.signatures[self.signature_ids[method_id]]
+
+    def successors(self, method_id: int) -> np.ndarray:
+        """Get the IDs of the methods a method calls."""
+        return self.targets[self.offsets[method_id] : self.offsets[method_id + 1]]
+
+    def predecessors(self, method_id: int) -> np.ndarray:
+        """Get the IDs of the methods calling a method."""
+        return self.sources[self.reverse_offsets[method_id] : self.reverse_offsets[method_id + 1]]
+
+    def bfs(self, roots: Iterable[int], max_depth: int, max_results: int, reverse: bool = False) -> tuple[list[tuple[int, int]], bool]:
+        """Find the methods reachable from `roots` in at most `max_depth` calls, breadth first.
+
+        Args:
+            roots (Iterable[int]): The start method IDs, at depth 0. They are not part of the result unless reachable from another root.
+            max_depth (int): Maximum number of calls.
+            max_results (int): Maximum number of methods returned.
+            reverse (bool, optional): Follow the edges backwards, from callee to caller. Defaults to False.
+
+        Returns:
+            tuple[list[tuple[int, int]], bool]: The (ID, depth) of each reached method, by depth then ID, and whether
+            `max_results` cut the search short.
+        """
+        offsets, targets = (self.reverse_offsets, self.sources) if reverse else (self.offsets, self.targets)
+        visited = np.zeros(len(self), dtype=bool)
+        frontier = np.unique(np.fromiter(roots, dtype=np.int32))
+        visited[frontier] = True
+        reached: list[tuple[int, int]] = []
+        for depth in range(1, max_depth + 1):
+            neighbors = _gather(offsets, targets, frontier)
+            frontier = np.unique(neighbors[~visited[neighbors]])
+            if len(frontier) == 0:
+                break
+            visited[frontier] = True
+            remaining = max_results - len(reached)
+            reached.extend((int(method_id), depth) for method_id in frontier[:remaining])
+            if len(frontier) > remaining:
+                return reached, True
+        return reached, False
+
+    def shortest_path(self, source: int, target: int, max_depth: int) -> list[int] | None:
+        """Find a shortest chain of calls between two methods.
+
+        Args:
+            source (int): The calling method ID.
+            target (int): The called method ID.
+            max_depth (int): Maximum number of calls in the chain.
+
+        Returns:
+            list[int] | None: The method IDs of the chain from `source` to `target`, None if there is none within `max_depth` calls.
+        """
+        if source == target:
+            return [source]
+        parents = np.full(len(self), -1, dtype=np.int64)
+        parents[source] = source
+        frontier = np.array([source], dtype=np.int32)
+        for _ in range(max_depth):
+            counts = self.offsets[frontier + 1] - self.offsets[frontier]
+            neighbors = _gather(self.offsets, self.targets, frontier)
+            callers = np.repeat(frontier, counts)
+            new = parents[neighbors] == -1
+            neighbors, callers = neighbors[new], callers[new]
+            if len(neighbors) == 0:
+                return None
+            # The first caller found for a method is as good as any other.
+            frontier, first = np.unique(neighbors, return_index=True)
+            parents[frontier] = callers[first]
+            if parents[target] != -1:
+                path = [target]
+                while path[-1] != source:
+                    path.append(int(parents[path[-1]]))
+                return path[::-1]
+        return None
+
+    def to_networkx(self, node_attributes: Callable[[MethodKey], dict[str, Any]] | None = None) -> nx.DiGraph:
+        """Export the graph to NetworkX, with CLDK's (signature, class) node keys.
+
+        Args:
+            node_attributes (Callable[[MethodKey], dict[str, Any]] | None, optional): The attributes of each node, e.g. its `method_detail`.
+
+        Returns:
+            nx.DiGraph: The call graph.
+        """
+        graph = nx.DiGraph()
+        nodes = [self.key(i) for i in range(len(self))]
+        graph.add_nodes_from(((sig, cls), node_attributes((cls, sig)) if node_attributes else {}) for cls, sig in nodes)
+        sources = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+        graph.add_edges_from(((nodes[s][1], nodes[s][0]), (nodes[t][1], nodes[t][0])) for s, t in zip(sources.tolist(), self.targets.tolist()))
+        return graph
+
+
+def _csr(sources: np.ndarray, targets: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    # A stable sort keeps the edges of each node in the order they were given.
+    order = np.argsort(sources, kind="stable")
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=size), out=offsets[1:])
+    return offsets, targets[order].astype(np.int32)
+
+
+def _gather(offsets: np.ndarray, targets: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    # Concatenate targets[offsets[n]:offsets[n + 1]] for every node, without a Python loop.
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int32)
+    positions = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(starts, counts)
+    return targets[positions]
@@ -0,0 +1,147 @@
+import re
+from typing import Dict, Mapping
+
+from cldk.analysis.commons.treesitter import TreesitterJava
+from cldk.analysis.java import JavaAnalysis
+from cldk.models.java.models import JCallable, JCallSite, JMethodDetail
+
+from cocoa.indexes.call_graph import CallGraph, MethodKey
+
+# Same simplification CLDK applies to call site signatures, which are fully qualified while the callable keys are not.
+_QUALIFIED_TYPE = re.compile(r"\b(?:[a-zA-Z_][\w\.]*\.)+([a-zA-Z_][\w]*)\b|<[^>]*>")
+
+
+class CallIndex:
+    """Caller and callee adjacency of the symbol table call graph.
+
+    Resolves every call site of the project once, with the same rules as CLDK's `get_callers`/`get_callees` over the
+    symbol table, into a `CallGraph`, so each lookup afterwards only touches the edges of the method it is about. The
+    lines of each call are found with tree-sitter on first use and kept.
+    """
+
+    def __init__(self, analysis: JavaAnalysis):
+        """Build the index.
+
+        Args:
+            analysis (JavaAnalysis): The analysis to index.
+        """
+        self.methods: dict[MethodKey, JCallable] = {}
+        self._calling_lines: dict[tuple[MethodKey, MethodKey], list[int]] = {}
+
+        classes = analysis.get_classes()
+        for cls, typ in classes.items():
+            for signature, callable in typ.callable_declarations.items():
+                self.methods[(cls, signature)] = callable
+
+        edges = []
+        simplified: dict[str, str] = {}
+        for source, callable in self.methods.items():
+            seen = set()
+            for call_site in callable.call_sites:
+                if call_site.callee_signature not in simplified:
+                    simplified[call_site.callee_signature] = _simplify(call_site.callee_signature)
+                target = self._resolve(source[0], call_site, simplified[call_site.callee_signature], classes)
+                # Several calls to the same method make a single edge.
+                if target is not None and target not in seen:
+                    seen.add(target)
+                    edges.append((source, target))
+        self.graph = CallGraph(self.methods, edges)
+
+    @classmethod
+    def from_graph(cls, graph: CallGraph, methods: Mapping[MethodKey, JCallable]) -> "CallIndex":
+        """Create the index from a graph built before, e.g. loaded from an analysis snapshot.
+
+        Args:
+            graph (CallGraph): The resolved call graph.
+            methods (Mapping[MethodKey, JCallable]): The methods of the graph; only those the lookups are about are read.
+
+        Returns:
+            CallIndex: The index.
+        """
+        index = cls.__new__(cls)
+        index.graph, index.methods, index._calling_lines = graph, methods, {}
+        return index
+
+    def get_callers(self, target_class_name: str, target_method_signature: str) -> Dict:
+        """Get the callers of a method.
+
+        Args:
+            target_class_name (str): The qualified class name of the target method.
+            target_method_signature (str): The signature of the target method.
+
+        Returns:
+            Dict: {target_method, caller_details: [{caller_method, calling_lines}]} as returned by CLDK, or {} if the method is never called.
+        """
+        target = (target_class_name, target_method_signature)
+        target_id = self.graph.id(target)
+        callers = [] if target_id is None else [self.graph.key(source_id) for source_id in self.graph.predecessors(target_id)]
+        if not callers:
+            return {}
+        return {
+            "caller_details": [{"caller_method": self.method_detail(source), "calling_lines": self.calling_lines(source, target)} for source in callers],
+            "target_method": self.method_detail(target),
+        }
+
+    def get_callees(self, source_class_name: str, source_method_signature: str) -> Dict:
+        """Get the callees of a method.
+
+        Args:
+            source_class_name (str): The qualified class name of the source method.
+            source_method_signature (str): The signature of the source method.
+
+        Returns:
+            Dict: {source_method, callee_details: [{callee_method, calling_lines}]} as returned by CLDK, or {} if the method calls no other project method.
+        """
+        source = (source_class_name, source_method_signature)
+        source_id = self.graph.id(source)
+        callees = [] if source_id is None else [self.graph.key(target_id) for target_id in self.graph.successors(source_id)]
+        if not callees:
+            return {}
+        return {
+            "callee_details": [{"callee_method": self.method_detail(target), "calling_lines": self.calling_lines(source, target)} for target in callees],
+            "source_method": self.method_detail(source),
+        }
+
+    def method_detail(self, key: MethodKey) -> JMethodDetail:
+        """Describe a method the way CLDK's call graph nodes do.
+
+        Args:
+            key (MethodKey): The qualified class name and signature of the method.
+
+        Returns:
+            JMethodDetail: The method detail.
+        """
+        callable = self.methods[key]
+        return JMethodDetail(method_declaration=callable.declaration, klass=key[0], method=callable)
+
+    def calling_lines(self, source: MethodKey, target: MethodKey) -> list[int]:
+        """Get the lines of the source method's code that call the target method.
+
+        Args:
+            source (MethodKey): The calling method.
+            target (MethodKey): The called method.
+
+        Returns:
+            list[int]: Sorted zero-based line numbers within the source method's code.
+        """
+        lines = self._calling_lines.get((source, target))
+        if lines is None:
+            lines = sorted(TreesitterJava().get_calling_lines(self.methods[source].code, target[1]))
+            self._calling_lines[(source, target)] = lines
+        return lines
+
+    def _resolve(self, cls: str, call_site: JCallSite, signature: str, classes: dict) -> MethodKey | None:
+        # Calls without a receiver type are resolved against the calling class.
+        receiver = call_site.receiver_type or cls
+        if receiver not in classes or signature not in classes[receiver].callable_declarations:
+            return None
+        return (receiver, signature)
+
+
+def _simplify(callee_signature: str) -> str:
+    if not callee_signature:
+        return ""
+    start = callee_signature.find("(") + 1
+    end = callee_signature.rfind(")")
+    elements = [_QUALIFIED_TYPE.sub(r"\1", element.strip()) for element in callee_signature[start:end].split(",")]
+    return f"{callee_signature[:start]}{', '.join(elements)}{callee_signature[end:]}"
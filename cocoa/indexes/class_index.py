@@ -0,0 +1,239 @@
+import json
+from fnmatch import fnmatchcase
+from dataclasses import dataclass, fields
+from typing import Iterable, Sequence
+
+from cldk.analysis.java import JavaAnalysis
+from cldk.models.java.models import JCompilationUnit, JType
+
+
+@dataclass(frozen=True)
+class ClassFilter:
+    """Criteria a class must all meet; those left to None do not constrain it."""
+
+    # Substrings one of which the qualified name must contain.
+    inclusions: tuple[str, ...] | None = None
+    # Substrings the qualified name must not contain.
+    exclusions: tuple[str, ...] | None = None
+    # Glob the package must match, e.g. `com.acme.*.web`.
+    package: str | None = None
+    # Annotation of the class, with or without `@`, see `same_type`.
+    annotation: str | None = None
+    # Modifier of the class, e.g. `public` or `abstract`.
+    modifier: str | None = None
+    # Type the class implements, see `same_type`.
+    implements: str | None = None
+    # Type the class extends, see `same_type`.
+    extends: str | None = None
+    entrypoint: bool | None = None
+    # Bounds of the number of methods, constructors aside.
+    min_methods: int | None = None
+    max_methods: int | None = None
+    # Bounds of the sum of the cyclomatic complexities of the methods and constructors.
+    min_complexity: int | None = None
+    max_complexity: int | None = None
+
+    def __post_init__(self):
+        # Tool arguments arrive as lists, possibly empty.
+        for name in ("inclusions", "exclusions"):
+            value = getattr(self, name)
+            object.__setattr__(self, name, tuple(value) if value else None)
+
+    def is_empty(self) -> bool:
+        """Whether no criterion but exclusions is set, in which case no class matches, as with CLDK's `get_classes_by_criteria`.
+
+        Exclusions only narrow down the classes the other criteria select.
+        """
+        return all(getattr(self, field.name) is None for field in fields(self) if field.name != "exclusions")
+
+
+class ClassIndex:
+    """Attributes of every class, indexed to select the classes meeting a `ClassFilter` without visiting the others.
+
+    Classes are numbered in the order CLDK lists them. Each package, annotation, modifier, implemented or extended type
+    and entry point flag maps to the sorted IDs of its classes, and the method counts and complexities are kept per
+    class: a filter walks the narrowest selection of its criteria and checks the others on each class of it. The index
+    only holds plain values besides the JTypes, so that it can be written into an analysis snapshot without them.
+    """
+
+    # Attributes written by `to_bytes`, one value per class.
+    ATTRIBUTES = ("names", "file_paths", "packages", "annotations", "modifiers", "implements", "extends", "entrypoints", "method_counts", "complexities")
+
+    def __init__(self, analysis: JavaAnalysis):
+        """Build the index.
+
+        Args:
+            analysis (JavaAnalysis): The analysis whose classes are indexed.
+        """
+        # Same traversal as CLDK, so that the classes come out in the same order.
+        classes: dict[str, tuple[str, JCompilationUnit, JType]] = {}
+        for file_path, unit in analysis.get_symbol_table().items():
+            for class_name, typ in unit.type_declarations.items():
+                classes[class_name] = (file_path, unit, typ)
+
+        self.names: list[str] = list(classes)
+        self.types: Sequence[JType] = [typ for _, _, typ in classes.values()]
+        # The file of the declaration CLDK lists, for classes declared in several files.
+        self.file_paths: list[str] = [file_path for file_path, _, _ in classes.values()]
+        self.packages: list[str] = [unit.package_name for _, unit, _ in classes.values()]
+        self.annotations: list[list[str]] = [sorted({annotation_name(annotation, unit.imports) for annotation in typ.annotations}) for _, unit, typ in classes.values()]
+        self.modifiers: list[list[str]] = [typ.modifiers for typ in self.types]
+        self.implements: list[list[str]] = [typ.implements_list for typ in self.types]
+        self.extends: list[list[str]] = [typ.extends_list for typ in self.types]
+        self.entrypoints: list[bool] = [typ.is_entrypoint_class for typ in self.types]
+        self.method_counts: list[int] = [method_count(typ) for typ in self.types]
+        self.complexities: list[int] = [complexity(typ) for typ in self.types]
+        self._index()
+
+    def to_bytes(self) -> bytes:
+        """Serialize the index, e.g. into an analysis snapshot, as JSON.
+
+        Returns:
+            bytes: The serialized index, without the JTypes, see `from_bytes`.
+        """
+        return json.dumps({attribute: getattr(self, attribute) for attribute in self.ATTRIBUTES}).encode()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, analysis: JavaAnalysis) -> "ClassIndex":
+        """Load an index serialized by `to_bytes`.
+
+        Args:
+            data (bytes): The serialized index.
+            analysis (JavaAnalysis): The analysis it was built from; the JTypes are only read from it as they are used.
+
+        Returns:
+            ClassIndex: The index.
+        """
+        index = cls.__new__(cls)
+        for attribute, values in json.loads(data).items():
+            setattr(index, attribute, values)
+        index.types = _Types(index.names, index.file_paths, analysis)
+        index._index()
+        return index
+
+    def _index(self) -> None:
+        self._ids: dict[tuple[str, str | bool], list[int]] = {}
+        for class_id in range(len(self.names)):
+            keys = {("package", self.packages[class_id]), ("entrypoint", self.entrypoints[class_id])}
+            keys.update(("annotation", type_name(annotation)[1]) for annotation in self.annotations[class_id])
+            keys.update(("modifier", modifier) for modifier in self.modifiers[class_id])
+            keys.update(("implements", type_name(name)[1]) for name in self.implements[class_id])
+            keys.update(("extends", type_name(name)[1]) for name in self.extends[class_id])
+            for key in keys:
+                self._ids.setdefault(key, []).append(class_id)
+
+    def select(self, criteria: ClassFilter) -> list[int]:
+        """Select the classes meeting every criterion of a filter.
+
+        Args:
+            criteria (ClassFilter): The filter.
+
+        Returns:
+            list[int]: The IDs of the matching classes, in the order CLDK lists them; none if the filter is empty.
+        """
+        if criteria.is_empty():
+            return []
+        annotation = None if criteria.annotation is None else annotation_name(criteria.annotation)
+        selections: list[Sequence[int]] = []
+        if criteria.package is not None:
+            # Only the distinct packages are matched against the glob.
+            packages = [package for kind, package in self._ids if kind == "package" and fnmatchcase(package, criteria.package)]
+            selections.append(sorted(class_id for package in packages for class_id in self._ids[("package", package)]))
+        if annotation is not None:
+            # Every class with an annotation of the same simple name, to be narrowed down by `matches`.
+            selections.append(self._ids.get(("annotation", type_name(annotation)[1]), []))
+        for key in ("modifier", "entrypoint"):
+            if getattr(criteria, key) is not None:
+                selections.append(self._ids.get((key, getattr(criteria, key)), []))
+        for key in ("implements", "extends"):
+            if getattr(criteria, key) is not None:
+                # Every class with a super type of the same simple name, to be narrowed down by `matches`.
+                selections.append(self._ids.get((key, type_name(getattr(criteria, key))[1]), []))
+
+        def matches(class_id: int) -> bool:
+            name = self.names[class_id]
+            return (
+                (criteria.package is None or fnmatchcase(self.packages[class_id], criteria.package))
+                and (annotation is None or any(same_type(annotation, name) for name in self.annotations[class_id]))
+                and (criteria.modifier is None or criteria.modifier in self.modifiers[class_id])
+                and (criteria.implements is None or any(same_type(criteria.implements, super_type) for super_type in self.implements[class_id]))
+                and (criteria.extends is None or any(same_type(criteria.extends, super_type) for super_type in self.extends[class_id]))
+                and (criteria.entrypoint is None or self.entrypoints[class_id] == criteria.entrypoint)
+                and (criteria.inclusions is None or any(inclusion in name for inclusion in criteria.inclusions))
+                and not any(exclusion in name for exclusion in criteria.exclusions or ())
+                and (criteria.min_methods is None or self.method_counts[class_id] >= criteria.min_methods)
+                and (criteria.max_methods is None or self.method_counts[class_id] <= criteria.max_methods)
+                and (criteria.min_complexity is None or self.complexities[class_id] >= criteria.min_complexity)
+                and (criteria.max_complexity is None or self.complexities[class_id] <= criteria.max_complexity)
+            )
+
+        # Only the narrowest selection is walked.
+        return [class_id for class_id in min(selections, key=len, default=range(len(self.names))) if matches(class_id)]
+
+
+def annotation_name(annotation: str, imports: Iterable[str] = ()) -> str:
+    """Reduce an annotation, as written in the source or as a filter, to its name.
+
+    Args:
+        annotation (str): e.g. `@TransactionAttribute(TransactionAttributeType.REQUIRED)`.
+        imports (Iterable[str], optional): Imports of the compilation unit of the annotation, which qualify its name if it
+            is imported on its own.
+
+    Returns:
+        str: e.g. `javax.ejb.TransactionAttribute`, or `TransactionAttribute` if it is not imported on its own.
+    """
+    name = annotation.lstrip("@").split("(", 1)[0].strip()
+    if "." not in name:
+        name = next((imported for imported in imports if imported.endswith(f".{name}")), name)
+    return name
+
+
+def type_name(name: str) -> tuple[str, str]:
+    """Split a type name into its erasure and its simple name.
+
+    Args:
+        name (str): e.g. `java.util.HashMap<java.lang.String, java.lang.Object>`.
+
+    Returns:
+        tuple[str, str]: e.g. (`java.util.HashMap`, `HashMap`).
+    """
+    erasure = name.split("<", 1)[0].strip()
+    return erasure, erasure.rsplit(".", 1)[-1]
+
+
+def same_type(name: str, other: str) -> bool:
+    """Whether two type names may denote the same type, ignoring type arguments.
+
+    Qualified names are compared as such. CLDK leaves the super types it cannot resolve unqualified, and annotations are
+    only qualified by the imports of them (see `annotation_name`), so as soon as one of the names is unqualified, only the
+    simple names are compared.
+    """
+    (erasure, simple), (other_erasure, other_simple) = type_name(name), type_name(other)
+    if "." in erasure and "." in other_erasure:
+        return erasure == other_erasure
+    return simple == other_simple
+
+
+def method_count(typ: JType) -> int:
+    """Count the methods of a class, constructors aside, as `ClassFilter` bounds them."""
+    return sum(not callable.is_constructor for callable in typ.callable_declarations.values())
+
+
+def complexity(typ: JType) -> int:
+    """Sum the cyclomatic complexities of the methods and constructors of a class, as `ClassFilter` bounds them."""
+    return sum(callable.cyclomatic_complexity or 0 for callable in typ.callable_declarations.values())
+
+
+class _Types(Sequence[JType]):
+    # The classes of an index loaded from an analysis snapshot, read from the compilation units declaring them as they are used.
+
+    def __init__(self, names: list[str], file_paths: list[str], analysis: JavaAnalysis):
+        self.names = names
+        self.file_paths = file_paths
+        self.analysis = analysis
+
+    def __getitem__(self, class_id: int) -> JType:
+        return self.analysis.get_java_compilation_unit(self.file_paths[class_id]).type_declarations[self.names[class_id]]
+
+    def __len__(self) -> int:
+        return len(self.names)
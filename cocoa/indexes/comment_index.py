@@ -0,0 +1,204 @@
+import bisect
+from typing import NamedTuple, Sequence
+
+import pydantic_core
+from pydantic import TypeAdapter
+from cldk.analysis.java import JavaAnalysis
+from cldk.models.java.models import JComment
+
+from cocoa.utils.pagination import paginate_ids
+
+_COMMENTS = TypeAdapter(dict[str, list[JComment]])
+_METHOD_COMMENTS = TypeAdapter(list[tuple[str, str, list[JComment]]])
+
+
+class CommentEntry(NamedTuple):
+    """A comment with the file, class and method it appears in."""
+
+    package_name: str
+    file_path: str
+    qualified_class_name: str | None
+    method_signature: str | None
+    comment: JComment
+
+
+class CommentIndex:
+    """Comments of the project, indexed by file, class, method and package.
+
+    The comment lists of the models are kept as they are, so looking up the comments of a file, class or method is a
+    dictionary access. Every comment of the project is also an entry of one list sorted by package, file and position,
+    in which a package or a file is a contiguous range; queries only walk the entries of their narrowest filter (see
+    `paginate_ids`).
+    """
+
+    def __init__(self, analysis: JavaAnalysis):
+        """Build the index.
+
+        Args:
+            analysis (JavaAnalysis): The analysis whose comments are indexed.
+        """
+        self.file_comments: dict[str, list[JComment]] = {}
+        self.class_comments: dict[str, list[JComment]] = {}
+        self.method_comments: dict[tuple[str, str], list[JComment]] = {}
+        entries = []
+        for file_path, unit in analysis.get_symbol_table().items():
+            self.file_comments[file_path] = unit.comments
+            owners: dict[tuple[int, int], tuple[str | None, str | None]] = {}
+            # Nested classes have longer names than the classes enclosing them, and list fewer comments.
+            for class_name, typ in sorted(unit.type_declarations.items(), key=lambda item: len(item[0])):
+                self.class_comments[class_name] = typ.comments
+                owners.update((_position(comment), (class_name, None)) for comment in typ.comments)
+            for class_name, typ in unit.type_declarations.items():
+                for signature, callable in typ.callable_declarations.items():
+                    self.method_comments[(class_name, signature)] = callable.comments
+                    owners.update((_position(comment), (class_name, signature)) for comment in callable.comments)
+            for comment in unit.comments:
+                entries.append(CommentEntry(unit.package_name or "", file_path, *owners.get(_position(comment), (None, None)), comment))
+        self._index(entries)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the index, e.g. into an analysis snapshot, as JSON.
+
+        Returns:
+            bytes: The serialized index, see `from_bytes`.
+        """
+        # The comment of an entry is one of the comments of its file, written as its position in them.
+        positions = {id(comment): position for comments in self.file_comments.values() for position, comment in enumerate(comments)}
+        return pydantic_core.to_json(
+            {
+                "file_comments": self.file_comments,
+                "class_comments": self.class_comments,
+                "method_comments": [[*key, comments] for key, comments in self.method_comments.items()],
+                "entries": [[*entry[:-1], positions[id(entry.comment)]] for entry in self.entries],
+            }
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CommentIndex":
+        """Load an index serialized by `to_bytes`.
+
+        Args:
+            data (bytes): The serialized index.
+
+        Returns:
+            CommentIndex: The index.
+        """
+        index = cls.__new__(cls)
+        data = pydantic_core.from_json(data)
+        index.file_comments = _COMMENTS.validate_python(data["file_comments"])
+        index.class_comments = _COMMENTS.validate_python(data["class_comments"])
+        index.method_comments = {(class_name, signature): comments for class_name, signature, comments in _METHOD_COMMENTS.validate_python(data["method_comments"])}
+        index._index([CommentEntry(*entry[:-1], index.file_comments[entry[1]][entry[-1]]) for entry in data["entries"]])
+        return index
+
+    def _index(self, entries: list[CommentEntry]) -> None:
+        self.docstrings: dict[str, list[JComment]] = {}
+        for file_path, comments in self.file_comments.items():
+            javadoc = [comment for comment in comments if comment.is_javadoc]
+            if javadoc:
+                self.docstrings[file_path] = javadoc
+
+        entries.sort(key=lambda entry: (entry.package_name, entry.file_path, *_position(entry.comment)))
+        self.entries: list[CommentEntry] = entries
+        self._packages = [entry.package_name for entry in entries]
+        self._file_ranges: dict[str, range] = {}
+        self._class_ids: dict[str, list[int]] = {}
+        self._method_ids: dict[tuple[str, str], list[int]] = {}
+        self._javadoc_ids: list[int] = []
+        for entry_id, entry in enumerate(entries):
+            file_range = self._file_ranges.get(entry.file_path)
+            self._file_ranges[entry.file_path] = range(entry_id if file_range is None else file_range.start, entry_id + 1)
+            if entry.qualified_class_name is not None:
+                self._class_ids.setdefault(entry.qualified_class_name, []).append(entry_id)
+            if entry.method_signature is not None:
+                self._method_ids.setdefault((entry.qualified_class_name, entry.method_signature), []).append(entry_id)
+            if entry.comment.is_javadoc:
+                self._javadoc_ids.append(entry_id)
+
+    def in_file(self, file_path: str) -> list[JComment]:
+        """Get the comments of a file, as listed by its compilation unit."""
+        if file_path not in self.file_comments:
+            raise ValueError(f"File {file_path} not found in the symbol table.")
+        return self.file_comments[file_path]
+
+    def in_class(self, qualified_class_name: str) -> list[JComment]:
+        """Get the comments of a class, as listed by its JType."""
+        if qualified_class_name not in self.class_comments:
+            raise ValueError(f"Class {qualified_class_name} not found in the symbol table.")
+        return self.class_comments[qualified_class_name]
+
+    def in_method(self, qualified_class_name: str, method_signature: str) -> list[JComment]:
+        """Get the comments of a method, as listed by its JCallable."""
+        if (qualified_class_name, method_signature) not in self.method_comments:
+            raise ValueError(f"Method {method_signature} not found in class {qualified_class_name}.")
+        return self.method_comments[(qualified_class_name, method_signature)]
+
+    def query(
+        self,
+        file_path: str | None = None,
+        qualified_class_name: str | None = None,
+        method_signature: str | None = None,
+        start_line: int | None = None,
+        end_line: int | None = None,
+        javadoc_only: bool = False,
+        package_prefix: str | None = None,
+        text: str | None = None,
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> tuple[list[CommentEntry], str | None]:
+        """Select one page of the comments matching every given filter.
+
+        Args:
+            file_path (str | None, optional): Only the comments of this file.
+            qualified_class_name (str | None, optional): Only the comments of this class, or of its `method_signature` method.
+            method_signature (str | None, optional): Only the comments of this method of `qualified_class_name`.
+            start_line (int | None, optional): Only the comments ending on or after this line.
+            end_line (int | None, optional): Only the comments starting on or before this line.
+            javadoc_only (bool, optional): Only the javadoc comments. Defaults to False.
+            package_prefix (str | None, optional): Only the comments of this package and of its sub-packages.
+            text (str | None, optional): Only the comments containing this text, ignoring case.
+            limit (int | None, optional): Maximum number of comments in the page. Defaults to `DEFAULT_PAGE_SIZE`.
+            cursor (str | None, optional): Cursor of the previous page, None for the first page.
+
+        Raises:
+            ValueError: If `method_signature` is given without `qualified_class_name`, or the page limit is not positive.
+
+        Returns:
+            tuple[list[CommentEntry], str | None]: The entries of the page, in package, file and position order, and the
+            cursor of the next page (None on the last page).
+        """
+        if method_signature is not None and qualified_class_name is None:
+            raise ValueError("Pass the qualified_class_name of the method.")
+        text = None if text is None else text.lower()
+
+        def matches(entry_id: int) -> bool:
+            entry = self.entries[entry_id]
+            comment = entry.comment
+            return (
+                (file_path is None or entry.file_path == file_path)
+                and (qualified_class_name is None or entry.qualified_class_name == qualified_class_name)
+                and (method_signature is None or entry.method_signature == method_signature)
+                and (start_line is None or comment.end_line >= start_line)
+                and (end_line is None or comment.start_line <= end_line)
+                and (not javadoc_only or comment.is_javadoc)
+                and (package_prefix is None or entry.package_name == package_prefix or entry.package_name.startswith(package_prefix + "."))
+                and (text is None or text in (comment.content or "").lower())
+            )
+
+        selections: list[Sequence[int]] = []
+        if method_signature is not None:
+            selections.append(self._method_ids.get((qualified_class_name, method_signature), []))
+        elif qualified_class_name is not None:
+            selections.append(self._class_ids.get(qualified_class_name, []))
+        if file_path is not None:
+            selections.append(self._file_ranges.get(file_path, range(0)))
+        if package_prefix is not None:
+            selections.append(range(bisect.bisect_left(self._packages, package_prefix), bisect.bisect_left(self._packages, package_prefix + "\U0010ffff")))
+        if javadoc_only:
+            selections.append(self._javadoc_ids)
+        entry_ids, next_cursor = paginate_ids(selections, len(self.entries), matches, limit, cursor)
+        return [self.entries[entry_id] for entry_id in entry_ids], next_cursor
+
+
+def _position(comment: JComment) -> tuple[int, int]:
+    return comment.start_line, comment.start_column
@@ -0,0 +1,220 @@
+import re
+from typing import Any, NamedTuple, Sequence
+
+import pydantic_core
+from cldk.analysis.java import JavaAnalysis
+from cldk.models.java.enums import CRUDOperationType
+from cldk.models.java.models import JCallable, JCallSite, JCRUDOperation, JCRUDQuery, JType
+
+from cocoa.utils.pagination import paginate_ids
+
+# The table or entity following a SQL or JPQL keyword.
+_QUERY_TARGET = re.compile(r"\b(?:from|into|update|join|table)\s+([A-Za-z_][\w.$]*)", re.IGNORECASE)
+
+
+class CrudEntry(NamedTuple):
+    """A CRUD operation or query, with the method it appears in and the tables or entities it targets."""
+
+    # "operation" for a JCRUDOperation, "query" for a JCRUDQuery.
+    kind: str
+    # The CRUDOperationType of an operation, or the CRUDQueryType of a query.
+    operation_type: str | None
+    qualified_class_name: str
+    method_signature: str
+    line_number: int
+    targets: tuple[str, ...]
+    model: JCRUDOperation | JCRUDQuery
+
+
+class CrudIndex:
+    """CRUD operations and queries of the project, collected in one pass and indexed by type, class, method and target.
+
+    The targets of a query are the tables or entities named in its arguments; those of an operation are the project
+    classes passed to the call performing it (e.g. the entity given to `EntityManager.persist`), and the targets of the
+    query it runs, if any. The methods with CRUD operations are also kept by key, so that an index loaded from an analysis
+    snapshot only reads their classes when they are listed.
+    """
+
+    def __init__(self, analysis: JavaAnalysis):
+        """Build the index.
+
+        Args:
+            analysis (JavaAnalysis): The analysis whose CRUD operations are indexed.
+        """
+        # Same traversal as CLDK, so that the per-type listings come out in the same order.
+        classes: dict[str, JType] = {}
+        file_paths: dict[str, str] = {}
+        for file_path, unit in analysis.get_symbol_table().items():
+            classes.update(unit.type_declarations)
+            file_paths.update(dict.fromkeys(unit.type_declarations, file_path))
+
+        self.methods: list[tuple[str, JType, str, JCallable]] = []
+        # The file, class and signature of each method of `methods`.
+        self.method_keys: list[tuple[str, str, str]] = []
+        entries: list[CrudEntry] = []
+        for class_name, typ in classes.items():
+            for signature, callable in typ.callable_declarations.items():
+                if callable.crud_operations:
+                    self.methods.append((class_name, typ, signature, callable))
+                    self.method_keys.append((file_paths[class_name], class_name, signature))
+                call_sites = {call_site.start_line: call_site for call_site in callable.call_sites if call_site.crud_operation or call_site.crud_query}
+                for operation in callable.crud_operations:
+                    targets = _call_site_targets(call_sites.get(operation.line_number), classes)
+                    entries.append(CrudEntry("operation", _value(operation.operation_type), class_name, signature, operation.line_number, targets, operation))
+                for query in callable.crud_queries:
+                    entries.append(CrudEntry("query", _value(query.query_type), class_name, signature, query.line_number, _query_targets(query), query))
+
+        entries.sort(key=lambda entry: (entry.qualified_class_name, entry.method_signature, entry.line_number, entry.kind))
+        self.entries: list[CrudEntry] = entries
+        self._index()
+
+    def to_bytes(self) -> bytes:
+        """Serialize the index, e.g. into an analysis snapshot, as JSON.
+
+        Returns:
+            bytes: The serialized index, without the JTypes and JCallables of `methods`, see `from_bytes`.
+        """
+        return pydantic_core.to_json({"method_keys": self.method_keys, "entries": self.entries})
+
+    @classmethod
+    def from_bytes(cls, data: bytes, analysis: JavaAnalysis) -> "CrudIndex":
+        """Load an index serialized by `to_bytes`.
+
+        Args:
+            data (bytes): The serialized index.
+            analysis (JavaAnalysis): The analysis it was built from; the JTypes and JCallables are only read from it as they are used.
+
+        Returns:
+            CrudIndex: The index.
+        """
+        index = cls.__new__(cls)
+        data = pydantic_core.from_json(data)
+        index.method_keys = [tuple(key) for key in data["method_keys"]]
+        index.methods = _Methods(index.method_keys, analysis)
+        index.entries = [
+            CrudEntry(kind, operation_type, class_name, signature, line_number, tuple(targets), (JCRUDOperation if kind == "operation" else JCRUDQuery).model_validate(model))
+            for kind, operation_type, class_name, signature, line_number, targets, model in data["entries"]
+        ]
+        index._index()
+        return index
+
+    def _index(self) -> None:
+        self._ids: dict[tuple[str, str], list[int]] = {}
+        for entry_id, entry in enumerate(self.entries):
+            keys = {
+                ("kind", entry.kind),
+                ("type", entry.operation_type),
+                ("class", entry.qualified_class_name),
+                ("method", f"{entry.qualified_class_name}.{entry.method_signature}"),
+            }
+            keys.update(("target", name.lower()) for target in entry.targets for name in (target, target.rsplit(".", 1)[-1]))
+            for key in keys:
+                self._ids.setdefault(key, []).append(entry_id)
+
+    def by_method(self, operation_type: CRUDOperationType | None = None) -> list[dict[str, Any]]:
+        """List the methods with CRUD operations the way CLDK's `get_all_crud_operations` (or `get_all_<type>_operations`) does.
+
+        Args:
+            operation_type (CRUDOperationType | None, optional): Only keep the operations of this type. Defaults to all of them.
+
+        Returns:
+            list[dict[str, Any]]: One {class_name: JType, method_signature: JCallable, "crud_operations": [JCRUDOperation]} per
+            method with CRUD operations, of any type.
+        """
+        return [
+            {
+                class_name: typ,
+                signature: callable,
+                "crud_operations": [operation for operation in callable.crud_operations if operation_type is None or operation.operation_type == operation_type],
+            }
+            for class_name, typ, signature, callable in self.methods
+        ]
+
+    def query(
+        self,
+        kind: str | None = None,
+        operation_type: str | None = None,
+        qualified_class_name: str | None = None,
+        method_signature: str | None = None,
+        target: str | None = None,
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> tuple[list[CrudEntry], str | None]:
+        """Select one page of the CRUD operations and queries matching every given filter.
+
+        Args:
+            kind (str | None, optional): "operation" or "query".
+            operation_type (str | None, optional): CREATE, READ, UPDATE or DELETE for operations; READ, WRITE or NAMED for queries.
+            qualified_class_name (str | None, optional): Only those of this class, or of its `method_signature` method.
+            method_signature (str | None, optional): Only those of this method of `qualified_class_name`.
+            target (str | None, optional): Only those targeting this table or entity, by qualified or simple name, ignoring case.
+            limit (int | None, optional): Maximum number of entries in the page. Defaults to `DEFAULT_PAGE_SIZE`.
+            cursor (str | None, optional): Cursor of the previous page, None for the first page.
+
+        Raises:
+            ValueError: If `method_signature` is given without `qualified_class_name`, or the page limit is not positive.
+
+        Returns:
+            tuple[list[CrudEntry], str | None]: The entries of the page, in class, method and line order, and the cursor
+            of the next page (None on the last page).
+        """
+        if method_signature is not None and qualified_class_name is None:
+            raise ValueError("Pass the qualified_class_name of the method.")
+        selections: list[Sequence[int]] = []
+        if kind is not None:
+            selections.append(self._ids.get(("kind", kind), []))
+        if operation_type is not None:
+            selections.append(self._ids.get(("type", operation_type.upper()), []))
+        if method_signature is not None:
+            selections.append(self._ids.get(("method", f"{qualified_class_name}.{method_signature}"), []))
+        elif qualified_class_name is not None:
+            selections.append(self._ids.get(("class", qualified_class_name), []))
+        if target is not None:
+            selections.append(self._ids.get(("target", target.lower()), []))
+        target = None if target is None else target.lower()
+
+        def matches(entry_id: int) -> bool:
+            entry = self.entries[entry_id]
+            return (
+                (kind is None or entry.kind == kind)
+                and (operation_type is None or entry.operation_type == operation_type.upper())
+                and (qualified_class_name is None or entry.qualified_class_name == qualified_class_name)
+                and (method_signature is None or entry.method_signature == method_signature)
+                and (target is None or any(target in (name.lower(), name.rsplit(".", 1)[-1].lower()) for name in entry.targets))
+            )
+
+        entry_ids, next_cursor = paginate_ids(selections, len(self.entries), matches, limit, cursor)
+        return [self.entries[entry_id] for entry_id in entry_ids], next_cursor
+
+
+def _value(enum: Any) -> str | None:
+    return None if enum is None else enum.value
+
+
+def _query_targets(query: JCRUDQuery | None) -> tuple[str, ...]:
+    if query is None:
+        return ()
+    return tuple(dict.fromkeys(match for argument in query.query_arguments or [] for match in _QUERY_TARGET.findall(argument)))
+
+
+def _call_site_targets(call_site: JCallSite | None, classes: dict[str, JType]) -> tuple[str, ...]:
+    if call_site is None:
+        return ()
+    entities = [argument_type for argument_type in call_site.argument_types if argument_type in classes]
+    return tuple(dict.fromkeys([*entities, *_query_targets(call_site.crud_query)]))
+
+
+class _Methods(Sequence[tuple[str, JType, str, JCallable]]):
+    # The methods of an index loaded from an analysis snapshot, read from the compilation units declaring them as they are used.
+
+    def __init__(self, keys: list[tuple[str, str, str]], analysis: JavaAnalysis):
+        self.keys = keys
+        self.analysis = analysis
+
+    def __getitem__(self, method_id: int) -> tuple[str, JType, str, JCallable]:
+        file_path, class_name, signature = self.keys[method_id]
+        typ = self.analysis.get_java_compilation_unit(file_path).type_declarations[class_name]
+        return class_name, typ, signature, typ.callable_declarations[signature]
+
+    def __len__(self) -> int:
+        return len(self.keys)
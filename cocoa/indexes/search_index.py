@@ -0,0 +1,237 @@
+import io
+import re
+import json
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate
+from typing import Any, NamedTuple
+
+import numpy as np
+from cldk.analysis.java import JavaAnalysis
+
+try:
+    # The regular expression parser is private: without it, regular expressions scan every document.
+    from re import _constants as sre_constants, _parser as sre_parser
+except ImportError:
+    sre_constants = sre_parser = None
+
+# What can be searched, in the order documents are numbered.
+KINDS = ("method", "field", "comment")
+
+# Number of matching lines reported per document.
+MAX_SNIPPETS = 3
+
+# Longest snippet line, in characters.
+MAX_SNIPPET_LENGTH = 200
+
+
+class Document(NamedTuple):
+    """A searchable piece of source: a method (declaration and body), a field declaration or a comment."""
+
+    kind: str
+    file_path: str
+    qualified_class_name: str | None
+    # Method signature, or the declared variables of a field.
+    name: str | None
+    start_line: int
+    text: str
+
+
+class SearchIndex:
+    """Trigram inverted index over the source of methods, field declarations and comments.
+
+    Every lowercased three-character substring of a document is mapped to the sorted IDs of the documents containing
+    it. A query only scans the documents holding every trigram it requires: all those of a substring, or those of the
+    literal runs a regular expression cannot match without.
+    """
+
+    def __init__(self, analysis: JavaAnalysis):
+        """Build the index.
+
+        Args:
+            analysis (JavaAnalysis): The analysis whose symbol table is indexed.
+        """
+        self.documents: list[Document] = _documents(analysis)
+        postings: dict[str, list[int]] = defaultdict(list)
+        for doc_id, document in enumerate(self.documents):
+            text = document.text.lower()
+            for trigram in {text[i : i + 3] for i in range(len(text) - 2)}:
+                postings[trigram].append(doc_id)
+        self.postings: dict[str, np.ndarray] = {trigram: np.array(ids, dtype=np.int32) for trigram, ids in postings.items()}
+
+    def to_bytes(self) -> bytes:
+        """Serialize the index, e.g. into an analysis snapshot, in NumPy's `.npz` format.
+
+        Returns:
+            bytes: The serialized index, see `from_bytes`.
+        """
+        trigrams = list(self.postings)
+        lengths = np.fromiter((len(self.postings[trigram]) for trigram in trigrams), dtype=np.int64, count=len(trigrams))
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            documents=np.frombuffer(json.dumps(self.documents).encode(), dtype=np.uint8),
+            trigrams=np.frombuffer(json.dumps(trigrams).encode(), dtype=np.uint8),
+            offsets=np.concatenate([[0], np.cumsum(lengths)]),
+            ids=np.concatenate([self.postings[trigram] for trigram in trigrams]) if trigrams else np.empty(0, dtype=np.int32),
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SearchIndex":
+        """Load an index serialized by `to_bytes`.
+
+        Args:
+            data (bytes): The serialized index.
+
+        Returns:
+            SearchIndex: The index.
+        """
+        index = cls.__new__(cls)
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            index.documents = [Document(*document) for document in json.loads(arrays["documents"].tobytes())]
+            trigrams, offsets, ids = json.loads(arrays["trigrams"].tobytes()), arrays["offsets"], arrays["ids"]
+        # Every posting list is a view of the one array of document IDs.
+        index.postings = {trigram: ids[offsets[i] : offsets[i + 1]] for i, trigram in enumerate(trigrams)}
+        return index
+
+    def search(self, query: str, regex: bool = False, case_sensitive: bool = False, kinds: list[str] | None = None) -> list[tuple[tuple[int, int], list[int]]]:
+        """Find the documents matching a query, most matches first.
+
+        Only the matches are located: `hit` describes the documents of the page that is returned.
+
+        Args:
+            query (str): A substring, or a regular expression if `regex` is set.
+            regex (bool, optional): Treat `query` as a Python regular expression. Defaults to False.
+            case_sensitive (bool, optional): Match the case of `query`. Defaults to False.
+            kinds (list[str] | None, optional): The kinds of documents to search (see `KINDS`). Defaults to all of them.
+
+        Raises:
+            ValueError: If the query is empty, is not a valid regular expression, or a kind is unknown.
+
+        Returns:
+            list[tuple[tuple[int, int], list[int]]]: The sorted (rank key, positions) pairs, where the rank key is
+            (-matches, document ID) and the positions are the offsets of the matches in the document.
+        """
+        if not query:
+            raise ValueError("The query must not be empty.")
+        unknown = set(kinds or ()) - set(KINDS)
+        if unknown:
+            raise ValueError(f"Unknown kinds {sorted(unknown)}, expected some of {list(KINDS)}.")
+        try:
+            pattern = re.compile(query if regex else re.escape(query), 0 if case_sensitive else re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression {query!r}: {e}") from e
+
+        matches = []
+        for doc_id in self._candidates(_required_literals(query) if regex else [query]):
+            document = self.documents[doc_id]
+            if kinds and document.kind not in kinds:
+                continue
+            positions = [match.start() for match in pattern.finditer(document.text)]
+            if positions:
+                matches.append(((-len(positions), int(doc_id)), positions))
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def _candidates(self, literals: list[str]) -> np.ndarray:
+        # The documents holding every trigram of every literal; all of them when no literal has a trigram.
+        trigrams = {literal.lower()[i : i + 3] for literal in literals for i in range(len(literal) - 2)}
+        if not trigrams:
+            return np.arange(len(self.documents), dtype=np.int32)
+        postings = sorted((self.postings.get(trigram, np.empty(0, dtype=np.int32)) for trigram in trigrams), key=len)
+        candidates = postings[0]
+        for ids in postings[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        return candidates
+
+    def hit(self, doc_id: int, positions: list[int]) -> dict[str, Any]:
+        """Describe a document found by `search`, with the lines of its first matches.
+
+        Args:
+            doc_id (int): The document ID, the second item of the rank key.
+            positions (list[int]): The offsets of the matches in the document.
+
+        Returns:
+            dict[str, Any]: {kind, file_path, qualified_class_name, name, line, matches, snippets: [{line, text}]}.
+        """
+        document = self.documents[doc_id]
+        # The same line breaks for the line of a match and its text, `\r` and Unicode ones included.
+        lines = document.text.splitlines(keepends=True) or [""]
+        starts = list(accumulate(map(len, lines[:-1]), initial=0))
+        snippets = []
+        seen = set()
+        for position in positions:
+            line = bisect_right(starts, position) - 1
+            if line in seen:
+                continue
+            seen.add(line)
+            snippets.append({"line": document.start_line + line, "text": lines[line].strip()[:MAX_SNIPPET_LENGTH]})
+            if len(snippets) == MAX_SNIPPETS:
+                break
+        return {
+            "kind": document.kind,
+            "file_path": document.file_path,
+            "qualified_class_name": document.qualified_class_name,
+            "name": document.name,
+            "line": snippets[0]["line"],
+            "matches": len(positions),
+            "snippets": snippets,
+        }
+
+
+def _documents(analysis: JavaAnalysis) -> list[Document]:
+    methods, fields, comments = [], [], []
+    for file_path, unit in sorted(analysis.get_symbol_table().items()):
+        seen_comments = set()
+
+        def add_comments(owner: str | None, name: str | None, owned: list) -> None:
+            for comment in owned:
+                position = (comment.start_line, comment.start_column)
+                if comment.content and position not in seen_comments:
+                    seen_comments.add(position)
+                    comments.append(Document("comment", file_path, owner, name, comment.start_line, comment.content))
+
+        for class_name, typ in sorted(unit.type_declarations.items()):
+            add_comments(class_name, None, typ.comments)
+            for signature, callable in sorted(typ.callable_declarations.items()):
+                # Most bodies open on the line of the declaration, so that the lines of the text match those of the file.
+                methods.append(Document("method", file_path, class_name, signature, callable.start_line, f"{callable.declaration} {callable.code or ''}"))
+                add_comments(class_name, signature, callable.comments)
+            for field in typ.field_declarations:
+                variables = ", ".join(field.variables)
+                fields.append(Document("field", file_path, class_name, variables, field.start_line, " ".join([*field.modifiers, field.type, variables]) + ";"))
+                add_comments(class_name, variables, [field.comment] if field.comment is not None else [])
+        add_comments(None, None, unit.comments)
+    return methods + fields + comments
+
+
+def _required_literals(pattern: str) -> list[str]:
+    # The runs of literal characters a match of `pattern` always contains. Anything the parser does not know how to
+    # reduce (alternations, character classes, optional parts) only makes the index return more candidates, and so
+    # does a parser that is missing or has changed shape.
+    if sre_parser is None:
+        return []
+    literals: list[str] = []
+    try:
+        _collect_literals(list(sre_parser.parse(pattern)), literals)
+    except (re.error, AttributeError, TypeError, ValueError):
+        return []
+    return [literal for literal in literals if literal]
+
+
+def _collect_literals(items: list, literals: list[str]) -> None:
+    run: list[str] = []
+    for op, argument in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(argument))
+            continue
+        literals.append("".join(run))
+        run = []
+        if op is sre_constants.SUBPATTERN:
+            _collect_literals(list(argument[-1]), literals)
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and argument[0] >= 1:
+            _collect_literals(list(argument[2]), literals)
+    literals.append("".join(run))
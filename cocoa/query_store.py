@@ -0,0 +1,312 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+import pydantic_core
+
+from cocoa.indexes.class_index import ClassFilter, annotation_name, complexity, method_count, type_name
+
+if TYPE_CHECKING:
+    from cocoa.analysis import CLDKAnalysis
+
+# Version of the schema, bumped whenever an older database could not be queried as it was written.
+SCHEMA_VERSION = 4
+
+# Rows are inserted in the order of the symbol table, so their IDs follow that order. A class declared in several files
+# has a row per declaration: CLDK's `get_class` returns the first one (`is_first`), while `get_classes` lists the last one
+# (`is_last`) at the `position` of the first.
+SCHEMA = """
+CREATE TABLE classes (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL, position INTEGER NOT NULL, is_first INTEGER NOT NULL, is_last INTEGER NOT NULL, file_path TEXT NOT NULL,
+    package TEXT NOT NULL, is_entrypoint INTEGER NOT NULL, method_count INTEGER NOT NULL, complexity INTEGER NOT NULL, json TEXT NOT NULL
+);
+CREATE TABLE supertypes (class_id INTEGER NOT NULL REFERENCES classes, name TEXT NOT NULL, erasure TEXT NOT NULL, simple_name TEXT NOT NULL, kind TEXT NOT NULL);
+CREATE TABLE annotations (class_id INTEGER NOT NULL REFERENCES classes, name TEXT NOT NULL, simple_name TEXT NOT NULL);
+CREATE TABLE modifiers (class_id INTEGER NOT NULL REFERENCES classes, name TEXT NOT NULL);
+CREATE TABLE methods (id INTEGER PRIMARY KEY, class_id INTEGER NOT NULL REFERENCES classes, signature TEXT NOT NULL, is_constructor INTEGER NOT NULL, json TEXT NOT NULL);
+CREATE TABLE fields (class_id INTEGER NOT NULL REFERENCES classes, position INTEGER NOT NULL, json TEXT NOT NULL);
+CREATE TABLE call_sites (
+    method_id INTEGER NOT NULL REFERENCES methods, position INTEGER NOT NULL, method_name TEXT, receiver_type TEXT, callee_signature TEXT, start_line INTEGER
+);
+CREATE TABLE edges (source_id INTEGER NOT NULL REFERENCES methods, target_id INTEGER NOT NULL REFERENCES methods);
+"""
+
+# Created once the rows are in, which is faster than maintaining them row by row.
+INDEXES = """
+CREATE INDEX classes_name ON classes (name, is_first);
+CREATE INDEX classes_package ON classes (package);
+CREATE INDEX classes_entrypoint ON classes (is_entrypoint);
+CREATE INDEX classes_method_count ON classes (method_count);
+CREATE INDEX classes_complexity ON classes (complexity);
+CREATE INDEX supertypes_name ON supertypes (name, class_id);
+CREATE INDEX supertypes_simple_name ON supertypes (simple_name, kind, class_id);
+CREATE INDEX annotations_simple_name ON annotations (simple_name, class_id);
+CREATE INDEX modifiers_name ON modifiers (name, class_id);
+CREATE UNIQUE INDEX methods_class ON methods (class_id, signature);
+CREATE INDEX fields_class ON fields (class_id, position);
+CREATE INDEX call_sites_method ON call_sites (method_id, position);
+CREATE INDEX call_sites_callee ON call_sites (method_name);
+CREATE INDEX edges_source ON edges (source_id);
+CREATE INDEX edges_target ON edges (target_id);
+"""
+
+
+class QueryStore:
+    """Indexed SQLite copy of the symbol table, written by `cocoa index --query-store`.
+
+    Classes, methods and fields are stored as the JSON CLDK serializes them to, next to the columns they are looked up
+    by; call sites and the call edges resolved from the symbol table are stored as plain rows. A lookup reads the rows
+    it is about through an index and parses only those, so answering it takes memory proportional to its result, not
+    to the project: the criteria of a `ClassFilter` are all translated into SQL, against indexed class attributes.
+    Every thread queries the database through its own read-only connection.
+    """
+
+    def __init__(self, path: Path):
+        """Open a database.
+
+        Args:
+            path (Path): A database written by `write`.
+
+        Raises:
+            ValueError: If the file is not a query store, or was written with another schema.
+        """
+        self.path = Path(path)
+        self._local = threading.local()
+        try:
+            version = self._connection().execute("PRAGMA user_version").fetchone()[0]
+        except sqlite3.DatabaseError:
+            version = None
+        if version != SCHEMA_VERSION:
+            raise ValueError(f"{self.path} is not a version {SCHEMA_VERSION} query store, re-run cocoa index.")
+
+    @classmethod
+    def write(cls, path: Path, project: "CLDKAnalysis") -> None:
+        """Write the database of a loaded analysis, replacing the file atomically.
+
+        Args:
+            path (Path): The database file.
+            project (CLDKAnalysis): The ready analysis; its call index is built if it is not yet.
+        """
+        from cocoa.indexes import CallIndex
+
+        tmp_path = Path(f"{path}.tmp")
+        tmp_path.unlink(missing_ok=True)
+        connection = sqlite3.connect(tmp_path)
+        try:
+            connection.executescript(SCHEMA)
+            declarations = [
+                (file_path, unit, class_name, typ) for file_path, unit in project.analysis_instance.get_symbol_table().items() for class_name, typ in unit.type_declarations.items()
+            ]
+            first: dict[str, int] = {}
+            last: dict[str, int] = {}
+            for declaration_id, (_, _, class_name, _) in enumerate(declarations):
+                first.setdefault(class_name, declaration_id)
+                last[class_name] = declaration_id
+            positions = {class_name: position for position, class_name in enumerate(first)}
+            method_ids: dict[tuple[str, str], int] = {}
+            for declaration_id, (file_path, unit, class_name, typ) in enumerate(declarations):
+                class_id = connection.execute(
+                    "INSERT INTO classes (name, position, is_first, is_last, file_path, package, is_entrypoint, method_count, complexity, json)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        class_name,
+                        positions[class_name],
+                        declaration_id == first[class_name],
+                        declaration_id == last[class_name],
+                        file_path,
+                        unit.package_name,
+                        typ.is_entrypoint_class,
+                        method_count(typ),
+                        complexity(typ),
+                        typ.model_dump_json(),
+                    ),
+                ).lastrowid
+                annotations = {annotation_name(annotation, unit.imports) for annotation in typ.annotations}
+                connection.executemany("INSERT INTO annotations VALUES (?, ?, ?)", [(class_id, name, type_name(name)[1]) for name in annotations])
+                connection.executemany("INSERT INTO modifiers VALUES (?, ?)", [(class_id, modifier) for modifier in set(typ.modifiers)])
+                supertypes = [(name, "extends") for name in typ.extends_list] + [(name, "implements") for name in typ.implements_list]
+                connection.executemany("INSERT INTO supertypes VALUES (?, ?, ?, ?, ?)", [(class_id, name, *type_name(name), kind) for name, kind in supertypes])
+                connection.executemany(
+                    "INSERT INTO fields VALUES (?, ?, ?)", [(class_id, position, field.model_dump_json()) for position, field in enumerate(typ.field_declarations)]
+                )
+                for signature, callable in typ.callable_declarations.items():
+                    method_id = connection.execute(
+                        "INSERT INTO methods (class_id, signature, is_constructor, json) VALUES (?, ?, ?, ?)",
+                        (class_id, signature, callable.is_constructor, callable.model_dump_json()),
+                    ).lastrowid
+                    # The call edges are between the methods CLDK's `get_method` returns, those of the first declaration.
+                    method_ids.setdefault((class_name, signature), method_id)
+                    connection.executemany(
+                        "INSERT INTO call_sites VALUES (?, ?, ?, ?, ?, ?)",
+                        [
+                            (method_id, position, call_site.method_name, call_site.receiver_type, call_site.callee_signature, call_site.start_line)
+                            for position, call_site in enumerate(callable.call_sites)
+                        ],
+                    )
+            graph = project.derived(CallIndex).graph
+            connection.executemany(
+                "INSERT INTO edges VALUES (?, ?)",
+                _edges(method_ids, ((graph.key(source), graph.key(target)) for source in range(len(graph)) for target in graph.successors(source))),
+            )
+            connection.executescript(INDEXES)
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(tmp_path, path)
+
+    def get_class(self, qualified_class_name: str) -> Any:
+        """Get a class, as `JavaAnalysis.get_class` does.
+
+        Args:
+            qualified_class_name (str): The qualified name of the class.
+
+        Returns:
+            Any: The JType as JSON data, None if there is no such class.
+        """
+        row = self._connection().execute("SELECT json FROM classes WHERE name = ? AND is_first", (qualified_class_name,)).fetchone()
+        return None if row is None else pydantic_core.from_json(row[0])
+
+    def get_methods_in_class(self, qualified_class_name: str) -> dict[str, Any]:
+        """Get the methods of a class, constructors aside, as `JavaAnalysis.get_methods_in_class` does.
+
+        Args:
+            qualified_class_name (str): The qualified name of the class.
+
+        Returns:
+            dict[str, Any]: The JCallables as JSON data by signature, in declaration order.
+        """
+        rows = self._connection().execute(
+            "SELECT m.signature, m.json FROM classes c JOIN methods m ON m.class_id = c.id WHERE c.name = ? AND c.is_first AND NOT m.is_constructor ORDER BY m.id",
+            (qualified_class_name,),
+        )
+        return {signature: pydantic_core.from_json(data) for signature, data in rows}
+
+    def get_sub_classes(self, qualified_class_name: str) -> dict[str, Any]:
+        """Get the classes extending or implementing a type, as `JavaAnalysis.get_sub_classes` does.
+
+        Args:
+            qualified_class_name (str): The qualified name of the type.
+
+        Returns:
+            dict[str, Any]: The JTypes as JSON data by qualified name, in the order CLDK lists the classes.
+        """
+        rows = self._connection().execute(
+            "SELECT name, json FROM classes WHERE is_last AND id IN (SELECT class_id FROM supertypes WHERE name = ?) ORDER BY position", (qualified_class_name,)
+        )
+        return {name: pydantic_core.from_json(data) for name, data in rows}
+
+    def get_classes_by_criteria(self, criteria: ClassFilter) -> dict[str, Any]:
+        """Get the classes meeting every criterion of a filter, as `ClassIndex.select` selects them.
+
+        Args:
+            criteria (ClassFilter): The filter.
+
+        Returns:
+            dict[str, Any]: The JTypes as JSON data by qualified name, in the order CLDK lists the classes.
+        """
+        where, parameters = _where(criteria)
+        rows = self._connection().execute(f"SELECT name, json FROM classes WHERE is_last AND ({where}) ORDER BY position", parameters)
+        return {name: pydantic_core.from_json(data) for name, data in rows}
+
+    def get_class_names_by_criteria(self, criteria: ClassFilter) -> list[str]:
+        """Same as `get_classes_by_criteria`, for the qualified names only.
+
+        Args:
+            criteria (ClassFilter): The filter.
+
+        Returns:
+            list[str]: The qualified names, in the order CLDK lists the classes.
+        """
+        where, parameters = _where(criteria)
+        return [name for name, in self._connection().execute(f"SELECT name FROM classes WHERE is_last AND ({where}) ORDER BY position", parameters)]
+
+    def count_classes_by_criteria(self, criteria: ClassFilter) -> int:
+        """Same as `get_classes_by_criteria`, for the number of classes only.
+
+        Args:
+            criteria (ClassFilter): The filter.
+
+        Returns:
+            int: The number of matching classes.
+        """
+        where, parameters = _where(criteria)
+        return self._connection().execute(f"SELECT count(*) FROM classes WHERE is_last AND ({where})", parameters).fetchone()[0]
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(f"{self.path.absolute().as_uri()}?mode=ro", uri=True)
+        return connection
+
+
+def _edges(method_ids: dict[tuple[str, str], int], edges: Iterable[tuple[tuple[str, str], tuple[str, str]]]) -> Iterable[tuple[int, int]]:
+    for source, target in edges:
+        if source in method_ids and target in method_ids:
+            yield method_ids[source], method_ids[target]
+
+
+def _where(criteria: ClassFilter) -> tuple[str, list[Any]]:
+    # The condition on the classes table selecting the classes of a filter, and its parameters.
+    if criteria.is_empty():
+        return "0", []
+    conditions, parameters = [], []
+    if criteria.inclusions is not None:
+        conditions.append(f"({' OR '.join(['instr(name, ?) > 0'] * len(criteria.inclusions))})")
+        parameters.extend(criteria.inclusions)
+    if criteria.exclusions is not None:
+        conditions.append(f"NOT ({' OR '.join(['instr(name, ?) > 0'] * len(criteria.exclusions))})")
+        parameters.extend(criteria.exclusions)
+    attributes = [
+        (None if criteria.package is None else _glob(criteria.package), "package GLOB ?"),
+        (criteria.modifier, "id IN (SELECT class_id FROM modifiers WHERE name = ?)"),
+        (criteria.entrypoint, "is_entrypoint = ?"),
+        (criteria.min_methods, "method_count >= ?"),
+        (criteria.max_methods, "method_count <= ?"),
+        (criteria.min_complexity, "complexity >= ?"),
+        (criteria.max_complexity, "complexity <= ?"),
+    ]
+    for value, condition in attributes:
+        if value is not None:
+            conditions.append(condition)
+            parameters.append(value)
+    # Same rule as `same_type`.
+    if criteria.annotation is not None:
+        name, simple_name = type_name(annotation_name(criteria.annotation))
+        conditions.append("id IN (SELECT class_id FROM annotations WHERE simple_name = ? AND (NOT ? OR instr(name, '.') = 0 OR name = ?))")
+        parameters.extend([simple_name, "." in name, name])
+    for kind in ("implements", "extends"):
+        if getattr(criteria, kind) is not None:
+            erasure, simple_name = type_name(getattr(criteria, kind))
+            conditions.append("id IN (SELECT class_id FROM supertypes WHERE simple_name = ? AND kind = ? AND (NOT ? OR instr(erasure, '.') = 0 OR erasure = ?))")
+            parameters.extend([simple_name, kind, "." in erasure, erasure])
+    return " AND ".join(conditions), parameters
+
+
+def _glob(pattern: str) -> str:
+    # Translate an `fnmatch` pattern, as `ClassIndex` matches packages against, into the same SQLite GLOB pattern: only
+    # character sets differ, negated with `!` in the former and `^` in the latter.
+    glob, i = [], 0
+    while i < len(pattern):
+        c = pattern[i]
+        i += 1
+        if c != "[":
+            glob.append(c)
+            continue
+        # The set ends at the first `]` that is not its first character, as `fnmatch` reads it.
+        j = i + 1 if pattern[i : i + 1] == "!" else i
+        j = pattern.find("]", j + 1 if pattern[j : j + 1] == "]" else j)
+        if j < 0:
+            # An unclosed `[` is a literal character.
+            glob.append("[[]")
+            continue
+        chars, i = pattern[i:j], j + 1
+        if chars.startswith("!"):
+            chars = "^" + chars[1:]
+        elif chars.startswith("^"):
+            # A literal `^`, which must not come first in a GLOB set.
+            chars = chars[1:] + "^" if len(chars) > 1 else None
+        glob.append("^" if chars is None else f"[{chars}]")
+    return "".join(glob)
@@ -0,0 +1,273 @@
+import json
+import asyncio
+import logging
+from pathlib import Path
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from cocoa.utils.cache import AnalysisCache
+from cocoa.utils.executor import ToolExecutor
+from cocoa.utils.response_cache import ResponseCache
+from cocoa.utils.snapshot import Snapshot
+from cocoa.utils.watcher import SourceWatcher
+
+if TYPE_CHECKING:
+    # CLDK is only imported once an analysis is loaded, so that the server starts without it.
+    from cocoa.analysis import CLDKAnalysis
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectRegistry:
+    """
+    The projects served by one server.
+
+    Projects are either given explicitly (the first one is the default project of the tools), as analysis snapshots
+    written by `cocoa index`, or found as the sub-directories of a projects root. Their analyses are loaded lazily on
+    first use, through the on-disk cache when there is one, and share the tool executor. Once the loaded analyses
+    outgrow the memory budget, the least recently used ones are evicted; they are reloaded (usually from the on-disk
+    cache) the next time they are used.
+    """
+
+    def __init__(
+        self,
+        project_paths: list[Path] | None = None,
+        projects_root: Path | None = None,
+        analysis_level: str = "symbol table",
+        cache: AnalysisCache | None = None,
+        ready_timeout: float | None = None,
+        executor: ToolExecutor | None = None,
+        response_cache_size: int = 0,
+        memory_budget: int | None = None,
+        watch_interval: float | None = None,
+        snapshots: list[Path] | None = None,
+    ):
+        """Create the registry.
+
+        Args:
+            project_paths (list[Path], optional): Projects served under the name of their directory; the first one is the default project.
+            projects_root (Path, optional): Directory whose sub-directories are served as projects, under their relative path.
+            analysis_level (str, optional): Depth of the CLDK analyses, an AnalysisLevel or its value. Defaults to the symbol table.
+            cache (AnalysisCache, optional): Persistent cache of the analyses.
+            ready_timeout (float, optional): Seconds a tool waits for an analysis to be ready, None waits forever.
+            executor (ToolExecutor, optional): Runs the blocking CLDK calls of the tools of every project.
+            response_cache_size (int, optional): Memory budget in bytes of the response cache of each project, 0 disables it.
+            memory_budget (int, optional): Upper bound in bytes for the total size of the loaded analyses, None for no bound.
+            watch_interval (float, optional): Seconds between two checks for changed files, None disables watch mode.
+            snapshots (list[Path], optional): Analysis snapshots, each served under the name of the directory it was indexed from, after the `project_paths`.
+        """
+        self.projects_root = None if projects_root is None else Path(projects_root).absolute()
+        self.paths: dict[str, Path] = {}
+        for project_path in project_paths or []:
+            self._add_path(Path(project_path).absolute())
+        self.snapshots: dict[str, Path] = {}
+        for snapshot_path in snapshots or []:
+            snapshot = Snapshot(snapshot_path)
+            try:
+                manifest = snapshot.get("manifest")
+            finally:
+                snapshot.close()
+            if manifest is None:
+                raise ValueError(f"{snapshot_path} is not an analysis snapshot.")
+            project_path = Path(json.loads(manifest)["project_path"])
+            name = next((name for name, path in self.paths.items() if path == project_path), None) or self._add_path(project_path)
+            self.snapshots[name] = Path(snapshot_path).absolute()
+        self.default = next(iter(self.paths), None)
+        self.analysis_level = analysis_level
+        self.cache = cache
+        self.ready_timeout = ready_timeout
+        self.executor = executor or ToolExecutor()
+        self.response_cache_size = response_cache_size
+        self.memory_budget = memory_budget
+        self.watch_interval = watch_interval
+        self._loaded: OrderedDict[str, "CLDKAnalysis"] = OrderedDict()
+        self._watch_tasks: dict[str, asyncio.Task] = {}
+
+    def _add_path(self, project_path: Path) -> str:
+        name = project_path.name if project_path.name not in self.paths else str(project_path)
+        self.paths[name] = project_path
+        return name
+
+    def resolve(self, project: str | None) -> tuple[str, Path]:
+        """Find a project by name.
+
+        Args:
+            project (str | None): A project name, the path of an explicitly given project, or None for the default project.
+
+        Raises:
+            ValueError: If there is no such project.
+
+        Returns:
+            tuple[str, Path]: The name and path of the project.
+        """
+        if project is None:
+            if self.default is None:
+                raise ValueError("There is no default project, pass the name of a project (see list_projects_tool).")
+            return self.default, self.paths[self.default]
+        if project in self.paths:
+            return project, self.paths[project]
+        for name, project_path in self.paths.items():
+            if str(project_path) == project:
+                return name, project_path
+        if self.projects_root is not None:
+            project_path = (self.projects_root / project).resolve()
+            if project_path != self.projects_root and project_path.is_relative_to(self.projects_root) and project_path.is_dir():
+                return project_path.relative_to(self.projects_root).as_posix(), project_path
+        raise ValueError(f"Unknown project {project!r} (see list_projects_tool).")
+
+    def get(self, project: str | None = None, retry: bool = True) -> "CLDKAnalysis":
+        """Get the analysis of a project, starting to load it in the background if it is not loaded.
+
+        Must be called from the event loop.
+
+        Args:
+            project (str | None, optional): The project, see `resolve`. Defaults to the default project.
+            retry (bool, optional): Load the project again if its analysis failed, rather than return the failed one. Defaults to True.
+
+        Returns:
+            CLDKAnalysis: The analysis of the project, which may not be ready yet.
+        """
+        name, project_path = self.resolve(project)
+        analysis = self._loaded.get(name)
+        if analysis is not None and analysis.phase == "failed" and retry:
+            self.unload(name)
+            analysis = None
+        if analysis is None:
+            # Snapshot the sources before analyzing them, so edits made while the analysis runs are picked up.
+            watcher = SourceWatcher(project_path) if self.watch_interval is not None else None
+            analysis = self._create(name, project_path)
+            analysis.start()
+            # The size of an analysis is only known once it is loaded.
+            analysis.add_done_callback(lambda _: self.evict())
+            self._loaded[name] = analysis
+            if watcher is not None:
+                self._watch_tasks[name] = asyncio.create_task(analysis.watch(watcher, self.watch_interval))
+        self._loaded.move_to_end(name)
+        return analysis
+
+    def load(self, project: str | None = None) -> "CLDKAnalysis":
+        """Load the analysis of a project right away, blocking until it is ready.
+
+        Unlike `get`, it needs no event loop: the parent of the pre-fork workers loads the analyses they share this way.
+        Projects loaded this way are not watched.
+
+        Args:
+            project (str | None, optional): The project, see `resolve`. Defaults to the default project.
+
+        Returns:
+            CLDKAnalysis: The ready analysis of the project.
+        """
+        name, project_path = self.resolve(project)
+        analysis = self._loaded.get(name)
+        if analysis is None or analysis.phase == "failed":
+            analysis = self._loaded[name] = self._create(name, project_path)
+            analysis.load()
+            self.evict()
+        return analysis
+
+    def _create(self, name: str, project_path: Path) -> "CLDKAnalysis":
+        from cldk.analysis import AnalysisLevel
+        from cocoa.analysis import CLDKAnalysis
+
+        return CLDKAnalysis(
+            project_path=project_path,
+            analysis_level=AnalysisLevel(self.analysis_level),
+            cache=self.cache,
+            ready_timeout=self.ready_timeout,
+            executor=self.executor,
+            response_cache=ResponseCache(max_size=self.response_cache_size) if self.response_cache_size > 0 else None,
+            snapshot_path=self.snapshots.get(name),
+            measure_size=self.memory_budget is not None,
+        )
+
+    def evict(self) -> None:
+        """Unload the least recently used analyses until the loaded ones fit in the memory budget.
+
+        The most recently used analysis and the ones still loading are never evicted.
+        """
+        if self.memory_budget is None:
+            return
+        total = sum(analysis.size for analysis in self._loaded.values())
+        for name, analysis in list(self._loaded.items())[:-1]:
+            if total <= self.memory_budget:
+                break
+            if analysis.phase not in ("ready", "failed"):
+                continue
+            logger.info(f"Evicting the analysis of {name} ({analysis.size} bytes)")
+            total -= analysis.size
+            self.unload(name)
+
+    def unload(self, name: str) -> None:
+        """Drop the analysis of a project; tool calls already running on it are not affected.
+
+        Args:
+            name (str): The name of the project.
+        """
+        self._loaded.pop(name, None)
+        watch_task = self._watch_tasks.pop(name, None)
+        if watch_task is not None:
+            watch_task.cancel()
+
+    async def warm(self) -> None:
+        """Load the projects whose analysis is in the on-disk cache, least recently used last, until the memory budget is reached."""
+        if self.cache is None:
+            return
+        from cldk.analysis import AnalysisLevel
+
+        cached = []
+        for name in self.names():
+            _, project_path = self.resolve(name)
+            key = await asyncio.to_thread(self.cache.key, project_path, analysis_level=AnalysisLevel(self.analysis_level).value)
+            if key in self.cache:
+                cached.append((self.cache.last_used(key), name))
+        for _, name in sorted(cached, key=lambda entry: -entry[0]):
+            if self.memory_budget is not None and sum(analysis.size for analysis in self._loaded.values()) >= self.memory_budget:
+                break
+            try:
+                await self.get(name).wait_until_ready(timeout=None)
+            except Exception as e:
+                logger.warning(f"Could not warm {name}: {e}")
+
+    def names(self) -> list[str]:
+        """List the names of all the projects, the explicitly given ones first.
+
+        Returns:
+            list[str]: The project names.
+        """
+        names = list(self.paths)
+        if self.projects_root is not None and self.projects_root.is_dir():
+            names.extend(sorted(d.name for d in self.projects_root.iterdir() if d.is_dir() and not d.name.startswith(".") and d.name not in self.paths))
+        return names
+
+    def status(self) -> dict:
+        """Report the projects and the loaded analyses.
+
+        Returns:
+            dict: {default, memory_budget_bytes, loaded_bytes, projects: [{name, path, loaded, phase, size_bytes}]}.
+        """
+        names = self.names()
+        projects = []
+        for name in names + [name for name in self._loaded if name not in names]:
+            _, project_path = self.resolve(name)
+            analysis = self._loaded.get(name)
+            projects.append(
+                {
+                    "name": name,
+                    "path": str(project_path),
+                    "loaded": analysis is not None,
+                    "phase": None if analysis is None else analysis.phase,
+                    "size_bytes": None if analysis is None else analysis.size,
+                }
+            )
+        return {
+            "default": self.default,
+            "memory_budget_bytes": self.memory_budget,
+            "loaded_bytes": sum(analysis.size for analysis in self._loaded.values()),
+            "projects": projects,
+        }
+
+    def close(self) -> None:
+        """Stop watching the projects and stop the tool executor."""
+        for name in list(self._loaded):
+            self.unload(name)
+        self.executor.shutdown()
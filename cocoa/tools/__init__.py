@@ -1,21 +1,110 @@
+import json
+import asyncio
 import inspect
-from . import tools  # import the tools.py module inside this package
-from . import schema_explainer
+import functools
+import importlib
+
+from cocoa.utils.metrics import METRICS
+
+# Modules defining the tools, and the name suffix of their tool functions. They are only imported when the tools are
+# called (see `cocoa.tools.manifest`), since they pull CLDK, networkx and numpy in.
+TOOL_MODULES = {"cocoa.tools.tools": "_tool", "cocoa.tools.schema_explainer": "_explainer"}
+
+# Tools whose response does not only depend on the analysis, or that have side effects (e.g., notifications), so they
+# must never be served from the response cache. The lookups of `batch_lookup_tool` are cached one by one instead.
+UNCACHED_TOOLS = {"are_we_ready_tool", "batch_lookup_tool", "get_response_cache_stats_tool", "get_server_metrics_tool", "list_projects_tool", "stream_application_view_tool"}
 
 
 def iter_tools():
     """
-    Yield all functions in tools.py that end with '_tool'.
+    Yield all functions in tools.py that end with '_tool', wrapped with the response cache.
     """
+    tools = importlib.import_module("cocoa.tools.tools")
     for name, obj in inspect.getmembers(tools, inspect.isfunction):
         if name.endswith("_tool"):
-            yield obj
+            yield wrap_tool(obj)
 
 
 def iter_explainers():
     """
-    Yield all functions in tools.py that end with '_explainer'.
+    Yield all functions in schema_explainer.py that end with '_explainer'.
     """
+    schema_explainer = importlib.import_module("cocoa.tools.schema_explainer")
     for name, obj in inspect.getmembers(schema_explainer, inspect.isfunction):
         if name.endswith("_explainer"):
             yield obj
+
+
+def wrap_tool(tool):
+    """
+    Wrap a tool function the way it is registered: with the response cache, unless it is uncached or an explainer.
+    """
+    if tool.__name__.endswith("_tool") and tool.__name__ not in UNCACHED_TOOLS:
+        return cached(tool)
+    return tool
+
+
+def cached(tool):
+    """
+    Memoize the serialized responses of a tool in the response cache of the queried project, keyed by tool name and arguments.
+
+    Only string responses are cached, and only for the analysis generation they were computed from. Calls without
+    arguments are first looked up in the response snapshot of the project, if it has one (see `cocoa.tools.snapshot`).
+    """
+    signature = inspect.signature(tool)
+
+    @functools.wraps(tool)
+    async def wrapper(ctx, *args, **kwargs):
+        bound = signature.bind(ctx, *args, **kwargs)
+        bound.apply_defaults()
+        project = ctx.request_context.lifespan_context.get(bound.arguments.get("project"))
+        arguments = {name: value for name, value in bound.arguments.items() if name != "ctx"}
+        stats = METRICS.stats(tool.__name__)
+        if project.response_snapshot is not None and all(value == signature.parameters[name].default for name, value in arguments.items() if name != "project"):
+            response = project.response_snapshot.get(tool.__name__)
+            if response is not None:
+                stats.cache_hits += 1
+                return response
+        cache = project.response_cache
+        if cache is None:
+            return await tool(ctx, *args, **kwargs)
+        key = (tool.__name__, json.dumps(arguments, sort_keys=True, default=str))
+        # Read before running the tool: if the analysis gets patched meanwhile, the response is never served for the new one.
+        generation = project.generation
+        response = cache.get(key, generation)
+        if response is not None:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+            response = await tool(ctx, *args, **kwargs)
+            if isinstance(response, str):
+                cache.put(key, generation, response)
+        return response
+
+    return wrapper
+
+
+def with_timeout(tool, seconds: float | None):
+    """
+    Fail the calls of a tool that take longer than `seconds`, None for no limit.
+
+    The blocking CLDK call of a tool that timed out keeps running in its worker thread; only the client stops waiting.
+    """
+    if seconds is None:
+        return tool
+
+    @functools.wraps(tool)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await asyncio.wait_for(tool(*args, **kwargs), seconds)
+        except TimeoutError as e:
+            raise TimeoutError(f"{tool.__name__} did not answer within {seconds:g} seconds.") from e
+
+    return wrapper
+
+
+def iter_resources():
+    """
+    Yield the (URI template, function) of all resources in resources.py.
+    """
+    yield from importlib.import_module("cocoa.tools.resources").RESOURCES.items()
@@ -0,0 +1,81 @@
+import sys
+import json
+import asyncio
+import importlib
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+from fastmcp.tools import Tool
+from mcp.types import EmbeddedResource, ImageContent, TextContent
+from pydantic import Field, PrivateAttr
+
+from cocoa.tools import TOOL_MODULES, iter_explainers, iter_tools, wrap_tool
+
+# Name, module, description and parameter schema of every tool, so that the server lists them without importing the
+# modules defining them. Regenerate it with `python -m cocoa.tools.manifest` after adding or changing a tool.
+MANIFEST_PATH = Path(__file__).with_name("manifest.json")
+
+# The tool modules are imported in worker threads, one at a time: CLDK fails to import in two threads at once.
+_import_lock = threading.Lock()
+
+
+class DeferredTool(Tool):
+    """A tool registered from the manifest, whose function is imported, wrapped and validated on its first call."""
+
+    fn: Callable[..., Any] | None = None
+    module: str
+    # Applied to the function once it is imported.
+    wrap: Callable[[Callable], Callable] = Field(default=wrap_tool, exclude=True)
+    _tool: Tool | None = PrivateAttr(default=None)
+
+    async def run(self, arguments: dict[str, Any]) -> list[TextContent | ImageContent | EmbeddedResource]:
+        if self._tool is None:
+            # Import off the event loop: the first call may pull CLDK in.
+            module = await asyncio.to_thread(import_module, self.module)
+            self._tool = Tool.from_function(self.wrap(getattr(module, self.name)), serializer=self.serializer)
+        return await self._tool.run(arguments)
+
+
+def build_manifest() -> list[dict[str, Any]]:
+    """Describe every tool and explainer from its function, the way the server would register it.
+
+    Returns:
+        list[dict[str, Any]]: One {name, module, description, parameters} per tool, sorted by name.
+    """
+    entries = []
+    for fn in [*iter_tools(), *iter_explainers()]:
+        tool = Tool.from_function(fn)
+        entries.append({"name": tool.name, "module": fn.__module__, "description": tool.description, "parameters": tool.parameters})
+    return sorted(entries, key=lambda entry: entry["name"])
+
+
+def load_tools(wrap: Callable[[Callable], Callable] = lambda fn: fn, manifest_path: Path = MANIFEST_PATH) -> list[DeferredTool]:
+    """Create the tools listed in the manifest, without importing their modules.
+
+    Args:
+        wrap (Callable[[Callable], Callable], optional): Applied to each tool function (after the response cache wrapper) when it is imported.
+        manifest_path (Path, optional): The manifest. Defaults to `MANIFEST_PATH`.
+
+    Returns:
+        list[DeferredTool]: The tools.
+    """
+    return [DeferredTool(**entry, wrap=lambda fn: wrap(wrap_tool(fn))) for entry in json.loads(manifest_path.read_text())]
+
+
+def import_module(name: str) -> Any:
+    """Import a module, waiting for the other imports made through this function to finish first."""
+    with _import_lock:
+        return importlib.import_module(name)
+
+
+def preload_tools() -> None:
+    """Import the modules of the tools, so that their first calls do not wait for it."""
+    for module in TOOL_MODULES:
+        import_module(module)
+
+
+if __name__ == "__main__":
+    manifest_path = Path(sys.argv[1]) if len(sys.argv) > 1 else MANIFEST_PATH
+    manifest_path.write_text(json.dumps(build_manifest(), indent=2) + "\n")
+    print(f"Wrote the manifest of {len(json.loads(manifest_path.read_text()))} tools to {manifest_path}")
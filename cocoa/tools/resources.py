@@ -0,0 +1,24 @@
+from fastmcp import Context
+
+
+async def application_view_chunk_resource(project: str, generation: str, index: str, ctx: Context) -> str:
+    """
+    One NDJSON chunk of the JApplication view of a project, as listed by `stream_application_view_tool`.
+
+    The generation pins the analysis the chunks were planned from: once the analysis changes (in watch mode), reading an
+    older generation fails and the view must be listed again.
+    """
+    from cocoa.utils.streaming import ApplicationChunks
+
+    analysis = ctx.request_context.lifespan_context.get(project)
+    await analysis.wait_until_ready()
+    if int(generation) != analysis.generation:
+        raise ValueError(f"The analysis changed since generation {generation}, call stream_application_view_tool again.")
+    chunks = await analysis.executor.run(analysis.derived, ApplicationChunks)
+    return await analysis.executor.run(chunks.chunk, int(index))
+
+
+# URI template of each resource.
+RESOURCES = {
+    "cocoa://application-view/{project}/{generation}/{index}": application_view_chunk_resource,
+}
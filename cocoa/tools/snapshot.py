@@ -0,0 +1,69 @@
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from types import SimpleNamespace
+
+from cocoa.analysis import CLDKAnalysis
+from cocoa.indexes import CallIndex, ClassIndex, CommentIndex, CrudIndex, SearchIndex
+from cocoa.registry import ProjectRegistry
+from cocoa.tools import tools
+from cocoa.utils.executor import ToolExecutor
+from cocoa.utils.snapshot import Snapshot
+
+logger = logging.getLogger(__name__)
+
+# Whole-project tools whose response to a call without arguments is written into the snapshot.
+SNAPSHOT_TOOLS = (
+    "get_application_view_tool",
+    "get_symbol_table_tool",
+    "get_compilation_units_tool",
+    "get_classes_tool",
+    "get_methods_tool",
+    "get_entry_point_classes_tool",
+    "get_entry_point_methods_tool",
+    "get_all_crud_operations_tool",
+    "get_all_create_operations_tool",
+    "get_all_read_operations_tool",
+    "get_all_update_operations_tool",
+    "get_all_delete_operations_tool",
+    "get_all_comments_tool",
+    "get_all_docstrings_tool",
+)
+
+# Indexes the lookup tools derive from the analysis.
+DERIVED_INDEXES = (CallIndex, ClassIndex, CommentIndex, CrudIndex, SearchIndex)
+
+
+def freeze_project(registry: ProjectRegistry, name: str, snapshot_dir: Path) -> CLDKAnalysis:
+    """
+    Load a project, build its derived indexes, and write its whole-project responses into a snapshot it then serves them from.
+
+    Made by the parent of the pre-fork workers, which inherit all of it. The tools run on an event loop and an executor of
+    their own, both gone when this returns: no thread may be running when the workers are forked.
+    """
+    analysis = registry.load(name)
+    for build in DERIVED_INDEXES:
+        analysis.derived(build)
+    executor, analysis.executor = analysis.executor, ToolExecutor(max_workers=1, max_heavy=1)
+    try:
+        responses = asyncio.run(_run_tools(registry, name))
+    finally:
+        analysis.executor.shutdown(wait=True)
+        analysis.executor = executor
+    snapshot_path = Path(snapshot_dir) / f"{hashlib.blake2b(name.encode(), digest_size=8).hexdigest()}.snapshot"
+    Snapshot.write(snapshot_path, responses)
+    analysis.response_snapshot = Snapshot(snapshot_path)
+    return analysis
+
+
+async def _run_tools(registry: ProjectRegistry, name: str) -> dict[str, str]:
+    # The tools only use the project registry of the request context.
+    ctx = SimpleNamespace(request_context=SimpleNamespace(lifespan_context=registry))
+    responses = {}
+    for tool_name in SNAPSHOT_TOOLS:
+        try:
+            responses[tool_name] = await getattr(tools, tool_name)(ctx, project=name)
+        except Exception as e:
+            logger.warning(f"Leaving {tool_name} out of the snapshot of {name}: {e}")
+    return responses
@@ -1,9 +1,266 @@
-import json
+import asyncio
+from typing import Annotated, Any, Callable, Sequence
 from fastmcp import Context
 import networkx as nx
+import pydantic_core
+from pydantic import Field
+from cldk.analysis.java import JavaAnalysis
+from cldk.models.java.enums import CRUDOperationType
 
+from cocoa.analysis import CLDKAnalysis
+from cocoa.indexes import CallGraph, CallIndex, ClassFilter, ClassIndex, CommentIndex, CrudIndex, SearchIndex
+from cocoa.query_store import QueryStore
+from cocoa.utils.metrics import METRICS
+from cocoa.utils.pagination import paginate
+from cocoa.utils.projection import dump_options
+from cocoa.utils.serialization import dumps, dumps_page
+from cocoa.utils.streaming import ApplicationChunks
 
-async def get_application_view_tool(ctx: Context):
+# Every tool takes the project to query, which is loaded on first use.
+ProjectName = Annotated[str | None, Field(description="Name of the project to query (see list_projects_tool). Defaults to the server's default project.")]
+
+# Tools returning CLDK models can serialize only part of each of them.
+Include = Annotated[
+    list[str] | None,
+    Field(description="Field paths of each returned model to serialize, e.g. `callable_declarations.*.signature`, where `*` matches any list item or dict value."),
+]
+Exclude = Annotated[list[str] | None, Field(description="Field paths of each returned model to leave out, with the same syntax as `include`.")]
+
+# Maximum number of lookups in one `batch_lookup_tool` call.
+MAX_BATCH_SIZE = 256
+
+# Tools `batch_lookup_tool` does not run: itself, and tools that notify the client as they go.
+_UNBATCHABLE_TOOLS = {"batch_lookup_tool", "stream_application_view_tool"}
+
+
+def _project(ctx: Context, project: str | None) -> CLDKAnalysis:
+    """
+    Get the analysis of a project from the server's project registry, loading it in the background if needed.
+    """
+    return ctx.request_context.lifespan_context.get(project)
+
+
+async def _run_on_project(ctx: Context, project: str | None, fn: Callable[[CLDKAnalysis], Any], heavy: bool = False) -> Any:
+    """
+    Wait for the background analysis of the project to be ready, then run `fn` on it in the tool executor, off the event loop.
+
+    Set `heavy` for tools that build whole-project responses, so they cannot take up every worker thread.
+    """
+    analysis = _project(ctx, project)
+    await analysis.wait_until_ready()
+    return await analysis.executor.run(fn, analysis, heavy=heavy)
+
+
+async def _run(ctx: Context, project: str | None, fn: Callable[[JavaAnalysis], Any], heavy: bool = False) -> Any:
+    """
+    Same as `_run_on_project`, for tools that only need the JavaAnalysis instance.
+    """
+    return await _run_on_project(ctx, project, lambda analysis: fn(analysis.analysis_instance), heavy=heavy)
+
+
+async def _lookup(ctx: Context, project: str | None, fn: Callable[[JavaAnalysis | QueryStore], Any], heavy: bool = False) -> Any:
+    """
+    Same as `_run`, for lookups the query store of the project answers (by the same name) when it has one.
+    """
+
+    def run(project: CLDKAnalysis) -> Any:
+        store = project.query_store
+        return fn(project.analysis_instance if store is None else store)
+
+    return await _run_on_project(ctx, project, run, heavy=heavy)
+
+
+async def _paginate(
+    ctx: Context,
+    project: str | None,
+    limit: int | None,
+    cursor: str | None,
+    keys: Callable[[JavaAnalysis], Sequence],
+    page: Callable[[CLDKAnalysis, JavaAnalysis, Sequence], Any],
+    depth: int = 1,
+    fields: dict | None = None,
+) -> str:
+    """
+    Serialize one page of a whole-project tool.
+
+    `keys` lists every key of the tool in a stable order; it is computed once per analysis generation, so the cost of a
+    page only depends on its size. `page` builds the items of the keys selected for the page, `depth` containers deep
+    around the models `fields` projects, from the same analysis instance as the keys even if it is refreshed meanwhile.
+    """
+
+    def run(project: CLDKAnalysis) -> str:
+        analysis = project.analysis_instance
+        page_keys, next_cursor = paginate(project.derived(keys, analysis), limit, cursor)
+        return dumps_page(page(project, analysis, page_keys), next_cursor, depth, **(fields or {}))
+
+    return await _run_on_project(ctx, project, run)
+
+
+def _file_paths(analysis: JavaAnalysis) -> list[str]:
+    return sorted(analysis.get_symbol_table())
+
+
+def _javadoc_file_paths(analysis: JavaAnalysis) -> list[str]:
+    return sorted(file_path for file_path, unit in analysis.get_symbol_table().items() if any(comment.is_javadoc for comment in unit.comments))
+
+
+def _classes(analysis: JavaAnalysis) -> dict:
+    return analysis.get_classes()
+
+
+def _class_names(analysis: JavaAnalysis) -> list[str]:
+    return sorted(analysis.get_classes())
+
+
+def _method_keys(analysis: JavaAnalysis) -> list[tuple[str, str]]:
+    return sorted((cls, meth) for cls, typ in analysis.get_classes().items() for meth in typ.callable_declarations)
+
+
+def _methods_page(project: CLDKAnalysis, analysis: JavaAnalysis, keys: Sequence[tuple[str, str]]) -> dict:
+    classes = project.derived(_classes, analysis)
+    methods = {}
+    for cls, meth in keys:
+        methods.setdefault(cls, {})[meth] = classes[cls].callable_declarations[meth]
+    return methods
+
+
+def _node_link(graph: nx.DiGraph) -> str:
+    # Serialized in the tool executor, as FastMCP would serialize the dict (edge attributes CLDK may not type as models included).
+    return pydantic_core.to_json(nx.readwrite.json_graph.node_link_data(graph), fallback=str).decode()
+
+
+def _cldk_call_graph(analysis: JavaAnalysis) -> CallGraph:
+    return CallGraph.from_networkx(analysis.get_call_graph())
+
+
+def _call_graph(project: CLDKAnalysis, using_symbol_table: bool) -> CallGraph:
+    """
+    Get the compact call graph, resolved from the symbol table or built from CLDK's call graph.
+    """
+    return project.derived(CallIndex).graph if using_symbol_table else project.derived(_cldk_call_graph)
+
+
+async def _reach(ctx: Context, project: str | None, roots: Sequence[tuple[str, str]], reverse: bool, max_depth: int, max_results: int, using_symbol_table: bool) -> str:
+    """
+    Serialize the methods reachable from `roots` in the call graph (or reaching them if `reverse` is set).
+    """
+    if max_depth < 0 or max_results < 1:
+        raise ValueError("max_depth must not be negative and max_results must be positive.")
+
+    def run(project: CLDKAnalysis) -> str:
+        graph = _call_graph(project, using_symbol_table)
+        root_ids = [method_id for method_id in map(graph.id, roots) if method_id is not None]
+        reached, truncated = graph.bfs(root_ids, max_depth, max_results, reverse)
+        methods = []
+        for method_id, depth in reached:
+            cls, sig = graph.key(method_id)
+            methods.append({"qualified_class_name": cls, "method_signature": sig, "depth": depth})
+        return dumps({"methods": methods, "truncated": truncated})
+
+    return await _run_on_project(ctx, project, run, heavy=not using_symbol_table)
+
+
+async def list_projects_tool(ctx: Context):
+    """
+    List the projects the server can query, and which of them are loaded.
+
+    Projects are loaded on first use; once the loaded analyses outgrow the server's memory budget, the least recently
+    used ones are unloaded, and loaded again the next time a tool queries them.
+
+    Returns:
+        str: JSON {default, memory_budget_bytes, loaded_bytes, projects: [{name, path, loaded, phase, size_bytes}]}.
+    """
+    return dumps(ctx.request_context.lifespan_context.status())
+
+
+async def are_we_ready_tool(ctx: Context, project: ProjectName = None):
+    """
+    Report whether the project analysis is ready, without waiting for it.
+
+    Other tools wait for the analysis (up to the server's ready timeout), so clients can poll this tool right after
+    connecting to know when to start issuing queries. Polling a project that is not loaded starts loading it; a failed
+    analysis is reported until another tool queries the project, which loads it again.
+
+    Returns:
+        str: JSON {ready, phase, progress (percent done), elapsed_seconds, error}.
+    """
+    return dumps(ctx.request_context.lifespan_context.get(project, retry=False).status())
+
+
+async def get_response_cache_stats_tool(ctx: Context, project: ProjectName = None):
+    """
+    Report the counters of the tool response cache.
+
+    Repeated calls of a tool with the same arguments are served from the cache until the analysis changes.
+
+    Returns:
+        str: JSON {enabled, hits, misses, hit_rate, entries, size_bytes, max_size_bytes, evictions, invalidations}.
+    """
+    cache = _project(ctx, project).response_cache
+    return dumps({"enabled": False} if cache is None else {"enabled": True, **cache.stats()})
+
+
+async def get_server_metrics_tool(ctx: Context):
+    """
+    Report the latency, response size, error, concurrency and response cache counters of every tool called so far.
+
+    Latency quantiles are estimated from histogram buckets. Over HTTP, the same counters are served in the Prometheus
+    text format at `/metrics`.
+
+    Returns:
+        str: JSON {uptime_seconds, max_rss_bytes, loaded_analysis_bytes, tools: {name: {calls, errors, in_flight,
+        cache_hits, cache_misses, cache_hit_rate, latency_seconds: {mean, p50, p95, p99, max}, response_bytes: {mean, max, total}}}}.
+    """
+    return dumps({**METRICS.snapshot(), "loaded_analysis_bytes": ctx.request_context.lifespan_context.status()["loaded_bytes"]})
+
+
+async def batch_lookup_tool(ctx: Context, lookups: list[dict[str, Any]], project: ProjectName = None):
+    """
+    Run several tool calls at once, e.g. to get the details of many classes or methods in a single round trip.
+
+    Each lookup is {"tool": name, "arguments": {...}}, for any tool but this one and `stream_application_view_tool`; the
+    `project` of the batch applies to the lookups that do not name one. Lookups run concurrently and are served from the
+    response cache like individual calls. A failed lookup does not fail the batch.
+
+    Returns:
+        str: JSON {"results": [{tool, result, error}]}, in the order of `lookups`; `result` is the parsed response of the
+        tool (or its text when it is not JSON) and `error` is null unless the lookup failed.
+    """
+    if len(lookups) > MAX_BATCH_SIZE:
+        raise ValueError(f"A batch holds at most {MAX_BATCH_SIZE} lookups, got {len(lookups)}.")
+    tools = await ctx.fastmcp.get_tools()
+
+    async def lookup(item: dict[str, Any]) -> dict[str, Any]:
+        name = item.get("tool")
+        if name not in tools or name in _UNBATCHABLE_TOOLS:
+            raise ValueError(f"Unknown or unbatchable tool {name!r}.")
+        arguments = dict(item.get("arguments") or {})
+        # Explainers and server-wide tools take no project.
+        if project is not None and "project" in tools[name].parameters.get("properties", {}):
+            arguments.setdefault("project", project)
+        contents = await tools[name].run(arguments)
+        text = "".join(content.text for content in contents if content.type == "text")
+        try:
+            return pydantic_core.from_json(text)
+        except ValueError:
+            return text
+
+    results = await asyncio.gather(*(lookup(item) for item in lookups), return_exceptions=True)
+    return dumps(
+        {
+            "results": [
+                (
+                    {"tool": item.get("tool"), "result": None, "error": f"{type(result).__name__}: {result}"}
+                    if isinstance(result, Exception)
+                    else {"tool": item.get("tool"), "result": result, "error": None}
+                )
+                for item, result in zip(lookups, results)
+            ]
+        }
+    )
+
+
+async def get_application_view_tool(ctx: Context, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Retrieve a high-level JApplication view of the Java project.
 
@@ -15,11 +272,38 @@ async def get_application_view_tool(ctx: Context):
     Returns:
         str: JSON-encoded JApplication model.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_application_view().model_dump())
+    fields = dump_options(include, exclude)
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_application_view(), **fields), heavy=True)
 
 
-async def get_symbol_table_tool(ctx: Context):
+async def stream_application_view_tool(ctx: Context, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
+    """
+    Stream the JApplication view as NDJSON chunks instead of one JSON document.
+
+    Each chunk is a line {"chunk", "section", "key", "items"}: one per compilation unit of the symbol table (`key` is its
+    file path), then one per batch of call graph and system dependency graph edges (`key` is the position of the first
+    edge). When the call carries a progress token, every chunk is sent as the message of a progress notification. The
+    chunks can also be fetched one at a time by reading the returned resource template.
+
+    Returns:
+        str: JSON {generation, chunks, streamed, resource_template}.
+    """
+    name, _ = ctx.request_context.lifespan_context.resolve(project)
+    analysis = _project(ctx, project)
+    await analysis.wait_until_ready()
+    generation = analysis.generation
+    chunks = await analysis.executor.run(analysis.derived, ApplicationChunks)
+    streamed = ctx.request_context.meta is not None and ctx.request_context.meta.progressToken is not None
+    if streamed:
+        fields = dump_options(include, exclude)
+        for index in range(len(chunks)):
+            line = await analysis.executor.run(chunks.chunk, index, fields["include"], fields["exclude"])
+            if line is not None:
+                await ctx.report_progress(index + 1, len(chunks), message=line)
+    return dumps({"generation": generation, "chunks": len(chunks), "streamed": streamed, "resource_template": f"cocoa://application-view/{name}/{generation}/{{index}}"})
+
+
+async def get_symbol_table_tool(ctx: Context, limit: int | None = None, cursor: str | None = None, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Retrieve the symbol table (Dict[str, JCompilationUnit]) for the project.
 
@@ -28,14 +312,21 @@ async def get_symbol_table_tool(ctx: Context):
     - imports
     - type_declarations (Dict[str, JType]) with all classes/interfaces
 
+    Pass `limit` to page through the compilation units (in file path order) instead of dumping the whole project.
+    Pass the `next_cursor` of a page as `cursor` to get the next one (null on the last page).
+
     Returns:
-        str: JSON mapping of file paths to JCompilationUnit models.
+        str: JSON mapping of file paths to JCompilationUnit models, or {"items": {...}, "next_cursor": str | null} when paginated.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps({k: v.model_dump() for k, v in analysis.get_symbol_table().items()})
+    fields = dump_options(include, exclude)
+    if limit is not None or cursor is not None:
+        return await _paginate(ctx, project, limit, cursor, _file_paths, lambda project, analysis, keys: {k: analysis.get_symbol_table()[k] for k in keys}, fields=fields)
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_symbol_table(), 1, **fields), heavy=True)
 
 
-async def get_compilation_units_tool(ctx: Context):
+async def get_compilation_units_tool(
+    ctx: Context, limit: int | None = None, cursor: str | None = None, include: Include = None, exclude: Exclude = None, project: ProjectName = None
+):
     """
     Get a list of all JCompilationUnit objects.
 
@@ -45,226 +336,430 @@ async def get_compilation_units_tool(ctx: Context):
     - imports
     - type_declarations (Dict[str, JType])
 
+    Pass `limit` to page through the compilation units (in file path order) instead of dumping the whole project.
+    Pass the `next_cursor` of a page as `cursor` to get the next one (null on the last page).
+
     Returns:
-        str: JSON list of JCompilationUnit models.
+        str: JSON list of JCompilationUnit models, or {"items": [...], "next_cursor": str | null} when paginated.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps([cu.model_dump() for cu in analysis.get_compilation_units()])
+    fields = dump_options(include, exclude)
+    if limit is not None or cursor is not None:
+        return await _paginate(ctx, project, limit, cursor, _file_paths, lambda project, analysis, keys: [analysis.get_symbol_table()[k] for k in keys], fields=fields)
+    return await _run(ctx, project, lambda analysis: dumps(list(analysis.get_compilation_units()), 1, **fields), heavy=True)
 
 
-async def get_call_graph_tool(ctx: Context):
+async def get_call_graph_tool(ctx: Context, using_symbol_table: bool = False, project: ProjectName = None):
     """
     Retrieve the call graph as a NetworkX node-link data structure.
 
     Nodes represent methods; edges are JGraphEdges (source/target JMethodDetail, edge type).
 
+    Set `using_symbol_table` to export the call graph resolved from the symbol table instead, which does not need a call
+    graph level analysis; its nodes carry the `method_detail` and its edges no attributes.
+
     Returns:
-        dict: Node-link JSON graph.
+        str: Node-link JSON graph.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    graph = analysis.get_call_graph()
-    return nx.readwrite.json_graph.node_link_data(graph)
+    if using_symbol_table:
 
+        def export(project: CLDKAnalysis) -> str:
+            index = project.derived(CallIndex)
+            return _node_link(index.graph.to_networkx(lambda key: {"method_detail": index.method_detail(key)}))
 
-async def get_call_graph_json_tool(ctx: Context):
+        return await _run_on_project(ctx, project, export, heavy=True)
+    return await _run(ctx, project, lambda analysis: _node_link(analysis.get_call_graph()), heavy=True)
+
+
+async def get_call_graph_json_tool(ctx: Context, project: ProjectName = None):
     """
     Retrieve the serialized call graph.
 
     Returns:
         str: JSON string representing the full call graph.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return analysis.get_call_graph_json()
+    return await _run(ctx, project, lambda analysis: analysis.get_call_graph_json(), heavy=True)
 
 
-async def get_callers_tool(ctx: Context, target_class_name: str, target_method_declaration: str, using_symbol_table: bool = True):
+async def get_callers_tool(ctx: Context, target_class_name: str, target_method_declaration: str, using_symbol_table: bool = True, project: ProjectName = None):
     """
-    Retrieve the serialized call graph.
+    Get all callers of a specific method.
+
+    `target_method_declaration` is the signature of the method in `target_class_name`, e.g. `log(String)`. With
+    `using_symbol_table`, callers are looked up in an index of the symbol table call graph built once per analysis;
+    otherwise they come from the call graph of codeanalyzer.
 
     Returns:
-        str: JSON dictionary mapping caller details.
+        str: JSON {target_method, caller_details: [{caller_method, calling_lines}]}, {} if the method is never called.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_callers(target_class_name, target_method_declaration, using_symbol_table))
+    if using_symbol_table:
+        return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CallIndex).get_callers(target_class_name, target_method_declaration)))
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_callers(target_class_name, target_method_declaration, using_symbol_table)), heavy=True)
 
 
-async def get_callees_tool(ctx: Context, source_class_name: str, source_method_declaration: str, using_symbol_table: bool = True):
+async def get_callees_tool(ctx: Context, source_class_name: str, source_method_declaration: str, using_symbol_table: bool = True, project: ProjectName = None):
     """
     Get all callees invoked by a specific method.
 
+    With `using_symbol_table`, callees are looked up in an index of the symbol table call graph built once per analysis.
+
     Returns:
         str: JSON dictionary mapping callee details.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_callees(source_class_name, source_method_declaration, using_symbol_table))
+    if using_symbol_table:
+        return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CallIndex).get_callees(source_class_name, source_method_declaration)))
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_callees(source_class_name, source_method_declaration, using_symbol_table)), heavy=True)
 
 
-async def get_methods_tool(ctx: Context):
+async def get_transitive_callers_tool(
+    ctx: Context, target_class_name: str, target_method_declaration: str, max_depth: int = 3, max_results: int = 500, using_symbol_table: bool = True, project: ProjectName = None
+):
     """
-    Retrieve all methods in the project.
+    Get the methods calling a method directly or through up to `max_depth` intermediate calls.
 
     Returns:
-        str: JSON {class_name -> {method_signature -> JCallable}}.
+        str: JSON {"methods": [{qualified_class_name, method_signature, depth}], "truncated": bool}, closest callers first;
+        `truncated` is true when more than `max_results` methods were found.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps({cls: {meth: call.model_dump() for meth, call in methods.items()} for cls, methods in analysis.get_methods().items()})
+    return await _reach(ctx, project, [(target_class_name, target_method_declaration)], True, max_depth, max_results, using_symbol_table)
 
 
-async def get_classes_tool(ctx: Context):
+async def get_transitive_callees_tool(
+    ctx: Context, source_class_name: str, source_method_declaration: str, max_depth: int = 3, max_results: int = 500, using_symbol_table: bool = True, project: ProjectName = None
+):
     """
-    Retrieve all JType class/interface models.
+    Get the methods called by a method directly or through up to `max_depth` intermediate calls.
 
     Returns:
-        str: JSON {qualified_class_name -> JType}.
+        str: JSON {"methods": [{qualified_class_name, method_signature, depth}], "truncated": bool}, closest callees first;
+        `truncated` is true when more than `max_results` methods were found.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps({cls: typ.model_dump() for cls, typ in analysis.get_classes().items()})
+    return await _reach(ctx, project, [(source_class_name, source_method_declaration)], False, max_depth, max_results, using_symbol_table)
 
 
-async def get_classes_by_criteria_tool(ctx: Context, inclusions=None, exclusions=None):
+async def get_reachable_methods_tool(
+    ctx: Context, methods: list[tuple[str, str]], reverse: bool = False, max_depth: int = 10, max_results: int = 1000, using_symbol_table: bool = True, project: ProjectName = None
+):
     """
-    Retrieve classes filtered by inclusion/exclusion.
+    Get the methods reachable from a set of methods in the call graph, within `max_depth` calls.
+
+    `methods` is a list of [qualified_class_name, method_signature] pairs. Set `reverse` to get the methods that can reach
+    them instead (their transitive callers).
 
     Returns:
-        str: JSON {qualified_class_name -> JType}.
+        str: JSON {"methods": [{qualified_class_name, method_signature, depth}], "truncated": bool}, where depth is the
+        number of calls from the closest method of the set.
+    """
+    return await _reach(ctx, project, [tuple(method) for method in methods], reverse, max_depth, max_results, using_symbol_table)
+
+
+async def get_call_path_tool(
+    ctx: Context,
+    source_class_name: str,
+    source_method_declaration: str,
+    target_class_name: str,
+    target_method_declaration: str,
+    max_depth: int = 10,
+    using_symbol_table: bool = True,
+    project: ProjectName = None,
+):
+    """
+    Find a shortest chain of calls from a source method to a target method.
+
+    Returns:
+        str: JSON {"path": [{qualified_class_name, method_signature}] | null}, from source to target, null if the target
+        cannot be reached within `max_depth` calls.
+    """
+    if max_depth < 0:
+        raise ValueError("max_depth must not be negative.")
+    source, target = (source_class_name, source_method_declaration), (target_class_name, target_method_declaration)
+
+    def run(project: CLDKAnalysis) -> str:
+        graph = _call_graph(project, using_symbol_table)
+        source_id, target_id = graph.id(source), graph.id(target)
+        path = None if source_id is None or target_id is None else graph.shortest_path(source_id, target_id, max_depth)
+        return dumps({"path": None if path is None else [{"qualified_class_name": cls, "method_signature": sig} for cls, sig in map(graph.key, path)]})
+
+    return await _run_on_project(ctx, project, run, heavy=not using_symbol_table)
+
+
+async def search_code_tool(
+    ctx: Context,
+    query: str,
+    regex: bool = False,
+    case_sensitive: bool = False,
+    kinds: list[str] | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    project: ProjectName = None,
+):
+    """
+    Search the source of methods, field declarations and comments for a substring (or a regular expression if `regex` is set).
+
+    Queries are answered from a trigram index built once per analysis, so there is no need to fetch the code to grep it.
+    Matches ignore case unless `case_sensitive` is set. Restrict the search with `kinds`, a subset of ["method", "field",
+    "comment"]. Results are ranked by number of matches; page through them with `limit` and the `next_cursor` of a page.
+
+    Returns:
+        str: JSON {"items": [{kind, file_path, qualified_class_name, name, line, matches, snippets: [{line, text}]}],
+        "next_cursor": str | null}, where `name` is the method signature or the field variables.
+    """
+
+    def run(project: CLDKAnalysis) -> str:
+        index = project.derived(SearchIndex)
+        matches = dict(index.search(query, regex, case_sensitive, kinds))
+        page_keys, next_cursor = paginate(list(matches), limit, cursor)
+        return dumps_page([index.hit(doc_id, matches[(rank, doc_id)]) for rank, doc_id in page_keys], next_cursor)
+
+    return await _run_on_project(ctx, project, run)
+
+
+async def get_methods_tool(ctx: Context, limit: int | None = None, cursor: str | None = None, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
+    """
+    Retrieve all methods in the project.
+
+    Pass `limit` to page through the methods (ordered by class name, then signature) instead of dumping the whole project.
+    Pass the `next_cursor` of a page as `cursor` to get the next one (null on the last page).
+
+    Returns:
+        str: JSON {class_name -> {method_signature -> JCallable}}, or {"items": {...}, "next_cursor": str | null} when paginated.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps({cls: typ.model_dump() for cls, typ in analysis.get_classes_by_criteria(inclusions, exclusions).items()})
+    fields = dump_options(include, exclude)
+    if limit is not None or cursor is not None:
+        return await _paginate(ctx, project, limit, cursor, _method_keys, _methods_page, depth=2, fields=fields)
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_methods(), 2, **fields), heavy=True)
 
 
-async def get_class_tool(ctx: Context, qualified_class_name: str):
+async def get_classes_tool(ctx: Context, limit: int | None = None, cursor: str | None = None, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
+    """
+    Retrieve all JType class/interface models.
+
+    Pass `limit` to page through the classes (in qualified name order) instead of dumping the whole project.
+    Pass the `next_cursor` of a page as `cursor` to get the next one (null on the last page).
+
+    Returns:
+        str: JSON {qualified_class_name -> JType}, or {"items": {...}, "next_cursor": str | null} when paginated.
+    """
+    fields = dump_options(include, exclude)
+    if limit is not None or cursor is not None:
+        return await _paginate(ctx, project, limit, cursor, _class_names, lambda project, analysis, keys: {k: project.derived(_classes, analysis)[k] for k in keys}, fields=fields)
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_classes(), 1, **fields), heavy=True)
+
+
+async def get_classes_by_criteria_tool(
+    ctx: Context,
+    inclusions: list[str] | None = None,
+    exclusions: list[str] | None = None,
+    package: str | None = None,
+    annotation: str | None = None,
+    modifier: str | None = None,
+    implements: str | None = None,
+    extends: str | None = None,
+    entrypoint: bool | None = None,
+    min_methods: int | None = None,
+    max_methods: int | None = None,
+    min_complexity: int | None = None,
+    max_complexity: int | None = None,
+    mode: str = "classes",
+    include: Include = None,
+    exclude: Exclude = None,
+    project: ProjectName = None,
+):
+    """
+    Retrieve the classes meeting every given criterion, from class attribute indexes built once per analysis.
+
+    Criteria:
+    - `inclusions` / `exclusions`: substrings one of which the qualified name must contain / none of which it may contain.
+    - `package`: glob the package must match (e.g., `com.acme.*.web`).
+    - `annotation`: annotation of the class, by simple or qualified name (e.g., `Stateless` or `@javax.ejb.Stateless`); a
+      qualified name only matches the annotations imported from that package, or not imported on their own.
+    - `modifier`: modifier of the class (e.g., `public` or `abstract`).
+    - `implements` / `extends`: a type the class implements / extends, by qualified or simple name, ignoring type arguments.
+    - `entrypoint`: whether the class is an entry point.
+    - `min_methods` / `max_methods`: bounds of its number of methods, constructors aside.
+    - `min_complexity` / `max_complexity`: bounds of the sum of the cyclomatic complexities of its methods and constructors.
+    As with CLDK, a call without any criterion but `exclusions` matches no class: exclusions only narrow down the
+    classes the other criteria select.
+
+    Set `mode` to "names" to only get the qualified names of the classes, or to "count" to only get their number.
+
+    Returns:
+        str: JSON {qualified_class_name -> JType}, a list of qualified names in "names" mode, or {"count": int} in "count" mode.
+    """
+    if mode not in ("classes", "names", "count"):
+        raise ValueError(f"Unknown mode {mode!r}, expected classes, names or count.")
+    fields = dump_options(include, exclude)
+    criteria = ClassFilter(
+        inclusions=inclusions,
+        exclusions=exclusions,
+        package=package,
+        annotation=annotation,
+        modifier=modifier,
+        implements=implements,
+        extends=extends,
+        entrypoint=entrypoint,
+        min_methods=min_methods,
+        max_methods=max_methods,
+        min_complexity=min_complexity,
+        max_complexity=max_complexity,
+    )
+
+    def run(project: CLDKAnalysis) -> str:
+        store = project.query_store
+        if store is not None:
+            # The whole filter is pushed down to the query store.
+            if mode == "count":
+                return dumps({"count": store.count_classes_by_criteria(criteria)})
+            if mode == "names":
+                return dumps(store.get_class_names_by_criteria(criteria))
+            return dumps(store.get_classes_by_criteria(criteria), 1, **fields)
+        index = project.derived(ClassIndex)
+        class_ids = index.select(criteria)
+        if mode == "count":
+            return dumps({"count": len(class_ids)})
+        if mode == "names":
+            return dumps([index.names[class_id] for class_id in class_ids])
+        return dumps({index.names[class_id]: index.types[class_id] for class_id in class_ids}, 1, **fields)
+
+    return await _run_on_project(ctx, project, run, heavy=mode == "classes")
+
+
+async def get_class_tool(ctx: Context, qualified_class_name: str, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Retrieve details for a specific JType class.
 
     Returns:
         str: JSON JType object.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_class(qualified_class_name).model_dump())
+    fields = dump_options(include, exclude)
+    return await _lookup(ctx, project, lambda source: dumps(source.get_class(qualified_class_name), **fields))
 
 
-async def get_method_tool(ctx: Context, qualified_class_name: str, qualified_method_name: str):
+async def get_method_tool(ctx: Context, qualified_class_name: str, qualified_method_name: str, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Retrieve details for a specific JCallable method.
 
     Returns:
         str: JSON JCallable object.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_method(qualified_class_name, qualified_method_name).model_dump())
+    fields = dump_options(include, exclude)
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_method(qualified_class_name, qualified_method_name), **fields))
 
 
-async def get_method_parameters_tool(ctx: Context, qualified_class_name: str, qualified_method_name: str):
+async def get_method_parameters_tool(ctx: Context, qualified_class_name: str, qualified_method_name: str, project: ProjectName = None):
     """
     Retrieve parameter names for a method.
 
     Returns:
         str: JSON list of parameter names.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_method_parameters(qualified_class_name, qualified_method_name))
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_method_parameters(qualified_class_name, qualified_method_name)))
 
 
-async def get_java_file_tool(ctx: Context, qualified_class_name: str):
+async def get_java_file_tool(ctx: Context, qualified_class_name: str, project: ProjectName = None):
     """
     Get the Java file path containing a class.
 
     Returns:
         str: File path string.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return analysis.get_java_file(qualified_class_name)
+    return await _run(ctx, project, lambda analysis: analysis.get_java_file(qualified_class_name))
 
 
-async def get_java_compilation_unit_tool(ctx: Context, file_path: str):
+async def get_java_compilation_unit_tool(ctx: Context, file_path: str, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get the JCompilationUnit for a Java file.
 
     Returns:
         str: JSON JCompilationUnit object.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_java_compilation_unit(file_path).model_dump())
+    fields = dump_options(include, exclude)
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_java_compilation_unit(file_path), **fields))
 
 
-async def get_methods_in_class_tool(ctx: Context, qualified_class_name: str):
+async def get_methods_in_class_tool(ctx: Context, qualified_class_name: str, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get all JCallable methods within a class.
 
     Returns:
         str: JSON {method_signature -> JCallable}.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps({meth: call.model_dump() for meth, call in analysis.get_methods_in_class(qualified_class_name).items()})
+    fields = dump_options(include, exclude)
+    return await _lookup(ctx, project, lambda source: dumps(source.get_methods_in_class(qualified_class_name), 1, **fields))
 
 
-async def get_constructors_tool(ctx: Context, qualified_class_name: str):
+async def get_constructors_tool(ctx: Context, qualified_class_name: str, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get all constructors (JCallable) in a class.
 
     Returns:
         str: JSON {constructor_signature -> JCallable}.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps({ctor: call.model_dump() for ctor, call in analysis.get_constructors(qualified_class_name).items()})
+    fields = dump_options(include, exclude)
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_constructors(qualified_class_name), 1, **fields))
 
 
-async def get_fields_tool(ctx: Context, qualified_class_name: str):
+async def get_fields_tool(ctx: Context, qualified_class_name: str, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get all JField declarations in a class.
 
     Returns:
         str: JSON list of JField objects.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps([field.model_dump() for field in analysis.get_fields(qualified_class_name)])
+    fields = dump_options(include, exclude)
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_fields(qualified_class_name), 1, **fields))
 
 
-async def get_nested_classes_tool(ctx: Context, qualified_class_name: str):
+async def get_nested_classes_tool(ctx: Context, qualified_class_name: str, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get all nested JType classes inside a class.
 
     Returns:
         str: JSON list of JType objects.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps([typ.model_dump() for typ in analysis.get_nested_classes(qualified_class_name)])
+    fields = dump_options(include, exclude)
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_nested_classes(qualified_class_name), 1, **fields))
 
 
-async def get_sub_classes_tool(ctx: Context, qualified_class_name: str):
+async def get_sub_classes_tool(ctx: Context, qualified_class_name: str, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get all subclasses (JType) extending a class.
 
     Returns:
         str: JSON {subclass_name -> JType}.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps({cls: typ.model_dump() for cls, typ in analysis.get_sub_classes(qualified_class_name).items()})
+    fields = dump_options(include, exclude)
+    return await _lookup(ctx, project, lambda source: dumps(source.get_sub_classes(qualified_class_name), 1, **fields))
 
 
-async def get_extended_classes_tool(ctx: Context, qualified_class_name: str):
+async def get_extended_classes_tool(ctx: Context, qualified_class_name: str, project: ProjectName = None):
     """
     Get all extended superclasses for a class.
 
     Returns:
         str: JSON list of class names.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_extended_classes(qualified_class_name))
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_extended_classes(qualified_class_name)))
 
 
-async def get_implemented_interfaces_tool(ctx: Context, qualified_class_name: str):
+async def get_implemented_interfaces_tool(ctx: Context, qualified_class_name: str, project: ProjectName = None):
     """
     Get all implemented interfaces for a class.
 
     Returns:
         str: JSON list of interface names.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_implemented_interfaces(qualified_class_name))
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_implemented_interfaces(qualified_class_name)))
 
 
-async def get_class_call_graph_tool(ctx: Context, qualified_class_name: str, method_signature: str | None = None, using_symbol_table: bool = False):
+async def get_class_call_graph_tool(
+    ctx: Context,
+    qualified_class_name: str,
+    method_signature: str | None = None,
+    using_symbol_table: bool = False,
+    include: Include = None,
+    exclude: Exclude = None,
+    project: ProjectName = None,
+):
     """
     Get the method-level call graph edges within a class.
 
@@ -273,159 +768,258 @@ async def get_class_call_graph_tool(ctx: Context, qualified_class_name: str, met
     Returns:
         str: JSON list of edge tuples.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps([(src.model_dump(), tgt.model_dump()) for src, tgt in analysis.get_class_call_graph(qualified_class_name, method_signature, using_symbol_table)])
+    fields = dump_options(include, exclude)
+    return await _run(
+        ctx,
+        project,
+        lambda analysis: dumps(analysis.get_class_call_graph(qualified_class_name, method_signature, using_symbol_table), 2, **fields),
+    )
 
 
-async def get_entry_point_classes_tool(ctx: Context):
+async def get_entry_point_classes_tool(ctx: Context, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get all entry point classes (JType).
 
     Returns:
         str: JSON {qualified_class_name -> JType}.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps({cls: typ.model_dump() for cls, typ in analysis.get_entry_point_classes().items()})
+    fields = dump_options(include, exclude)
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_entry_point_classes(), 1, **fields), heavy=True)
 
 
-async def get_entry_point_methods_tool(ctx: Context):
+async def get_entry_point_methods_tool(ctx: Context, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get all entry point methods (JCallable) across classes.
 
     Returns:
         str: JSON {class_name -> {method_signature -> JCallable}}.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps({cls: {meth: call.model_dump() for meth, call in methods.items()} for cls, methods in analysis.get_entry_point_methods().items()})
+    fields = dump_options(include, exclude)
+    return await _run(
+        ctx,
+        project,
+        lambda analysis: dumps(analysis.get_entry_point_methods(), 2, **fields),
+        heavy=True,
+    )
 
 
-async def remove_all_comments_tool(ctx: Context):
+async def remove_all_comments_tool(ctx: Context, project: ProjectName = None):
     """
     Strip all comments from the source code.
 
     Returns:
         str: Source code without comments.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return analysis.remove_all_comments()
+    return await _run(ctx, project, lambda analysis: analysis.remove_all_comments(), heavy=True)
 
 
-async def get_test_methods_tool(ctx: Context):
+async def get_test_methods_tool(ctx: Context, project: ProjectName = None):
     """
     Get all test methods detected in the project.
 
     Returns:
         str: JSON {method_name -> method_body}.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_test_methods())
+    return await _run(ctx, project, lambda analysis: dumps(analysis.get_test_methods()), heavy=True)
 
 
-async def get_all_crud_operations_tool(ctx: Context):
+async def get_all_crud_operations_tool(ctx: Context, project: ProjectName = None):
     """
     Get all CRUD operations (JCRUDOperation) across the project.
 
     Returns:
         str: JSON list [{JType, JCallable, [JCRUDOperation]}].
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_all_crud_operations())
+    return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CrudIndex).by_method()), heavy=True)
 
 
-async def get_all_create_operations_tool(ctx: Context):
+async def get_all_create_operations_tool(ctx: Context, project: ProjectName = None):
     """
     Get all CREATE CRUD operations.
 
     Returns:
         str: JSON list [{JType, JCallable, [JCRUDOperation]}].
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_all_create_operations())
+    return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CrudIndex).by_method(CRUDOperationType.CREATE)), heavy=True)
 
 
-async def get_all_read_operations_tool(ctx: Context):
+async def get_all_read_operations_tool(ctx: Context, project: ProjectName = None):
     """
     Get all READ CRUD operations.
 
     Returns:
         str: JSON list [{JType, JCallable, [JCRUDOperation]}].
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_all_read_operations())
+    return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CrudIndex).by_method(CRUDOperationType.READ)), heavy=True)
 
 
-async def get_all_update_operations_tool(ctx: Context):
+async def get_all_update_operations_tool(ctx: Context, project: ProjectName = None):
     """
     Get all UPDATE CRUD operations.
 
     Returns:
         str: JSON list [{JType, JCallable, [JCRUDOperation]}].
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_all_update_operations())
+    return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CrudIndex).by_method(CRUDOperationType.UPDATE)), heavy=True)
 
 
-async def get_all_delete_operations_tool(ctx: Context):
+async def get_all_delete_operations_tool(ctx: Context, project: ProjectName = None):
     """
     Get all DELETE CRUD operations.
 
     Returns:
         str: JSON list [{JType, JCallable, [JCRUDOperation]}].
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps(analysis.get_all_delete_operations())
+    return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CrudIndex).by_method(CRUDOperationType.DELETE)), heavy=True)
+
+
+async def query_crud_operations_tool(
+    ctx: Context,
+    kind: str | None = None,
+    operation_type: str | None = None,
+    qualified_class_name: str | None = None,
+    method_signature: str | None = None,
+    target: str | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    project: ProjectName = None,
+):
+    """
+    Get the CRUD operations and queries matching every given filter, one page at a time, from an index built once per analysis.
 
+    Filter by `kind` ("operation" or "query"), `operation_type` (CREATE, READ, UPDATE or DELETE for operations; READ,
+    WRITE or NAMED for queries), `qualified_class_name` (and `method_signature` for a method) and `target`, a table or
+    entity name the operation works on, when it is known. Pages hold up to `limit` entries; pass the `next_cursor` of a
+    page as `cursor` to get the next one.
 
-async def get_comments_in_a_method_tool(ctx: Context, qualified_class_name: str, method_signature: str):
+    Returns:
+        str: JSON {"items": [{kind, operation_type, qualified_class_name, method_signature, line_number, targets,
+        model: JCRUDOperation | JCRUDQuery}], "next_cursor": str | null}, in class, method and line order.
+    """
+
+    def run(project: CLDKAnalysis) -> str:
+        entries, next_cursor = project.derived(CrudIndex).query(kind, operation_type, qualified_class_name, method_signature, target, limit, cursor)
+        return dumps_page([entry._asdict() for entry in entries], next_cursor)
+
+    return await _run_on_project(ctx, project, run)
+
+
+async def get_comments_in_a_method_tool(
+    ctx: Context, qualified_class_name: str, method_signature: str, include: Include = None, exclude: Exclude = None, project: ProjectName = None
+):
     """
     Get all JComment objects inside a specific method.
 
     Returns:
         str: JSON list of JComment models.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps([c.model_dump() for c in analysis.get_comments_in_a_method(qualified_class_name, method_signature)])
+    fields = dump_options(include, exclude)
+    return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CommentIndex).in_method(qualified_class_name, method_signature), 1, **fields))
 
 
-async def get_comments_in_a_class_tool(ctx: Context, qualified_class_name: str):
+async def get_comments_in_a_class_tool(ctx: Context, qualified_class_name: str, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get all JComment objects inside a specific class.
 
     Returns:
         str: JSON list of JComment models.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps([c.model_dump() for c in analysis.get_comments_in_a_class(qualified_class_name)])
+    fields = dump_options(include, exclude)
+    return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CommentIndex).in_class(qualified_class_name), 1, **fields))
 
 
-async def get_comment_in_file_tool(ctx: Context, file_path: str):
+async def get_comment_in_file_tool(ctx: Context, file_path: str, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get all JComment objects in a file.
 
     Returns:
         str: JSON list of JComment models.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps([c.model_dump() for c in analysis.get_comment_in_file(file_path)])
+    fields = dump_options(include, exclude)
+    return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CommentIndex).in_file(file_path), 1, **fields))
 
 
-async def get_all_comments_tool(ctx: Context):
+async def get_all_comments_tool(ctx: Context, limit: int | None = None, cursor: str | None = None, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get all comments across the project.
 
+    Pass `limit` to page through the files (in file path order) instead of dumping the whole project.
+    Pass the `next_cursor` of a page as `cursor` to get the next one (null on the last page).
+
     Returns:
-        str: JSON {file_path -> [JComment]}.
+        str: JSON {file_path -> [JComment]}, or {"items": {...}, "next_cursor": str | null} when paginated.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps({fp: [c.model_dump() for c in comments] for fp, comments in analysis.get_all_comments().items()})
+    fields = dump_options(include, exclude)
+    if limit is not None or cursor is not None:
+        return await _paginate(
+            ctx,
+            project,
+            limit,
+            cursor,
+            _file_paths,
+            lambda project, analysis, keys: {k: project.derived(CommentIndex, analysis).file_comments[k] for k in keys},
+            depth=2,
+            fields=fields,
+        )
+    return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CommentIndex).file_comments, 2, **fields), heavy=True)
 
 
-async def get_all_docstrings_tool(ctx: Context):
+async def get_all_docstrings_tool(ctx: Context, limit: int | None = None, cursor: str | None = None, include: Include = None, exclude: Exclude = None, project: ProjectName = None):
     """
     Get all docstrings (JComment) across the project.
 
+    Pass `limit` to page through the files with docstrings (in file path order) instead of dumping the whole project.
+    Pass the `next_cursor` of a page as `cursor` to get the next one (null on the last page).
+
     Returns:
-        str: JSON {file_path -> [JComment]}.
+        str: JSON {file_path -> [JComment]}, or {"items": {...}, "next_cursor": str | null} when paginated.
+    """
+    fields = dump_options(include, exclude)
+    if limit is not None or cursor is not None:
+        return await _paginate(
+            ctx,
+            project,
+            limit,
+            cursor,
+            _javadoc_file_paths,
+            lambda project, analysis, keys: {k: project.derived(CommentIndex, analysis).docstrings[k] for k in keys},
+            depth=2,
+            fields=fields,
+        )
+    return await _run_on_project(ctx, project, lambda project: dumps(project.derived(CommentIndex).docstrings, 2, **fields), heavy=True)
+
+
+async def query_comments_tool(
+    ctx: Context,
+    file_path: str | None = None,
+    qualified_class_name: str | None = None,
+    method_signature: str | None = None,
+    start_line: int | None = None,
+    end_line: int | None = None,
+    javadoc_only: bool = False,
+    package_prefix: str | None = None,
+    text: str | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    project: ProjectName = None,
+):
+    """
+    Get the comments matching every given filter, one page at a time, from an index built once per analysis.
+
+    Filter by `file_path`, `qualified_class_name` (and `method_signature` for a method), the `start_line`-`end_line`
+    range a comment overlaps, `javadoc_only`, `package_prefix` (a package and its sub-packages) and `text` (ignoring
+    case). The cost of a query depends on the comments its narrowest filter selects, not on the size of the project.
+    Pages hold up to `limit` comments; pass the `next_cursor` of a page as `cursor` to get the next one.
+
+    Returns:
+        str: JSON {"items": [{package_name, file_path, qualified_class_name, method_signature, comment: JComment}],
+        "next_cursor": str | null}, in package, file and line order.
     """
-    analysis = ctx.request_context.lifespan_context.analysis_instance
-    return json.dumps({fp: [c.model_dump() for c in docstrings] for fp, docstrings in analysis.get_all_docstrings().items()})
+
+    def run(project: CLDKAnalysis) -> str:
+        entries, next_cursor = project.derived(CommentIndex).query(
+            file_path, qualified_class_name, method_signature, start_line, end_line, javadoc_only, package_prefix, text, limit, cursor
+        )
+        return dumps_page([entry._asdict() for entry in entries], next_cursor)
+
+    return await _run_on_project(ctx, project, run)
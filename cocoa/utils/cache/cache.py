@@ -0,0 +1,162 @@
+import os
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+from importlib.metadata import PackageNotFoundError, version
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AnalysisCache:
+    """Persistent on-disk cache of CLDK analysis results.
+
+    Every entry is a directory named after a fingerprint of the project's sources and the analysis settings. CLDK writes
+    its `analysis.json` into that directory and reads it back on the next start, so a restart over unchanged sources skips
+    the codeanalyzer run entirely. Editing, adding or removing a source file changes the fingerprint, which makes the old
+    entry unreachable; it is then reclaimed by the size-capped LRU eviction.
+    """
+
+    # The file codeanalyzer writes inside the directory passed as `analysis_json_path`.
+    ANALYSIS_FILE = "analysis.json"
+
+    # Written once the analysis completed, so entries left behind by an interrupted run are never reused.
+    COMPLETE_MARKER = ".complete"
+
+    # Files whose content determines the analysis result.
+    SOURCE_SUFFIXES = {".java"}
+    BUILD_FILES = {"pom.xml", "build.gradle", "build.gradle.kts", "settings.gradle", "settings.gradle.kts"}
+
+    def __init__(self, cache_dir: Path, max_size: int):
+        """Create the cache.
+
+        Args:
+            cache_dir (Path): Directory holding the cache entries. Created if missing.
+            max_size (int): Upper bound, in bytes, for the total size of all entries.
+        """
+        self.cache_dir = Path(cache_dir).expanduser().absolute()
+        self.max_size = max_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, project_path: Path, **settings: Any) -> str:
+        """Compute the cache key of a project.
+
+        The key hashes the relative path and content of every source and build file, the analysis settings, and the
+        CLDK version (which determines the bundled codeanalyzer).
+
+        Args:
+            project_path (Path): Root of the Java project.
+            **settings: Analysis settings that change the analysis output (e.g., the analysis level).
+
+        Returns:
+            str: Hex digest identifying the analysis result.
+        """
+        project_path = Path(project_path).absolute()
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(str(project_path).encode())
+        digest.update(_cldk_version().encode())
+        for name, value in sorted(settings.items()):
+            digest.update(f"{name}={value}".encode())
+        for source_file in self._source_files(project_path):
+            digest.update(source_file.relative_to(project_path).as_posix().encode())
+            digest.update(b"\0")
+            with open(source_file, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        return self._is_complete(self.cache_dir / key)
+
+    def last_used(self, key: str) -> float:
+        """Tell when an entry was last written or loaded.
+
+        Args:
+            key (str): Cache key, as returned by `key`.
+
+        Returns:
+            float: The modification time of the entry's completion marker, 0 if the entry is incomplete or missing.
+        """
+        marker = self.cache_dir / key / self.COMPLETE_MARKER
+        return marker.stat().st_mtime if marker.exists() else 0.0
+
+    def load(self, key: str, build: Callable[[Path], T]) -> T:
+        """Load an analysis through the cache.
+
+        Args:
+            key (str): Cache key, as returned by `key`.
+            build (Callable[[Path], T]): Runs the analysis with the given directory as CLDK's `analysis_json_path`. On a hit the
+                directory already holds the analysis, so CLDK only reads it back.
+
+        Returns:
+            T: Whatever `build` returned.
+        """
+        entry = self.cache_dir / key
+        if self._is_complete(entry):
+            try:
+                result = build(entry)
+                os.utime(entry / self.COMPLETE_MARKER)
+                logger.info(f"Loaded analysis from cache entry {entry}")
+                return result
+            except Exception as e:
+                logger.warning(f"Discarding unreadable cache entry {entry}: {e}")
+        shutil.rmtree(entry, ignore_errors=True)
+        entry.mkdir(parents=True)
+        try:
+            result = build(entry)
+        except Exception:
+            shutil.rmtree(entry, ignore_errors=True)
+            raise
+        (entry / self.COMPLETE_MARKER).touch()
+        self.evict(keep=key)
+        return result
+
+    def evict(self, keep: str | None = None) -> None:
+        """Remove least recently used entries until the cache fits in `max_size`.
+
+        Args:
+            keep (str, optional): Key of an entry that must survive eviction, typically the one just written.
+        """
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            if not entry.is_dir():
+                continue
+            entries.append((self.last_used(entry.name), entry, _directory_size(entry)))
+
+        total = sum(size for _, _, size in entries)
+        for _, entry, size in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_size:
+                break
+            if entry.name == keep:
+                continue
+            logger.info(f"Evicting cache entry {entry}")
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def _is_complete(self, entry: Path) -> bool:
+        return (entry / self.COMPLETE_MARKER).exists() and (entry / self.ANALYSIS_FILE).exists()
+
+    def _source_files(self, project_path: Path) -> list[Path]:
+        source_files = []
+        for root, dirs, files in os.walk(project_path):
+            # Skip VCS metadata and other hidden directories, they never contribute to the analysis.
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                if Path(name).suffix in self.SOURCE_SUFFIXES or name in self.BUILD_FILES:
+                    source_files.append(Path(root) / name)
+        return sorted(source_files)
+
+
+def _directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def _cldk_version() -> str:
+    try:
+        return version("cldk")
+    except PackageNotFoundError:
+        return "unknown"
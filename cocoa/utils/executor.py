@@ -0,0 +1,55 @@
+import asyncio
+import functools
+import contextvars
+from typing import Any, Callable
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ToolExecutor:
+    """Run blocking tool work off the asyncio event loop on a bounded thread pool.
+
+    Heavy calls (whole-project dumps) are additionally limited to `max_heavy` at a time. As long as `max_heavy` is lower
+    than `max_workers`, some threads are always left for cheap lookups, so those keep a low latency while big responses are
+    being built.
+    """
+
+    def __init__(self, max_workers: int = 8, max_heavy: int = 2):
+        """Create the executor.
+
+        Args:
+            max_workers (int, optional): Number of worker threads. Defaults to 8.
+            max_heavy (int, optional): Maximum number of heavy calls running at once. Defaults to 2.
+        """
+        if max_workers < 1 or max_heavy < 1:
+            raise ValueError("The executor needs at least one worker and one heavy slot.")
+        self.max_workers = max_workers
+        self.max_heavy = min(max_heavy, max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cocoa-tool")
+        self._heavy = asyncio.Semaphore(self.max_heavy)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, heavy: bool = False) -> Any:
+        """Run `fn(*args)` on a worker thread and wait for its result.
+
+        Args:
+            fn (Callable[..., Any]): The blocking function.
+            *args: Positional arguments for `fn`.
+            heavy (bool, optional): Whether the call builds a whole-project response. Defaults to False.
+
+        Returns:
+            Any: The return value of `fn`.
+        """
+        loop = asyncio.get_running_loop()
+        # Carry the context variables (e.g., the MCP request context) over to the worker thread.
+        call = functools.partial(contextvars.copy_context().run, fn, *args)
+        if not heavy:
+            return await loop.run_in_executor(self._pool, call)
+        async with self._heavy:
+            return await loop.run_in_executor(self._pool, call)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the worker threads, dropping the calls that have not started yet.
+
+        Args:
+            wait (bool, optional): Whether to wait for the running calls to end and the threads to exit. Defaults to False.
+        """
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,190 @@
+import sys
+import time
+import bisect
+import functools
+from typing import Any, Callable
+from dataclasses import dataclass, field
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Upper bounds, in seconds, of the tool latency histogram buckets (Prometheus' defaults).
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class ToolStats:
+    """Counters of one tool."""
+
+    calls: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    latency_sum: float = 0.0
+    latency_max: float = 0.0
+    # Calls per latency bucket, the last one being unbounded.
+    latency_buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    response_bytes_sum: int = 0
+    response_bytes_max: int = 0
+
+    def observe(self, latency: float) -> None:
+        self.calls += 1
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate a latency quantile as the upper bound of the bucket holding it (the largest latency for the last bucket)."""
+        if self.calls == 0:
+            return None
+        rank, seen = q * self.calls, 0
+        for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return round(self.latency_max, 6)
+
+
+class ServerMetrics:
+    """
+    Latency, payload size, error, concurrency and response cache counters of the tools of the server.
+
+    Tools are instrumented with `instrument`; the counters are only updated from the event loop, so they need no lock.
+    """
+
+    def __init__(self):
+        self.tools: dict[str, ToolStats] = {}
+        self.started_at = time.monotonic()
+
+    def stats(self, tool_name: str) -> ToolStats:
+        """Get the counters of a tool, creating them on first use."""
+        stats = self.tools.get(tool_name)
+        if stats is None:
+            stats = self.tools[tool_name] = ToolStats()
+        return stats
+
+    def instrument(self, tool: Callable) -> Callable:
+        """Wrap a tool so that its calls update its counters.
+
+        Args:
+            tool (Callable): The async tool function.
+
+        Returns:
+            Callable: The wrapped tool, with the same name and signature.
+        """
+
+        @functools.wraps(tool)
+        async def wrapper(*args, **kwargs):
+            stats = self.stats(tool.__name__)
+            stats.in_flight += 1
+            start = time.perf_counter()
+            try:
+                response = await tool(*args, **kwargs)
+            except BaseException:
+                stats.errors += 1
+                raise
+            finally:
+                stats.in_flight -= 1
+                stats.observe(time.perf_counter() - start)
+            size = _size(response)
+            if size is not None:
+                stats.response_bytes_sum += size
+                stats.response_bytes_max = max(stats.response_bytes_max, size)
+            return response
+
+        return wrapper
+
+    def snapshot(self) -> dict[str, Any]:
+        """Report the counters.
+
+        Returns:
+            dict[str, Any]: {uptime_seconds, max_rss_bytes, tools: {name: {calls, errors, in_flight, cache_hits,
+            cache_misses, cache_hit_rate, latency_seconds: {mean, p50, p95, p99, max}, response_bytes: {mean, max, total}}}}.
+        """
+        tools = {}
+        for name, stats in sorted(self.tools.items()):
+            cached = stats.cache_hits + stats.cache_misses
+            tools[name] = {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "in_flight": stats.in_flight,
+                "cache_hits": stats.cache_hits,
+                "cache_misses": stats.cache_misses,
+                "cache_hit_rate": round(stats.cache_hits / cached, 4) if cached else None,
+                "latency_seconds": {
+                    "mean": round(stats.latency_sum / stats.calls, 6) if stats.calls else None,
+                    "p50": stats.quantile(0.5),
+                    "p95": stats.quantile(0.95),
+                    "p99": stats.quantile(0.99),
+                    "max": round(stats.latency_max, 6),
+                },
+                "response_bytes": {
+                    "mean": stats.response_bytes_sum // stats.calls if stats.calls else None,
+                    "max": stats.response_bytes_max,
+                    "total": stats.response_bytes_sum,
+                },
+            }
+        return {"uptime_seconds": round(time.monotonic() - self.started_at, 3), "max_rss_bytes": max_rss(), "tools": tools}
+
+    def prometheus(self) -> str:
+        """Render the counters in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page.
+        """
+        lines = []
+
+        def family(name: str, kind: str, help: str, samples: list[tuple[str, float]]) -> None:
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {kind}"])
+            lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+        tools = sorted(self.tools.items())
+        family("cocoa_tool_calls_total", "counter", "Completed tool calls.", [(_labels(tool=name), stats.calls) for name, stats in tools])
+        family("cocoa_tool_errors_total", "counter", "Tool calls that raised an error.", [(_labels(tool=name), stats.errors) for name, stats in tools])
+        family("cocoa_tool_in_flight", "gauge", "Tool calls running.", [(_labels(tool=name), stats.in_flight) for name, stats in tools])
+        family("cocoa_tool_cache_hits_total", "counter", "Tool calls served from the response cache.", [(_labels(tool=name), stats.cache_hits) for name, stats in tools])
+        family("cocoa_tool_cache_misses_total", "counter", "Tool calls missing the response cache.", [(_labels(tool=name), stats.cache_misses) for name, stats in tools])
+        latency = []
+        for name, stats in tools:
+            cumulative = 0
+            for bound, count in zip([*LATENCY_BUCKETS, "+Inf"], stats.latency_buckets):
+                cumulative += count
+                latency.append(("_bucket" + _labels(tool=name, le=bound), cumulative))
+            latency.extend([("_sum" + _labels(tool=name), stats.latency_sum), ("_count" + _labels(tool=name), stats.calls)])
+        lines.extend(["# HELP cocoa_tool_latency_seconds Latency of the tool calls.", "# TYPE cocoa_tool_latency_seconds histogram"])
+        lines.extend(f"cocoa_tool_latency_seconds{suffix} {value}" for suffix, value in latency)
+        family("cocoa_tool_response_bytes_total", "counter", "Size of the tool responses.", [(_labels(tool=name), stats.response_bytes_sum) for name, stats in tools])
+        family("cocoa_tool_response_bytes_max", "gauge", "Size of the largest tool response.", [(_labels(tool=name), stats.response_bytes_max) for name, stats in tools])
+        family("cocoa_uptime_seconds", "gauge", "Seconds since the server started.", [("", round(time.monotonic() - self.started_at, 3))])
+        rss = max_rss()
+        if rss is not None:
+            family("cocoa_max_rss_bytes", "gauge", "Peak resident set size of the server process.", [("", rss)])
+        return "\n".join(lines) + "\n"
+
+
+def max_rss() -> int | None:
+    """Get the peak resident set size of the process in bytes, None where it is not available."""
+    if resource is None:
+        return None
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _size(response: Any) -> int | None:
+    # Only responses the tool serialized itself are measured: encoding anything else again would block the event loop.
+    if isinstance(response, str):
+        return len(response) if response.isascii() else len(response.encode())
+    if isinstance(response, bytes):
+        return len(response)
+    return None
+
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+# The counters of this server process.
+METRICS = ServerMetrics()
@@ -0,0 +1,108 @@
+import json
+import base64
+import bisect
+from typing import Any, Callable, Sequence
+
+# Page size used when a client sends a cursor without a limit.
+DEFAULT_PAGE_SIZE = 100
+
+
+def encode_cursor(key: Any) -> str:
+    """Encode the last key of a page into an opaque cursor.
+
+    Args:
+        key (Any): A JSON-serializable key (a string or a tuple of strings).
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Any:
+    """Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): Cursor string.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+
+    Returns:
+        Any: The key the cursor points after.
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    return tuple(key) if isinstance(key, list) else key
+
+
+def _after(keys: Sequence[Any], cursor: str) -> int:
+    # The position of the first key after the cursor; a key of another type comes from a cursor of another listing.
+    try:
+        return bisect.bisect_right(keys, decode_cursor(cursor))
+    except TypeError as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def paginate(keys: Sequence[Any], limit: int | None, cursor: str | None) -> tuple[Sequence[Any], str | None]:
+    """Select one page of keys.
+
+    The cursor records the last key of the previous page rather than an offset, so pages stay stable even if keys are
+    added or removed between two calls (e.g., after an incremental re-analysis).
+
+    Args:
+        keys (Sequence[Any]): All keys, sorted.
+        limit (int | None): Maximum number of keys in the page. Defaults to `DEFAULT_PAGE_SIZE` when None.
+        cursor (str | None): Cursor of the previous page, None for the first page.
+
+    Raises:
+        ValueError: If the limit is not positive or the cursor is invalid.
+
+    Returns:
+        tuple[Sequence[Any], str | None]: The keys of the page, and the cursor of the next page (None on the last page).
+    """
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    if limit < 1:
+        raise ValueError("The page limit must be positive.")
+    start = 0 if cursor is None else _after(keys, cursor)
+    page = keys[start : start + limit]
+    next_cursor = encode_cursor(page[-1]) if start + limit < len(keys) else None
+    return page, next_cursor
+
+
+def paginate_ids(selections: Sequence[Sequence[int]], size: int, matches: Callable[[int], bool], limit: int | None, cursor: str | None) -> tuple[list[int], str | None]:
+    """Select one page of the IDs matching a filter.
+
+    Each selection is a sorted sequence holding every matching ID (e.g., the IDs of one file, or of one class). Only the
+    narrowest selection is walked, from the cursor on, so the cost of a page depends on its size rather than on `size`.
+
+    Args:
+        selections (Sequence[Sequence[int]]): Sorted ID selections; every ID below `size` when there is none.
+        size (int): Number of IDs.
+        matches (Callable[[int], bool]): Whether an ID matches the filter.
+        limit (int | None): Maximum number of IDs in the page. Defaults to `DEFAULT_PAGE_SIZE` when None.
+        cursor (str | None): Cursor of the previous page, None for the first page.
+
+    Raises:
+        ValueError: If the limit is not positive or the cursor is invalid.
+
+    Returns:
+        tuple[list[int], str | None]: The IDs of the page, and the cursor of the next page (None on the last page).
+    """
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    if limit < 1:
+        raise ValueError("The page limit must be positive.")
+    selection = min(selections, key=len, default=range(size))
+    start = 0 if cursor is None else _after(selection, cursor)
+    page: list[int] = []
+    for position in range(start, len(selection)):
+        if not matches(selection[position]):
+            continue
+        if len(page) == limit:
+            return page, encode_cursor(page[-1])
+        page.append(selection[position])
+    return page, None
@@ -0,0 +1,59 @@
+from typing import Iterable
+
+
+def field_spec(paths: Iterable[str] | None) -> dict | None:
+    """Turn dotted field paths into a pydantic include/exclude specification.
+
+    A `*` segment matches every item of a list or every value of a dict, so `callable_declarations.*.signature` selects
+    the signature of every callable of a JType.
+
+    Args:
+        paths (Iterable[str] | None): Dotted field paths.
+
+    Returns:
+        dict | None: The nested specification accepted by `model_dump(include=..., exclude=...)`, None if there are no paths.
+    """
+    if not paths:
+        return None
+    spec: dict = {}
+    for path in paths:
+        node = spec
+        *parents, leaf = ["__all__" if part == "*" else part for part in path.split(".")]
+        for part in parents:
+            if node.get(part) is True:
+                # A shorter path already selects this whole field.
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[leaf] = True
+    return spec
+
+
+def dump_options(include: Iterable[str] | None = None, exclude: Iterable[str] | None = None) -> dict:
+    """Build the `model_dump` keyword arguments projecting a model on the given field paths.
+
+    Args:
+        include (Iterable[str] | None, optional): Field paths to keep; everything is kept when None.
+        exclude (Iterable[str] | None, optional): Field paths to drop.
+
+    Returns:
+        dict: `include` and `exclude` keyword arguments for `model_dump`.
+    """
+    return {"include": field_spec(include), "exclude": field_spec(exclude)}
+
+
+def nest(spec: dict | None, depth: int) -> dict | None:
+    """Apply a field specification to the models nested `depth` containers (lists, tuples or dicts) deep in a response.
+
+    Args:
+        spec (dict | None): Specification returned by `field_spec`.
+        depth (int): Number of container levels between the response and the models.
+
+    Returns:
+        dict | None: The specification for the whole response, None if `spec` is None.
+    """
+    if spec is None:
+        return None
+    for _ in range(depth):
+        spec = {"__all__": spec}
+    return spec
@@ -0,0 +1,102 @@
+import sys
+from collections import OrderedDict
+from typing import Hashable
+
+
+class ResponseCache:
+    """In-memory LRU cache of serialized tool responses.
+
+    Entries are only valid for the analysis generation they were computed from: the first lookup after the analysis was
+    patched drops every entry. The total size of the cached responses is kept under `max_size` by evicting the least
+    recently used ones.
+    """
+
+    def __init__(self, max_size: int):
+        """Create the cache.
+
+        Args:
+            max_size (int): Upper bound, in bytes, for the total size of the cached responses.
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.generation: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[Hashable, str] = OrderedDict()
+
+    def get(self, key: Hashable, generation: int) -> str | None:
+        """Look up a response.
+
+        Args:
+            key (Hashable): The tool name and arguments.
+            generation (int): The current analysis generation.
+
+        Returns:
+            str | None: The cached response, None on a miss.
+        """
+        self._check_generation(generation)
+        response = self._entries.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def put(self, key: Hashable, generation: int, response: str) -> None:
+        """Store a response, evicting the least recently used ones if the cache gets over its budget.
+
+        Args:
+            key (Hashable): The tool name and arguments.
+            generation (int): The analysis generation the response was computed from.
+            response (str): The serialized response.
+        """
+        if self.generation is not None and generation < self.generation:
+            # Computed from an analysis that has been patched since.
+            return
+        self._check_generation(generation)
+        size = sys.getsizeof(response)
+        if size > self.max_size:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= sys.getsizeof(previous)
+        self._entries[key] = response
+        self.size += size
+        while self.size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= sys.getsizeof(evicted)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        """Report the cache counters.
+
+        Returns:
+            dict: {hits, misses, hit_rate, entries, size_bytes, max_size_bytes, evictions, invalidations}.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "size_bytes": self.size,
+            "max_size_bytes": self.max_size,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _check_generation(self, generation: int) -> None:
+        if generation == self.generation:
+            return
+        if self.generation is not None:
+            self.invalidations += 1
+        self.clear()
+        self.generation = generation
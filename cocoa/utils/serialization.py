@@ -0,0 +1,42 @@
+from typing import Any
+
+import pydantic_core
+
+from cocoa.utils.projection import nest
+
+
+def dumps(value: Any, depth: int = 0, include: dict | None = None, exclude: dict | None = None) -> str:
+    """Serialize a tool response to JSON with pydantic-core's Rust encoder.
+
+    CLDK models are encoded straight to bytes through their compiled serializer, wherever they are nested in the
+    response, so no intermediate dict tree is built as with `json.dumps(model.model_dump())`.
+
+    Args:
+        value (Any): The response: plain JSON data, models, or lists, tuples and dicts of models.
+        depth (int, optional): Number of container levels between the response and the models `include` and `exclude`
+            apply to. Defaults to 0, the response is a model.
+        include (dict | None, optional): Fields of each model to serialize, as returned by `field_spec`.
+        exclude (dict | None, optional): Fields of each model to leave out, as returned by `field_spec`.
+
+    Returns:
+        str: The JSON document.
+    """
+    return pydantic_core.to_json(value, include=nest(include, depth), exclude=nest(exclude, depth)).decode()
+
+
+def dumps_page(items: Any, next_cursor: str | None, depth: int = 0, include: dict | None = None, exclude: dict | None = None) -> str:
+    """Serialize one page of a paginated tool response as {"items": ..., "next_cursor": ...}.
+
+    Args:
+        items (Any): The items of the page.
+        next_cursor (str | None): Cursor of the next page, None on the last page.
+        depth (int, optional): Number of container levels between `items` and the models. Defaults to 0.
+        include (dict | None, optional): Fields of each model to serialize, as returned by `field_spec`.
+        exclude (dict | None, optional): Fields of each model to leave out, as returned by `field_spec`.
+
+    Returns:
+        str: The JSON document.
+    """
+    include = None if include is None else {"items": nest(include, depth), "next_cursor": True}
+    exclude = None if exclude is None else {"items": nest(exclude, depth)}
+    return pydantic_core.to_json({"items": items, "next_cursor": next_cursor}, include=include, exclude=exclude).decode()
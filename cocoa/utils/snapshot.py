@@ -0,0 +1,117 @@
+import os
+import json
+import mmap
+import zlib
+import struct
+from pathlib import Path
+
+
+class Snapshot:
+    """Read-only, memory-mapped file of named sections.
+
+    The file starts with a magic string, the format version and the length of a JSON table of contents, followed by the
+    table ({name: [offset, length, codec]}, offsets counted from its end) and the sections. Each section is stored as is
+    or compressed on its own, so reading one only touches its pages. Every process mapping the file shares them through
+    the page cache, so a section is stored once whatever the number of processes reading it.
+    """
+
+    MAGIC = b"COCOASNP"
+    VERSION = 1
+    # Magic string, format version, length of the table of contents.
+    HEADER = struct.Struct("<8sIQ")
+
+    def __init__(self, path: Path):
+        """Map a snapshot.
+
+        Args:
+            path (Path): A file written by `write`.
+
+        Raises:
+            ValueError: If the file is not a snapshot, or was written in another version of the format.
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, toc_size = self.HEADER.unpack_from(self._map) if len(self._map) >= self.HEADER.size else (None, None, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self._map.close()
+            raise ValueError(f"{self.path} is not a version {self.VERSION} cocoa snapshot.")
+        self._toc: dict[str, list] = json.loads(self._map[self.HEADER.size : self.HEADER.size + toc_size])
+        self._start = self.HEADER.size + toc_size
+
+    @classmethod
+    def write(cls, path: Path, sections: dict[str, str | bytes], compression: int | None = None) -> None:
+        """Write sections into a snapshot, replacing the file atomically.
+
+        Args:
+            path (Path): The snapshot file.
+            sections (dict[str, str | bytes]): The sections by name; strings are encoded in UTF-8.
+            compression (int | None, optional): zlib level each section is compressed with, None to store them as they are. Defaults to None.
+        """
+        toc, encoded, offset = {}, [], 0
+        for name, data in sections.items():
+            data = data.encode() if isinstance(data, str) else data
+            codec = "raw"
+            if compression is not None:
+                data, codec = zlib.compress(data, compression), "zlib"
+            toc[name] = [offset, len(data), codec]
+            offset += len(data)
+            encoded.append(data)
+        toc_bytes = json.dumps(toc).encode()
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(toc_bytes)))
+            f.write(toc_bytes)
+            for data in encoded:
+                f.write(data)
+        os.replace(tmp_path, path)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._toc
+
+    def __len__(self) -> int:
+        return len(self._toc)
+
+    def names(self) -> list[str]:
+        """List the sections, in the order they were written."""
+        return list(self._toc)
+
+    def read(self, name: str) -> bytes | None:
+        """Read a section.
+
+        Args:
+            name (str): The name of the section.
+
+        Returns:
+            bytes | None: The section, decompressed, None if the snapshot does not hold it.
+        """
+        entry = self._toc.get(name)
+        if entry is None:
+            return None
+        offset, length, codec = entry
+        with memoryview(self._map) as view:
+            data = view[self._start + offset : self._start + offset + length]
+            return zlib.decompress(data) if codec == "zlib" else bytes(data)
+
+    def get(self, name: str) -> str | None:
+        """Read a text section.
+
+        Args:
+            name (str): The name of the section.
+
+        Returns:
+            str | None: The section, None if the snapshot does not hold it.
+        """
+        entry = self._toc.get(name)
+        if entry is None:
+            return None
+        offset, length, codec = entry
+        if codec != "raw":
+            return self.read(name).decode()
+        # Decoded straight from the mapped pages, without copying them into a bytes object first.
+        with memoryview(self._map) as view:
+            return str(view[self._start + offset : self._start + offset + length], "utf-8")
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._map.close()
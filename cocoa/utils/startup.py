@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+
+
+class StartupProfile:
+    """
+    Time the phases of the server startup, from the start of the process, and report each one on stderr as it ends.
+
+    stdout is the MCP channel of the stdio transport, so nothing is ever written to it.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter() - process_age()
+        self.last = self.started_at
+        self.phases: list[tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        """End a phase, which started when the previous one ended.
+
+        Args:
+            phase (str): What was done during the phase.
+        """
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        print(f"[startup] {(now - self.last) * 1000:8.1f} ms  {(now - self.started_at) * 1000:8.1f} ms total  {phase}", file=sys.stderr, flush=True)
+        self.last = now
+
+
+def process_age() -> float:
+    """Get the number of seconds since the process started, or 0 where it is not known (only Linux exposes it cheaply)."""
+    try:
+        with open(f"/proc/{os.getpid()}/stat") as stat, open("/proc/uptime") as uptime:
+            # The start time is the 22nd field, after the command name, which is in parentheses and may contain spaces.
+            start_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+            return max(float(uptime.read().split()[0]) - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError):
+        return 0.0
@@ -0,0 +1,87 @@
+import pydantic_core
+from cldk.analysis.java import JavaAnalysis
+
+from cocoa.utils.projection import nest
+
+# Number of call graph or system dependency graph edges per chunk.
+EDGE_BATCH_SIZE = 1000
+
+# Marks a chunk the field projection leaves out entirely.
+_SKIP = object()
+
+
+class ApplicationChunks:
+    """The JApplication view, split into NDJSON chunks.
+
+    There is one chunk per compilation unit, in file path order, then one chunk per batch of `EDGE_BATCH_SIZE` edges
+    of the call graph and of the system dependency graph. Each chunk is serialized on its own when it is requested, so
+    the memory needed to deliver the view is bounded by its largest chunk rather than by the size of the project.
+    """
+
+    SECTIONS = ("symbol_table", "call_graph", "system_dependency_graph")
+
+    def __init__(self, analysis: JavaAnalysis):
+        """Plan the chunks of the application view.
+
+        Args:
+            analysis (JavaAnalysis): The analysis to deliver.
+        """
+        self.application = analysis.get_application_view()
+        self.plan: list[tuple[str, str | int]] = [("symbol_table", file_path) for file_path in sorted(self.application.symbol_table)]
+        for section in self.SECTIONS[1:]:
+            edges = getattr(self.application, section) or []
+            self.plan.extend((section, start) for start in range(0, len(edges), EDGE_BATCH_SIZE))
+
+    def __len__(self) -> int:
+        return len(self.plan)
+
+    def chunk(self, index: int, include: dict | None = None, exclude: dict | None = None) -> str | None:
+        """Serialize one chunk as an NDJSON line.
+
+        The line is {"chunk": index, "section": ..., "key": ..., "items": ...}, where `items` is the JCompilationUnit
+        at file path `key` for the symbol table, or the list of JGraphEdges starting at position `key` for the graphs.
+
+        Args:
+            index (int): Position of the chunk in the plan.
+            include (dict | None, optional): Fields of the JApplication to serialize, as returned by `field_spec`.
+            exclude (dict | None, optional): Fields of the JApplication to leave out, as returned by `field_spec`.
+
+        Raises:
+            IndexError: If there is no such chunk.
+
+        Returns:
+            str | None: The line, with its trailing newline, or None if the projection leaves out the whole chunk.
+        """
+        if not 0 <= index < len(self.plan):
+            raise IndexError(f"The application view has {len(self.plan)} chunks, there is no chunk {index}.")
+        section, key = self.plan[index]
+        items_include, items_exclude = _item_spec(include, section, key, True), _item_spec(exclude, section, key, False)
+        if items_include is _SKIP or items_exclude is _SKIP:
+            return None
+        if section == "symbol_table":
+            items = self.application.symbol_table[key]
+            depth = 0
+        else:
+            items = getattr(self.application, section)[key : key + EDGE_BATCH_SIZE]
+            depth = 1
+        line = {"chunk": index, "section": section, "key": key, "items": items}
+        include = None if items_include is None else {"chunk": True, "section": True, "key": True, "items": nest(items_include, depth)}
+        exclude = None if items_exclude is None else {"items": nest(items_exclude, depth)}
+        return pydantic_core.to_json(line, include=include, exclude=exclude).decode() + "\n"
+
+
+def _item_spec(spec: dict | None, section: str, key: str | int, including: bool):
+    # Narrow a JApplication field specification down to one compilation unit, or to every edge of a graph.
+    if spec is None:
+        return None
+    section_spec = spec.get(section)
+    if section_spec is None:
+        return _SKIP if including else None
+    if section_spec is True:
+        return None if including else _SKIP
+    item_spec = section_spec.get(key, section_spec.get("__all__")) if section == "symbol_table" else section_spec.get("__all__")
+    if item_spec is None:
+        return _SKIP if including else None
+    if item_spec is True:
+        return None if including else _SKIP
+    return item_spec
@@ -0,0 +1,48 @@
+import os
+from pathlib import Path
+
+
+class SourceWatcher:
+    """Poll a project directory for created, modified and deleted source files.
+
+    Polling keeps the watcher dependency free and works the same on every platform and file system (including network
+    mounts, where native file system events are unreliable). Each poll only stats the files, so it is cheap compared to
+    the analysis it triggers.
+    """
+
+    def __init__(self, project_path: Path, suffixes: tuple[str, ...] = (".java",)):
+        """Create the watcher and take the initial snapshot of the sources.
+
+        Args:
+            project_path (Path): Root of the project to watch.
+            suffixes (tuple[str, ...], optional): Suffixes of the files to watch. Defaults to (".java",).
+        """
+        self.project_path = Path(project_path).resolve()
+        self.suffixes = suffixes
+        self._snapshot = self._scan()
+
+    def poll(self) -> tuple[list[Path], list[Path]]:
+        """Compare the sources against the previous snapshot.
+
+        Returns:
+            tuple[list[Path], list[Path]]: The files created or modified, and the files deleted, since the last poll.
+        """
+        snapshot = self._scan()
+        changed = sorted(path for path, stamp in snapshot.items() if self._snapshot.get(path) != stamp)
+        removed = sorted(path for path in self._snapshot.keys() - snapshot.keys())
+        self._snapshot = snapshot
+        return changed, removed
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        for root, dirs, files in os.walk(self.project_path):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                if name.endswith(self.suffixes):
+                    path = Path(root) / name
+                    try:
+                        stat = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
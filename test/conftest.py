@@ -4,6 +4,37 @@ import sys
 from mcp import StdioServerParameters
 import pytest
 
+from cocoa.analysis import CLDKAnalysis
+from cocoa.utils.cache import AnalysisCache
+
+
+def pytest_addoption(parser):
+    """Options of the benchmark suite (see test_benchmarks.py)."""
+    group = parser.getgroup("benchmark", "cocoa benchmarks")
+    group.addoption("--benchmark", action="store_true", help="Run the benchmarks, which are skipped otherwise.")
+    group.addoption(
+        "--benchmark-baseline",
+        type=Path,
+        default=Path(__file__).parent.parent / ".benchmarks" / "daytrader8.json",
+        help="JSON baseline the benchmark results are compared to (default: .benchmarks/daytrader8.json). Saved from the run if it does not exist.",
+    )
+    group.addoption("--benchmark-save", action="store_true", help="Save the benchmark results as the new baseline instead of comparing them to it.")
+    group.addoption("--benchmark-threshold", type=float, default=0.25, help="Relative slowdown or growth over the baseline that fails a benchmark (default: 0.25).")
+    group.addoption("--benchmark-rounds", type=int, default=5, help="Number of times each tool is called (default: 5).")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: benchmark of the server, only run with --benchmark")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
 
 @pytest.fixture(scope="session")
 def project_path():
@@ -11,11 +42,31 @@ def project_path():
     return Path(__file__).parent / "resources" / "daytrader8"
 
 
+@pytest.fixture(scope="session")
+def cache_dir(tmp_path_factory):
+    """Fixture to provide an analysis cache directory shared by all the servers started in a test session."""
+    return tmp_path_factory.mktemp("cocoa-cache")
+
+
 @pytest.fixture
-def coco_server_params(project_path):
+def coco_server_params(project_path, cache_dir):
     """Create server parameters using Python module execution."""
     return StdioServerParameters(
         command=sys.executable,  # Use current Python interpreter
-        args=["-m", "cocoa.cli", "toolbox", "--project-path", str(project_path)],
+        args=["-m", "cocoa.cli", "toolbox", "--project-path", str(project_path), "--cache-dir", str(cache_dir)],
         env=None,
     )
+
+
+@pytest.fixture(scope="session")
+def project(project_path, cache_dir):
+    """Fixture to provide the project, analyzed through the shared analysis cache."""
+    project = CLDKAnalysis(project_path=project_path, cache=AnalysisCache(cache_dir, max_size=2048 * 1024 * 1024))
+    project.load()
+    return project
+
+
+@pytest.fixture(scope="session")
+def analysis(project):
+    """Fixture to provide the analysis of the project."""
+    return project.analysis_instance
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from cocoa.analysis import CLDKAnalysis
+from cocoa.tools.tools import _method_keys, _methods_page
+
+
+class TestCLDKAnalysis:
+    """Test the values derived from an analysis."""
+
+    def test_derived_values_build_independently(self, tmp_path):
+        """Should serve other derived values while one is being built, and build each once per generation."""
+        project = CLDKAnalysis(project_path=tmp_path)
+        project.analysis_instance = object()
+        started, released, builds = threading.Event(), threading.Event(), []
+
+        def slow_index(analysis):
+            builds.append(analysis)
+            started.set()
+            assert released.wait(10)
+            return "slow"
+
+        slow = []
+        builder = threading.Thread(target=lambda: slow.append(project.derived(slow_index)))
+        builder.start()
+        try:
+            assert started.wait(10)
+            assert project.derived(lambda analysis: "fast") == "fast"
+        finally:
+            released.set()
+            builder.join()
+        assert slow == ["slow"] and project.derived(slow_index) == "slow"
+        assert len(builds) == 1
+        project.generation += 1
+        assert project.derived(slow_index) == "slow" and len(builds) == 2
+
+    def test_derived_from_a_replaced_analysis(self, tmp_path):
+        """Should derive values from the analysis instance asked for, and only cache those of the current one."""
+        project = CLDKAnalysis(project_path=tmp_path)
+        before, after = {"A": 1}, {"B": 2}
+        project.analysis_instance = before
+        assert project.derived(sorted, before) == ["A"]
+        project.analysis_instance = after
+        project.generation += 1
+        assert project.derived(sorted, before) == ["A"]
+        assert project.derived(sorted) == ["B"] and project.derived(sorted, after) == ["B"]
+
+    def test_page_of_a_replaced_analysis(self, tmp_path):
+        """Should build a page from the analysis its keys were listed from, even once it is replaced."""
+        project = CLDKAnalysis(project_path=tmp_path)
+        method = SimpleNamespace(signature="m()")
+        before = SimpleNamespace(get_classes=lambda: {"app.A": SimpleNamespace(callable_declarations={"m()": method})})
+        project.analysis_instance = before
+        keys = project.derived(_method_keys, before)
+        project.analysis_instance = SimpleNamespace(get_classes=lambda: {})
+        project.generation += 1
+        assert _methods_page(project, before, keys) == {"app.A": {"m()": method}}
+
+    def test_done_callback(self, tmp_path, monkeypatch):
+        """Should call back once the analysis started in the background fails."""
+
+        def load(self):
+            self.phase = "failed"
+            raise RuntimeError("no sources")
+
+        monkeypatch.setattr(CLDKAnalysis, "load", load)
+        project = CLDKAnalysis(project_path=tmp_path)
+        done = []
+
+        async def run():
+            project.add_done_callback(done.append)
+            with pytest.raises(RuntimeError):
+                await project.wait_until_ready()
+            # Done callbacks run on the next iteration of the event loop.
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+        assert done == [project] and project.status()["error"] == "no sources"
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from cocoa.utils.cache import AnalysisCache
+
+
+def _make_project(root: Path) -> Path:
+    source = root / "project" / "src" / "main" / "java" / "Hello.java"
+    source.parent.mkdir(parents=True)
+    source.write_text("class Hello {}")
+    return root / "project"
+
+
+def _write_analysis(path: Path, size: int = 16) -> str:
+    (path / AnalysisCache.ANALYSIS_FILE).write_text("x" * size)
+    return str(path)
+
+
+class TestAnalysisCache:
+    """Test the persistent analysis cache."""
+
+    def test_key_tracks_sources_and_settings(self, tmp_path):
+        """Should change the key when a source file or an analysis setting changes."""
+        project = _make_project(tmp_path)
+        cache = AnalysisCache(tmp_path / "cache", max_size=1 << 20)
+        key = cache.key(project, analysis_level="symbol table")
+        assert key == cache.key(project, analysis_level="symbol table")
+        assert key != cache.key(project, analysis_level="call graph")
+        (project / "README.md").write_text("not a source file")
+        assert key == cache.key(project, analysis_level="symbol table")
+        (project / "src" / "main" / "java" / "Hello.java").write_text("class Hello { int x; }")
+        assert key != cache.key(project, analysis_level="symbol table")
+
+    def test_load_reuses_complete_entries(self, tmp_path):
+        """Should run the analysis once and read it back from the cache afterwards."""
+        project = _make_project(tmp_path)
+        cache = AnalysisCache(tmp_path / "cache", max_size=1 << 20)
+        key = cache.key(project)
+        runs = []
+
+        def build(path: Path) -> str:
+            if not (path / AnalysisCache.ANALYSIS_FILE).exists():
+                runs.append(path)
+                _write_analysis(path)
+            return str(path)
+
+        assert cache.load(key, build) == cache.load(key, build)
+        assert len(runs) == 1
+
+    def test_failed_analysis_is_not_cached(self, tmp_path):
+        """Should discard the entry of an analysis that raised."""
+        project = _make_project(tmp_path)
+        cache = AnalysisCache(tmp_path / "cache", max_size=1 << 20)
+        key = cache.key(project)
+
+        def build(path: Path) -> str:
+            _write_analysis(path)
+            raise RuntimeError("codeanalyzer failed")
+
+        try:
+            cache.load(key, build)
+        except RuntimeError:
+            pass
+        assert not (cache.cache_dir / key).exists()
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Should evict the least recently used entries once the cache exceeds its size cap."""
+        cache = AnalysisCache(tmp_path / "cache", max_size=100)
+        cache.load("first", lambda path: _write_analysis(path, size=60))
+        cache.load("second", lambda path: _write_analysis(path, size=60))
+        assert not (cache.cache_dir / "first").exists()
+        assert (cache.cache_dir / "second").exists()
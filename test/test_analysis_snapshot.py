@@ -0,0 +1,73 @@
+import pytest
+
+from cocoa.analysis import CLDKAnalysis
+from cocoa.analysis_snapshot import AnalysisSnapshot
+from cocoa.indexes import CallIndex, ClassFilter, ClassIndex, CommentIndex, CrudIndex, SearchIndex
+from cocoa.registry import ProjectRegistry
+from cocoa.utils.serialization import dumps
+from cocoa.utils.snapshot import Snapshot
+
+CLASS = "com.ibm.websphere.samples.daytrader.util.Log"
+
+
+@pytest.fixture(scope="module")
+def snapshot_path(project, tmp_path_factory):
+    """A snapshot of the analysis of the project."""
+    snapshot_path = tmp_path_factory.mktemp("snapshot") / "daytrader8.cocoa"
+    AnalysisSnapshot.write(snapshot_path, project)
+    return snapshot_path
+
+
+class TestAnalysisSnapshot:
+    """Test the analysis snapshots written by cocoa index."""
+
+    def test_lazy_lookups(self, project, snapshot_path):
+        """Should answer a class lookup from the one compilation unit declaring the class."""
+        restored = CLDKAnalysis(project_path=project.project_path, snapshot_path=snapshot_path)
+        analysis = restored.load()
+        assert analysis.get_class(CLASS) == project.analysis_instance.get_class(CLASS)
+        assert analysis.get_java_file(CLASS) == project.analysis_instance.get_java_file(CLASS)
+        assert list(analysis.backend.application.symbol_table) == [analysis.get_java_file(CLASS)]
+        assert analysis.get_class("no.such.Class") is None
+        # Listed in the manifest, but without a compilation unit.
+        analysis.backend._snapshot.manifest["classes"]["no.such.Unit"] = "Missing.java"
+        assert analysis.get_class("no.such.Unit") is None
+
+    def test_derived_indexes(self, project, snapshot_path):
+        """Should read back the class, comment and CRUD indexes, and only the compilation units their answers come from."""
+        restored = CLDKAnalysis(project_path=project.project_path, snapshot_path=snapshot_path)
+        analysis = restored.load()
+        criteria = ClassFilter(inclusions=["daytrader.util"])
+        classes, restored_classes = project.derived(ClassIndex), restored.derived(ClassIndex)
+        assert restored_classes.select(criteria) == classes.select(criteria)
+        assert [restored_classes.types[class_id] for class_id in restored_classes.select(criteria)] == [classes.types[class_id] for class_id in classes.select(criteria)]
+        comments, restored_comments = project.derived(CommentIndex), restored.derived(CommentIndex)
+        assert restored_comments.query(javadoc_only=True, limit=1000) == comments.query(javadoc_only=True, limit=1000)
+        assert restored_comments.in_class(CLASS) == comments.in_class(CLASS) and restored_comments.method_comments == comments.method_comments
+        crud, restored_crud = project.derived(CrudIndex), restored.derived(CrudIndex)
+        assert restored_crud.query(kind="query", limit=1000) == crud.query(kind="query", limit=1000)
+        assert dumps(restored_crud.by_method()) == dumps(crud.by_method())
+        assert len(analysis.backend.application.symbol_table) < len(project.analysis_instance.get_symbol_table())
+
+    def test_whole_project(self, project, snapshot_path):
+        """Should read back the indexes built with the analysis, and the whole symbol table in its order."""
+        restored = CLDKAnalysis(project_path=project.project_path, snapshot_path=snapshot_path)
+        analysis = restored.load()
+        calls = project.derived(CallIndex)
+        method = next(key for key in calls.methods if calls.get_callers(*key))
+        assert restored.derived(CallIndex).get_callers(*method) == calls.get_callers(*method)
+        assert restored.derived(SearchIndex).search("executeQuery") == project.derived(SearchIndex).search("executeQuery")
+        assert list(analysis.get_symbol_table().items()) == list(project.analysis_instance.get_symbol_table().items())
+
+    def test_registry(self, project, snapshot_path):
+        """Should serve a snapshot under the name of the project it was indexed from."""
+        registry = ProjectRegistry(snapshots=[snapshot_path])
+        assert registry.resolve(None) == (project.project_path.name, project.project_path.absolute())
+        assert registry.load().analysis_instance.get_class(CLASS) is not None
+        registry.close()
+
+    def test_rejects_other_snapshots(self, tmp_path):
+        """Should refuse snapshots without an analysis manifest."""
+        Snapshot.write(tmp_path / "other.cocoa", {"a_tool": "{}"})
+        with pytest.raises(ValueError):
+            AnalysisSnapshot(tmp_path / "other.cocoa")
@@ -1,7 +1,23 @@
+import json
+import asyncio
 from pathlib import Path
+import httpx
 import pytest
 from mcp import ClientSession
 from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+from pydantic import AnyUrl
+
+
+async def wait_until_ready(session: ClientSession, attempts: int = 300, **arguments) -> dict:
+    """Poll the readiness tool until the analysis is ready."""
+    for _ in range(attempts):
+        result = await session.call_tool("are_we_ready_tool", arguments=arguments)
+        status = json.loads(result.content[0].text)
+        if status["ready"] or status["error"] is not None:
+            return status
+        await asyncio.sleep(1)
+    return status
 
 
 class TestBasicCocoMCPServer:
@@ -15,4 +31,270 @@ class TestBasicCocoMCPServer:
                 # Initialize the connection
                 await session.initialize()
                 result = await session.list_tools()
-                assert len(result.tools) == 53, f"Expected 53 tools, got {len(result.tools)}"
+                assert len(result.tools) == 66, f"Expected 66 tools, got {len(result.tools)}"
+
+    @pytest.mark.asyncio
+    async def test_are_we_ready_tool(self, coco_server_params, project_path):
+        """Should answer right away while the analysis runs, then report it ready."""
+        async with stdio_client(coco_server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                status = await wait_until_ready(session)
+                assert status["error"] is None
+                assert status["ready"] and status["progress"] == 100
+
+                result = await session.call_tool("get_java_file_tool", arguments={"qualified_class_name": "com.ibm.websphere.samples.daytrader.util.Log"})
+                assert result.content[0].text.endswith("Log.java")
+
+    @pytest.mark.asyncio
+    async def test_paginated_classes(self, coco_server_params, project_path):
+        """Should page through every class exactly once."""
+        async with stdio_client(coco_server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await wait_until_ready(session)
+                everything = json.loads((await session.call_tool("get_classes_tool", arguments={})).content[0].text)
+
+                classes, cursor = [], None
+                while True:
+                    arguments = {"limit": 50} if cursor is None else {"limit": 50, "cursor": cursor}
+                    page = json.loads((await session.call_tool("get_classes_tool", arguments=arguments)).content[0].text)
+                    assert len(page["items"]) <= 50
+                    classes.extend(page["items"])
+                    cursor = page["next_cursor"]
+                    if cursor is None:
+                        break
+                assert classes == sorted(everything)
+
+    @pytest.mark.asyncio
+    async def test_projected_class(self, coco_server_params, project_path):
+        """Should only serialize the requested fields of a class."""
+        async with stdio_client(coco_server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await wait_until_ready(session)
+                arguments = {"qualified_class_name": "com.ibm.websphere.samples.daytrader.util.Log", "include": ["callable_declarations.*.signature"]}
+                typ = json.loads((await session.call_tool("get_class_tool", arguments=arguments)).content[0].text)
+                assert list(typ) == ["callable_declarations"]
+                assert all(list(method) == ["signature"] for method in typ["callable_declarations"].values())
+
+    @pytest.mark.asyncio
+    async def test_response_cache(self, coco_server_params, project_path):
+        """Should serve a repeated tool call from the response cache."""
+        async with stdio_client(coco_server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await wait_until_ready(session)
+                arguments = {"qualified_class_name": "com.ibm.websphere.samples.daytrader.util.Log"}
+                first = await session.call_tool("get_methods_in_class_tool", arguments=arguments)
+                second = await session.call_tool("get_methods_in_class_tool", arguments=arguments)
+                assert first.content[0].text == second.content[0].text
+                stats = json.loads((await session.call_tool("get_response_cache_stats_tool", arguments={})).content[0].text)
+                assert stats["enabled"] and stats["hits"] >= 1
+                metrics = json.loads((await session.call_tool("get_server_metrics_tool", arguments={})).content[0].text)
+                methods = metrics["tools"]["get_methods_in_class_tool"]
+                assert methods["calls"] == 2 and methods["cache_hits"] == 1 and methods["errors"] == 0
+                assert methods["response_bytes"]["total"] == 2 * len(first.content[0].text)
+
+    @pytest.mark.asyncio
+    async def test_transitive_call_graph(self, coco_server_params, project_path):
+        """Should walk the call graph across several hops in a single call."""
+        async with stdio_client(coco_server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await wait_until_ready(session)
+                log = {"target_class_name": "com.ibm.websphere.samples.daytrader.util.Log", "target_method_declaration": "error(Throwable, String)"}
+                callers = json.loads((await session.call_tool("get_transitive_callers_tool", arguments={**log, "max_depth": 2})).content[0].text)
+                assert callers["methods"] and {method["depth"] for method in callers["methods"]} <= {1, 2}
+
+                caller = next(method for method in callers["methods"] if method["depth"] == 2)
+                arguments = {"source_class_name": caller["qualified_class_name"], "source_method_declaration": caller["method_signature"], **log}
+                path = json.loads((await session.call_tool("get_call_path_tool", arguments=arguments)).content[0].text)["path"]
+                assert len(path) == 3
+                assert path[-1] == {"qualified_class_name": log["target_class_name"], "method_signature": log["target_method_declaration"]}
+
+    @pytest.mark.asyncio
+    async def test_stream_application_view(self, coco_server_params, project_path):
+        """Should stream the application view as NDJSON chunks, and serve each chunk as a resource."""
+        async with stdio_client(coco_server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await wait_until_ready(session)
+                lines = []
+
+                async def on_progress(progress, total, message):
+                    lines.append(message)
+
+                arguments = {"include": ["symbol_table.*.package_name"]}
+                result = await session.call_tool("stream_application_view_tool", arguments=arguments, progress_callback=on_progress)
+                manifest = json.loads(result.content[0].text)
+                assert manifest["streamed"]
+                chunks = [json.loads(line) for line in lines]
+                symbol_table = json.loads((await session.call_tool("get_symbol_table_tool", arguments={"include": ["package_name"]})).content[0].text)
+                assert {chunk["key"]: chunk["items"] for chunk in chunks} == symbol_table
+
+                uri = manifest["resource_template"].format(index=0)
+                chunk = json.loads((await session.read_resource(AnyUrl(uri))).contents[0].text)
+                assert chunk["section"] == "symbol_table" and chunk["key"] == chunks[0]["key"]
+
+    @pytest.mark.asyncio
+    async def test_batch_lookup(self, coco_server_params, project_path):
+        """Should run several lookups in one call, reporting failed ones without failing the batch."""
+        async with stdio_client(coco_server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await wait_until_ready(session)
+                log = "com.ibm.websphere.samples.daytrader.util.Log"
+                lookups = [
+                    {"tool": "get_java_file_tool", "arguments": {"qualified_class_name": log}},
+                    {"tool": "get_method_tool", "arguments": {"qualified_class_name": log, "qualified_method_name": "error(String)", "include": ["signature"]}},
+                    {"tool": "get_callers_tool", "arguments": {"target_class_name": log}},
+                    {"tool": "no_such_tool"},
+                ]
+                batch = json.loads((await session.call_tool("batch_lookup_tool", arguments={"lookups": lookups})).content[0].text)
+                results = batch["results"]
+                assert results[0]["result"].endswith("Log.java") and results[0]["error"] is None
+                assert results[1]["result"] == {"signature": "error(String)"}
+                assert results[2]["result"] is None and "target_method_declaration" in results[2]["error"]
+                assert results[3]["error"] is not None
+
+                # The project of the batch only goes to the tools that take one.
+                lookups = [{"tool": "JType_explainer"}, {"tool": "get_java_file_tool", "arguments": {"qualified_class_name": log}}]
+                batch = json.loads((await session.call_tool("batch_lookup_tool", arguments={"lookups": lookups, "project": "daytrader8"})).content[0].text)
+                assert [result["error"] for result in batch["results"]] == [None, None]
+                assert batch["results"][1]["result"].endswith("Log.java")
+
+    @pytest.mark.asyncio
+    async def test_search_code(self, coco_server_params, project_path):
+        """Should page through the ranked matches of a query."""
+        async with stdio_client(coco_server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await wait_until_ready(session)
+                arguments = {"query": r"executeQuery\(", "regex": True, "kinds": ["method"], "limit": 5}
+                page = json.loads((await session.call_tool("search_code_tool", arguments=arguments)).content[0].text)
+                assert len(page["items"]) == 5 and page["next_cursor"] is not None
+                assert all("executeQuery(" in hit["snippets"][0]["text"] for hit in page["items"])
+                matches = [hit["matches"] for hit in page["items"]]
+                assert matches == sorted(matches, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_projects_root(self, coco_server_params, project_path):
+        """Should load the projects found under the projects root on first use."""
+        coco_server_params.args = ["-m", "cocoa.cli", "toolbox", "--projects-root", str(project_path.parent), *coco_server_params.args[-2:]]
+        async with stdio_client(coco_server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                projects = json.loads((await session.call_tool("list_projects_tool", arguments={})).content[0].text)
+                assert projects["default"] is None
+                assert [(project["name"], project["loaded"]) for project in projects["projects"]] == [("daytrader8", False)]
+
+                status = await wait_until_ready(session, project="daytrader8")
+                assert status["ready"]
+                arguments = {"qualified_class_name": "com.ibm.websphere.samples.daytrader.util.Log", "project": "daytrader8"}
+                result = await session.call_tool("get_java_file_tool", arguments=arguments)
+                assert result.content[0].text.endswith("Log.java")
+                result = await session.call_tool("get_java_file_tool", arguments={**arguments, "project": ".."})
+                assert result.isError
+
+    @pytest.mark.asyncio
+    async def test_snapshot(self, coco_server_params, project_path, tmp_path):
+        """Should serve a project from the snapshot and the query store written by cocoa index."""
+        snapshot_path = tmp_path / "daytrader8.cocoa"
+        command = [
+            coco_server_params.command,
+            "-m",
+            "cocoa.cli",
+            "index",
+            "--project-path",
+            str(project_path),
+            "--output",
+            str(snapshot_path),
+            "--query-store",
+            *coco_server_params.args[-2:],
+        ]
+        indexer = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.DEVNULL)
+        assert await indexer.wait() == 0
+        coco_server_params.args = ["-m", "cocoa.cli", "toolbox", "--snapshot", str(snapshot_path), "--no-cache"]
+        async with stdio_client(coco_server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                assert (await wait_until_ready(session))["ready"]
+                result = await session.call_tool("get_java_file_tool", arguments={"qualified_class_name": "com.ibm.websphere.samples.daytrader.util.Log"})
+                assert result.content[0].text.endswith("Log.java")
+                hits = json.loads((await session.call_tool("search_code_tool", arguments={"query": "executeQuery"})).content[0].text)
+                assert hits["items"]
+                # Answered by the query store written with the snapshot.
+                result = await session.call_tool("get_methods_in_class_tool", arguments={"qualified_class_name": "com.ibm.websphere.samples.daytrader.util.Log"})
+                assert "printObject(Object)" in json.loads(result.content[0].text)
+                criteria = {"extends": "javax.servlet.http.HttpServlet", "entrypoint": True, "mode": "count"}
+                result = await session.call_tool("get_classes_by_criteria_tool", arguments=criteria)
+                assert json.loads(result.content[0].text)["count"] > 0
+
+    @pytest.mark.asyncio
+    async def test_http_transport(self, coco_server_params, unused_tcp_port):
+        """Should serve concurrent HTTP sessions from a single analysis, and the Prometheus metrics."""
+        command = [coco_server_params.command, *coco_server_params.args, "--transport", "streamable-http", "--port", str(unused_tcp_port)]
+        server = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        url = f"http://127.0.0.1:{unused_tcp_port}"
+
+        async def lookup() -> tuple[dict, str]:
+            async with streamablehttp_client(f"{url}/mcp/") as (read, write, _):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    status = await wait_until_ready(session)
+                    result = await session.call_tool("get_java_file_tool", arguments={"qualified_class_name": "com.ibm.websphere.samples.daytrader.util.Log"})
+                    return status, result.content[0].text
+
+        try:
+            for _ in range(100):
+                try:
+                    async with httpx.AsyncClient() as client:
+                        await client.get(f"{url}/metrics")
+                    break
+                except httpx.ConnectError:
+                    await asyncio.sleep(0.2)
+            answers = await asyncio.gather(*[lookup() for _ in range(4)])
+            assert all(text.endswith("Log.java") for _, text in answers)
+            # The sessions share the analysis: it was loaded once.
+            assert len({status["elapsed_seconds"] for status, _ in answers}) == 1
+
+            async with httpx.AsyncClient() as client:
+                metrics = (await client.get(f"{url}/metrics")).text
+            assert 'cocoa_tool_calls_total{tool="get_java_file_tool"} 4' in metrics
+        finally:
+            server.terminate()
+            await server.wait()
+
+    @pytest.mark.asyncio
+    async def test_workers(self, coco_server_params, unused_tcp_port):
+        """Should serve sessions from several worker processes sharing the analysis loaded before they were forked."""
+        command = [coco_server_params.command, *coco_server_params.args, "--transport", "streamable-http", "--port", str(unused_tcp_port), "--workers", "2"]
+        server = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        url = f"http://127.0.0.1:{unused_tcp_port}"
+
+        async def lookup() -> tuple[dict, str, int]:
+            async with streamablehttp_client(f"{url}/mcp/") as (read, write, _):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    status = json.loads((await session.call_tool("are_we_ready_tool", arguments={})).content[0].text)
+                    result = await session.call_tool("get_java_file_tool", arguments={"qualified_class_name": "com.ibm.websphere.samples.daytrader.util.Log"})
+                    classes = json.loads((await session.call_tool("get_classes_tool", arguments={})).content[0].text)
+                    return status, result.content[0].text, len(classes)
+
+        try:
+            for _ in range(150):
+                try:
+                    async with httpx.AsyncClient() as client:
+                        await client.get(f"{url}/metrics")
+                    break
+                except httpx.ConnectError:
+                    await asyncio.sleep(0.2)
+            answers = await asyncio.gather(*[lookup() for _ in range(4)])
+            # The analysis is ready before the workers accept connections, and was loaded once.
+            assert all(status["ready"] for status, _, _ in answers)
+            assert len({status["elapsed_seconds"] for status, _, _ in answers}) == 1
+            assert all(text.endswith("Log.java") and classes > 0 for _, text, classes in answers)
+        finally:
+            server.terminate()
+            await server.wait()
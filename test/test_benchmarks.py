@@ -0,0 +1,181 @@
+import json
+import time
+import asyncio
+import statistics
+from pathlib import Path
+from typing import Any
+
+import pytest
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+LOG = "com.ibm.websphere.samples.daytrader.util.Log"
+TRADE_DIRECT = "com.ibm.websphere.samples.daytrader.impl.direct.TradeDirect"
+GET_QUOTE_DATA = "getQuoteData(Connection, String)"
+TRADE_DIRECT_FILE = "src/main/java/com/ibm/websphere/samples/daytrader/impl/direct/TradeDirect.java"
+
+# Arguments of the tools with required parameters; the other tools are called without arguments. `{project_path}` is
+# replaced by the path of the project.
+TOOL_ARGUMENTS: dict[str, dict[str, Any]] = {
+    "batch_lookup_tool": {"lookups": [{"tool": "get_method_tool", "arguments": {"qualified_class_name": TRADE_DIRECT, "qualified_method_name": GET_QUOTE_DATA}}] * 8},
+    "get_call_graph_tool": {"using_symbol_table": True},
+    "get_call_path_tool": {
+        "source_class_name": TRADE_DIRECT,
+        "source_method_declaration": GET_QUOTE_DATA,
+        "target_class_name": LOG,
+        "target_method_declaration": "error(Throwable, String)",
+    },
+    "get_callees_tool": {"source_class_name": TRADE_DIRECT, "source_method_declaration": GET_QUOTE_DATA},
+    "get_callers_tool": {"target_class_name": LOG, "target_method_declaration": "error(Throwable, String)"},
+    "get_class_call_graph_tool": {"qualified_class_name": TRADE_DIRECT, "using_symbol_table": True},
+    "get_class_tool": {"qualified_class_name": TRADE_DIRECT},
+    "get_comment_in_file_tool": {"file_path": "{project_path}/" + TRADE_DIRECT_FILE},
+    "get_comments_in_a_class_tool": {"qualified_class_name": TRADE_DIRECT},
+    "get_comments_in_a_method_tool": {"qualified_class_name": TRADE_DIRECT, "method_signature": GET_QUOTE_DATA},
+    "get_constructors_tool": {"qualified_class_name": TRADE_DIRECT},
+    "get_extended_classes_tool": {"qualified_class_name": TRADE_DIRECT},
+    "get_fields_tool": {"qualified_class_name": TRADE_DIRECT},
+    "get_implemented_interfaces_tool": {"qualified_class_name": TRADE_DIRECT},
+    "get_java_compilation_unit_tool": {"file_path": "{project_path}/" + TRADE_DIRECT_FILE},
+    "get_java_file_tool": {"qualified_class_name": TRADE_DIRECT},
+    "get_method_parameters_tool": {"qualified_class_name": TRADE_DIRECT, "qualified_method_name": GET_QUOTE_DATA},
+    "get_method_tool": {"qualified_class_name": TRADE_DIRECT, "qualified_method_name": GET_QUOTE_DATA},
+    "get_methods_in_class_tool": {"qualified_class_name": TRADE_DIRECT},
+    "get_nested_classes_tool": {"qualified_class_name": TRADE_DIRECT},
+    "get_reachable_methods_tool": {"methods": [[TRADE_DIRECT, GET_QUOTE_DATA]]},
+    "get_sub_classes_tool": {"qualified_class_name": TRADE_DIRECT},
+    "get_transitive_callees_tool": {"source_class_name": TRADE_DIRECT, "source_method_declaration": GET_QUOTE_DATA},
+    "get_transitive_callers_tool": {"target_class_name": LOG, "target_method_declaration": "error(Throwable, String)"},
+    "search_code_tool": {"query": "executeQuery"},
+}
+
+# Tools CLDK cannot answer on this project: the serialized call graph needs a call graph analysis level, the test methods
+# are looked for in a single source file, and removing the comments is not implemented. Their errors are measured like
+# any other response.
+EXPECTED_ERRORS = {"get_call_graph_json_tool", "get_test_methods_tool", "remove_all_comments_tool"}
+
+# Tool latencies and startup times closer than this many seconds to their baseline are noise, whatever the relative difference.
+LATENCY_FLOOR = 0.01
+STARTUP_FLOOR = 0.25
+
+
+def server_params(coco_server_params: StdioServerParameters, cache_dir: Path) -> StdioServerParameters:
+    """Use a cache of its own, and no response cache so that every call is measured, in the benchmarked server."""
+    args = list(coco_server_params.args)
+    args[args.index("--cache-dir") + 1] = str(cache_dir)
+    return coco_server_params.model_copy(update={"args": [*args, "--response-cache-size", "0"]})
+
+
+async def measure_startup(session: ClientSession, start: float) -> dict[str, float]:
+    """Time the initialization of the session, then the loading of the analysis, from the start of the server."""
+    await session.initialize()
+    initialized = time.perf_counter()
+    while True:
+        status = json.loads((await session.call_tool("are_we_ready_tool", arguments={})).content[0].text)
+        assert status["error"] is None, status["error"]
+        if status["ready"]:
+            return {"initialize_seconds": initialized - start, "ready_seconds": time.perf_counter() - start}
+        await asyncio.sleep(0.05)
+
+
+async def measure_tool(session: ClientSession, name: str, arguments: dict[str, Any], rounds: int) -> dict[str, Any]:
+    """Call a tool several times, keeping its latencies and the size of its (last) response."""
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = await session.call_tool(name, arguments=arguments)
+        latencies.append(time.perf_counter() - start)
+    text = "".join(getattr(content, "text", "") for content in result.content)
+    return {
+        "latency_seconds": {"min": min(latencies), "median": statistics.median(latencies)},
+        "response_bytes": len(text.encode()),
+        "error": text if result.isError else None,
+    }
+
+
+def regressions(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """List the measures of a run that exceed their baseline by more than `threshold` (relative).
+
+    Args:
+        results (dict[str, Any]): The measures of the run.
+        baseline (dict[str, Any]): The measures of the baseline run; tools missing from it are not compared.
+        threshold (float): Allowed relative increase, e.g. 0.25 for 25%.
+
+    Returns:
+        list[str]: One description per regression.
+    """
+    found = []
+
+    def check(name: str, value: float | None, base: float | None, floor: float = 0) -> None:
+        if value is not None and base is not None and value > base * (1 + threshold) and value - base > floor:
+            found.append(f"{name}: {value:g} against {base:g} in the baseline")
+
+    for phase in ("cold", "cached"):
+        for measure, value in results["startup"][phase].items():
+            check(f"{phase} startup {measure}", value, baseline.get("startup", {}).get(phase, {}).get(measure), STARTUP_FLOOR)
+    check("max_rss_bytes", results["max_rss_bytes"], baseline.get("max_rss_bytes"))
+    for name, tool in results["tools"].items():
+        base = baseline.get("tools", {}).get(name)
+        if base is not None:
+            check(f"{name} median latency", tool["latency_seconds"]["median"], base["latency_seconds"]["median"], LATENCY_FLOOR)
+            check(f"{name} response_bytes", tool["response_bytes"], base["response_bytes"])
+    return found
+
+
+class TestBenchmarks:
+    """Benchmark the server over stdio against a saved baseline."""
+
+    @pytest.mark.benchmark
+    @pytest.mark.asyncio
+    async def test_benchmark(self, coco_server_params, project_path, tmp_path, request):
+        """Should start, load the analysis and answer every tool no slower, and with no larger responses, than the baseline."""
+        options = request.config.option
+        params = server_params(coco_server_params, tmp_path / "cache")
+        results: dict[str, Any] = {"startup": {}, "tools": {}}
+
+        # The first server analyzes the project and fills the cache the second one loads the analysis from.
+        for phase in ("cold", "cached"):
+            start = time.perf_counter()
+            async with stdio_client(params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    results["startup"][phase] = await measure_startup(session, start)
+                    if phase == "cold":
+                        continue
+                    for tool in sorted((await session.list_tools()).tools, key=lambda tool: tool.name):
+                        arguments = json.loads(json.dumps(TOOL_ARGUMENTS.get(tool.name, {})).replace("{project_path}", str(project_path)))
+                        missing = set(tool.inputSchema.get("required", [])) - set(arguments)
+                        assert not missing, f"Add the {sorted(missing)} arguments of {tool.name} to TOOL_ARGUMENTS."
+                        results["tools"][tool.name] = await measure_tool(session, tool.name, arguments, options.benchmark_rounds)
+                    metrics = json.loads((await session.call_tool("get_server_metrics_tool", arguments={})).content[0].text)
+                    results["max_rss_bytes"] = metrics["max_rss_bytes"]
+
+        errors = {name: tool["error"] for name, tool in results["tools"].items() if tool["error"] is not None and name not in EXPECTED_ERRORS}
+        assert not errors, f"Tools failed: {errors}"
+
+        baseline_path: Path = options.benchmark_baseline
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.with_suffix(".last.json").write_text(json.dumps(results, indent=2, sort_keys=True))
+        if options.benchmark_save or not baseline_path.exists():
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True))
+            return
+        found = regressions(results, json.loads(baseline_path.read_text()), options.benchmark_threshold)
+        assert not found, f"Regressions over {baseline_path} (threshold {options.benchmark_threshold:.0%}):\n" + "\n".join(found)
+
+    def test_regressions(self):
+        """Should only report the measures exceeding their baseline by more than the threshold and the noise floor."""
+        baseline = {
+            "startup": {"cold": {"ready_seconds": 10.0}, "cached": {"ready_seconds": 1.0}},
+            "max_rss_bytes": 1000,
+            "tools": {"a_tool": {"latency_seconds": {"median": 0.001}, "response_bytes": 100}, "b_tool": {"latency_seconds": {"median": 0.5}, "response_bytes": 100}},
+        }
+        results = {
+            "startup": {"cold": {"ready_seconds": 11.0}, "cached": {"ready_seconds": 2.0}},
+            "max_rss_bytes": 1100,
+            "tools": {
+                "a_tool": {"latency_seconds": {"median": 0.005}, "response_bytes": 100},
+                "b_tool": {"latency_seconds": {"median": 1.0}, "response_bytes": 200},
+                "c_tool": {"latency_seconds": {"median": 9.0}, "response_bytes": 900},
+            },
+        }
+        found = regressions(results, baseline, threshold=0.25)
+        assert [regression.split(":")[0] for regression in found] == ["cached startup ready_seconds", "b_tool median latency", "b_tool response_bytes"]
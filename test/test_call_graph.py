@@ -0,0 +1,56 @@
+import networkx as nx
+
+from cocoa.indexes import CallGraph
+
+# A.a -> B.b -> C.c -> D.d, A.a -> C.c, E.e isolated
+A, B, C, D, E = ("A", "a()"), ("B", "b()"), ("C", "c()"), ("D", "d()"), ("E", "e()")
+GRAPH = CallGraph([A, B, C, D, E], [(A, C), (A, B), (B, C), (C, D)])
+
+
+def keys(reached):
+    return [(GRAPH.key(method_id), depth) for method_id, depth in reached]
+
+
+class TestCallGraph:
+    """Test the array-backed call graph and its bounded traversals."""
+
+    def test_adjacency(self):
+        """Should keep the edges of each method in the order they were given, in both directions."""
+        assert [GRAPH.key(i) for i in GRAPH.successors(GRAPH.id(A))] == [C, B]
+        assert [GRAPH.key(i) for i in GRAPH.predecessors(GRAPH.id(C))] == [A, B]
+        assert GRAPH.id(("Z", "z()")) is None
+        assert len(GRAPH) == 5 and GRAPH.edge_count == 4
+
+    def test_bfs_depths(self):
+        """Should report each reachable method once, at its smallest depth, within the depth bound."""
+        assert GRAPH.bfs([GRAPH.id(A)], 1, 10) == ([(GRAPH.id(B), 1), (GRAPH.id(C), 1)], False)
+        assert keys(GRAPH.bfs([GRAPH.id(A)], 5, 10)[0]) == [(B, 1), (C, 1), (D, 2)]
+        assert keys(GRAPH.bfs([GRAPH.id(D)], 5, 10, reverse=True)[0]) == [(C, 1), (A, 2), (B, 2)]
+        assert GRAPH.bfs([GRAPH.id(A), GRAPH.id(E)], 0, 10) == ([], False)
+
+    def test_bfs_truncates(self):
+        """Should stop at `max_results` methods and say so."""
+        reached, truncated = GRAPH.bfs([GRAPH.id(A)], 5, 2)
+        assert keys(reached) == [(B, 1), (C, 1)] and truncated
+
+    def test_shortest_path(self):
+        """Should find a shortest path within the depth bound, and None otherwise."""
+        path = GRAPH.shortest_path(GRAPH.id(A), GRAPH.id(D), 5)
+        assert [GRAPH.key(i) for i in path] == [A, C, D]
+        assert GRAPH.shortest_path(GRAPH.id(A), GRAPH.id(D), 1) is None
+        assert GRAPH.shortest_path(GRAPH.id(A), GRAPH.id(E), 5) is None
+        assert GRAPH.shortest_path(GRAPH.id(A), GRAPH.id(A), 0) == [GRAPH.id(A)]
+
+    def test_networkx_round_trip(self):
+        """Should export to and import from NetworkX graphs keyed like CLDK's, by (signature, class)."""
+        graph = GRAPH.to_networkx(lambda key: {"klass": key[0]})
+        assert graph.nodes[("a()", "A")] == {"klass": "A"}
+        assert set(graph.edges) == {(("a()", "A"), ("c()", "C")), (("a()", "A"), ("b()", "B")), (("b()", "B"), ("c()", "C")), (("c()", "C"), ("d()", "D"))}
+        assert nx.utils.graphs_equal(CallGraph.from_networkx(graph).to_networkx(), GRAPH.to_networkx())
+
+    def test_round_trip(self):
+        """Should read back the same methods and edges it wrote."""
+        graph = CallGraph.from_bytes(GRAPH.to_bytes())
+        assert [graph.key(i) for i in range(len(graph))] == [A, B, C, D, E]
+        assert [graph.key(i) for i in graph.successors(graph.id(A))] == [C, B]
+        assert [graph.key(i) for i in graph.predecessors(graph.id(C))] == [A, B]
@@ -0,0 +1,26 @@
+from cocoa.indexes import CallIndex
+from cocoa.utils.serialization import dumps
+
+LOG = "com.ibm.websphere.samples.daytrader.util.Log"
+
+
+class TestCallIndex:
+    """Test the caller/callee index of the symbol table call graph."""
+
+    def test_matches_cldk_callees(self, analysis):
+        """Should report the same callees as CLDK over the symbol table."""
+        index = CallIndex(analysis)
+        for signature in analysis.get_methods_in_class(LOG):
+            expected = analysis.get_callees(LOG, signature, True)
+            for detail in expected.get("callee_details", []):
+                detail["calling_lines"] = sorted(detail["calling_lines"])
+            assert dumps(index.get_callees(LOG, signature)) == dumps(expected)
+
+    def test_matches_cldk_callers(self, analysis):
+        """Should report the same callers as CLDK over the symbol table."""
+        index = CallIndex(analysis)
+        expected = analysis.get_callers(LOG, "error(Throwable, String)", True)
+        for detail in expected["caller_details"]:
+            detail["calling_lines"] = sorted(detail["calling_lines"])
+        assert dumps(index.get_callers(LOG, "error(Throwable, String)")) == dumps(expected)
+        assert index.get_callers(LOG, "no.such.method()") == {}
@@ -0,0 +1,74 @@
+from fnmatch import fnmatchcase
+
+from cocoa.indexes import ClassFilter, ClassIndex
+from cocoa.indexes.class_index import annotation_name, complexity, method_count, same_type
+
+FILTERS = [
+    ClassFilter(inclusions=["daytrader.util"]),
+    ClassFilter(inclusions=["Bean", "Log"], exclusions=["util"]),
+    ClassFilter(package="com.ibm.websphere.samples.daytrader.*.ejb3"),
+    ClassFilter(package="com.ibm.websphere.samples.daytrader.[!w]*", modifier="public"),
+    ClassFilter(annotation="@javax.enterprise.context.RequestScoped", modifier="public"),
+    ClassFilter(annotation="TransactionAttribute", entrypoint=False),
+    ClassFilter(annotation="javax.ejb.Stateless", exclusions=["Direct"]),
+    ClassFilter(entrypoint=True, min_methods=5, max_complexity=40),
+    ClassFilter(implements="com.ibm.websphere.samples.daytrader.interfaces.TradeServices"),
+    ClassFilter(extends="javax.servlet.http.HttpServlet", exclusions=["Ping"]),
+    ClassFilter(implements="Serializable", package="*.entities"),
+    ClassFilter(min_complexity=50),
+]
+
+
+def brute_force(analysis, criteria: ClassFilter) -> list[str]:
+    """Check every class against the filter, without the index."""
+    packages = {name: unit.package_name for unit in analysis.get_symbol_table().values() for name in unit.type_declarations}
+    imports = {name: unit.imports for unit in analysis.get_symbol_table().values() for name in unit.type_declarations}
+    return [
+        name
+        for name, typ in analysis.get_classes().items()
+        if (criteria.inclusions is None or any(inclusion in name for inclusion in criteria.inclusions))
+        and not any(exclusion in name for exclusion in criteria.exclusions or ())
+        and (criteria.package is None or fnmatchcase(packages[name], criteria.package))
+        and (criteria.annotation is None or any(same_type(annotation_name(criteria.annotation), annotation_name(annotation, imports[name])) for annotation in typ.annotations))
+        and (criteria.modifier is None or criteria.modifier in typ.modifiers)
+        and (criteria.implements is None or any(same_type(criteria.implements, super_type) for super_type in typ.implements_list))
+        and (criteria.extends is None or any(same_type(criteria.extends, super_type) for super_type in typ.extends_list))
+        and (criteria.entrypoint is None or typ.is_entrypoint_class == criteria.entrypoint)
+        and (criteria.min_methods is None or method_count(typ) >= criteria.min_methods)
+        and (criteria.max_methods is None or method_count(typ) <= criteria.max_methods)
+        and (criteria.min_complexity is None or complexity(typ) >= criteria.min_complexity)
+        and (criteria.max_complexity is None or complexity(typ) <= criteria.max_complexity)
+    ]
+
+
+class TestClassIndex:
+    """Test the class attribute index behind get_classes_by_criteria_tool."""
+
+    def test_select(self, analysis):
+        """Should select the same classes as a full scan, in the order CLDK lists them."""
+        index = ClassIndex(analysis)
+        for criteria in FILTERS:
+            selected = [index.names[class_id] for class_id in index.select(criteria)]
+            assert selected and selected == brute_force(analysis, criteria), criteria
+
+    def test_name_criteria(self, analysis):
+        """Should match CLDK's get_classes_by_criteria on names, and select nothing without criteria."""
+        index = ClassIndex(analysis)
+        for inclusions, exclusions in ((["daytrader.util"], None), (["Bean", "Log"], ["util"]), ([], None), (None, ["util"])):
+            selected = [index.names[class_id] for class_id in index.select(ClassFilter(inclusions=inclusions, exclusions=exclusions))]
+            assert selected == list(analysis.get_classes_by_criteria(inclusions, exclusions))
+        assert ClassFilter().is_empty() and index.select(ClassFilter()) == []
+        assert index.select(ClassFilter(exclusions=["util"], modifier="public")) == index.select(ClassFilter(inclusions=[""], exclusions=["util"], modifier="public"))
+
+    def test_qualified_annotation(self, analysis):
+        """Should only match a qualified annotation against the annotations imported from its package."""
+        index = ClassIndex(analysis)
+        assert len(index.select(ClassFilter(annotation="@javax.enterprise.context.RequestScoped"))) == len(index.select(ClassFilter(annotation="RequestScoped"))) > 0
+        assert index.select(ClassFilter(annotation="@com.acme.RequestScoped")) == []
+
+    def test_names(self):
+        """Should qualify annotations by their imports, and compare type names as precisely as they are qualified."""
+        assert annotation_name("@TransactionAttribute(TransactionAttributeType.REQUIRED)", ["javax.ejb.TransactionAttribute"]) == "javax.ejb.TransactionAttribute"
+        assert annotation_name("@Stateless", ["javax.ejb.*"]) == "Stateless"
+        assert same_type("javax.servlet.http.HttpServlet", "HttpServlet") and same_type("java.util.HashMap", "java.util.HashMap<K, V>")
+        assert not same_type("java.util.List", "java.awt.List")
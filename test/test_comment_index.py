@@ -0,0 +1,52 @@
+import pytest
+
+from cocoa.indexes import CommentIndex
+from cocoa.utils.serialization import dumps
+
+LOG = "com.ibm.websphere.samples.daytrader.util.Log"
+
+
+def query_all(index: CommentIndex, **filters) -> list:
+    """Collect every page of a query."""
+    entries, cursor = index.query(limit=7, **filters)
+    while cursor is not None:
+        page, cursor = index.query(limit=7, cursor=cursor, **filters)
+        entries.extend(page)
+    return entries
+
+
+class TestCommentIndex:
+    """Test the index of the project comments."""
+
+    def test_matches_cldk(self, analysis):
+        """Should serve the same comments as CLDK for files, classes, methods and the whole project."""
+        index = CommentIndex(analysis)
+        file_path = analysis.get_java_file(LOG)
+        assert dumps(index.in_file(file_path)) == dumps(analysis.get_comment_in_file(file_path))
+        assert dumps(index.in_class(LOG)) == dumps(analysis.get_comments_in_a_class(LOG))
+        for signature in analysis.get_methods_in_class(LOG):
+            assert dumps(index.in_method(LOG, signature)) == dumps(analysis.get_comments_in_a_method(LOG, signature))
+        assert dumps(index.file_comments) == dumps(analysis.get_all_comments())
+        assert dumps(index.docstrings) == dumps(analysis.get_all_docstrings())
+        with pytest.raises(ValueError):
+            index.in_class("no.such.Class")
+
+    def test_query_filters(self, analysis):
+        """Should page through exactly the comments matching every filter."""
+        index = CommentIndex(analysis)
+        file_path = analysis.get_java_file(LOG)
+        cases = [
+            ({}, lambda entry: True),
+            ({"javadoc_only": True, "package_prefix": "com.ibm.websphere.samples.daytrader.util"}, lambda entry: entry.comment.is_javadoc and ".util" in entry.package_name),
+            (
+                {"file_path": file_path, "start_line": 50, "end_line": 120},
+                lambda entry: entry.file_path == file_path and entry.comment.end_line >= 50 and entry.comment.start_line <= 120,
+            ),
+            ({"qualified_class_name": LOG, "text": "TRACE"}, lambda entry: entry.qualified_class_name == LOG and "trace" in entry.comment.content.lower()),
+            ({"package_prefix": "com.ibm.websphere.samples.day"}, lambda entry: False),
+        ]
+        for filters, expected in cases:
+            assert query_all(index, **filters) == [entry for entry in index.entries if expected(entry)]
+        (cls, signature), comments = next((method, comments) for method, comments in index.method_comments.items() if len(comments) > 1)
+        by_position = sorted(comments, key=lambda comment: (comment.start_line, comment.start_column))
+        assert [entry.comment for entry in query_all(index, qualified_class_name=cls, method_signature=signature)] == by_position
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+from cldk.models.java.enums import CRUDOperationType, CRUDQueryType
+from cldk.models.java.models import JCallable, JCallSite, JCompilationUnit, JCRUDOperation, JCRUDQuery, JType
+
+from cocoa.indexes import CrudIndex
+
+
+def method(signature: str, operations: list[JCRUDOperation], queries: list[JCRUDQuery], call_sites: list[JCallSite]) -> JCallable:
+    """Build a method with CRUD operations."""
+    return JCallable(
+        signature=signature,
+        is_implicit=False,
+        is_constructor=False,
+        comments=[],
+        annotations=[],
+        modifiers=["public"],
+        declaration=f"public void {signature}",
+        parameters=[],
+        code="{}",
+        start_line=1,
+        end_line=20,
+        referenced_types=[],
+        accessed_fields=[],
+        call_sites=call_sites,
+        variable_declarations=[],
+        crud_operations=operations,
+        crud_queries=queries,
+        cyclomatic_complexity=1,
+    )
+
+
+def call_site(line: int, argument_types: list[str], operation: JCRUDOperation | None = None, query: JCRUDQuery | None = None) -> JCallSite:
+    """Build a call performing a CRUD operation."""
+    return JCallSite(
+        comment=None,
+        method_name="run",
+        receiver_type="javax.persistence.EntityManager",
+        argument_types=argument_types,
+        is_constructor_call=False,
+        crud_operation=operation,
+        crud_query=query,
+        start_line=line,
+        start_column=1,
+        end_line=line,
+        end_column=10,
+    )
+
+
+PERSIST = JCRUDOperation(line_number=5, operation_type=CRUDOperationType.CREATE)
+FIND = JCRUDOperation(line_number=9, operation_type=CRUDOperationType.READ)
+SELECT = JCRUDQuery(line_number=9, query_arguments=["SELECT o FROM OrderDataBean o WHERE o.id = ?"], query_type=CRUDQueryType.READ)
+REMOVE = JCRUDOperation(line_number=3, operation_type=CRUDOperationType.DELETE)
+
+ORDERS = JType(
+    parent_type="",
+    callable_declarations={
+        "create(Order)": method("create(Order)", [PERSIST], [], [call_site(5, ["app.OrderDataBean"], PERSIST)]),
+        "find(int)": method("find(int)", [FIND], [SELECT], [call_site(9, ["java.lang.String"], FIND, SELECT)]),
+        "size()": method("size()", [], [], []),
+    },
+)
+ACCOUNTS = JType(parent_type="", callable_declarations={"close(int)": method("close(int)", [REMOVE], [], [])})
+ORDER = JType(parent_type="")
+UNITS = {
+    "Orders.java": JCompilationUnit(file_path="Orders.java", package_name="app", comments=[], imports=[], type_declarations={"app.Orders": ORDERS}),
+    "Accounts.java": JCompilationUnit(file_path="Accounts.java", package_name="app", comments=[], imports=[], type_declarations={"app.Accounts": ACCOUNTS}),
+    "Order.java": JCompilationUnit(file_path="Order.java", package_name="app", comments=[], imports=[], type_declarations={"app.OrderDataBean": ORDER}),
+}
+ANALYSIS = SimpleNamespace(get_symbol_table=lambda: UNITS, get_java_compilation_unit=UNITS.__getitem__)
+
+
+class TestCrudIndex:
+    """Test the index of the CRUD operations and queries."""
+
+    def test_by_method(self):
+        """Should list the methods with CRUD operations like CLDK, keeping only the operations of the requested type."""
+        index = CrudIndex(ANALYSIS)
+        assert index.by_method() == [
+            {"app.Orders": ORDERS, "create(Order)": ORDERS.callable_declarations["create(Order)"], "crud_operations": [PERSIST]},
+            {"app.Orders": ORDERS, "find(int)": ORDERS.callable_declarations["find(int)"], "crud_operations": [FIND]},
+            {"app.Accounts": ACCOUNTS, "close(int)": ACCOUNTS.callable_declarations["close(int)"], "crud_operations": [REMOVE]},
+        ]
+        assert [methods["crud_operations"] for methods in index.by_method(CRUDOperationType.READ)] == [[], [FIND], []]
+
+    def test_query(self):
+        """Should filter by kind, type, class, method and target, one page at a time."""
+        index = CrudIndex(ANALYSIS)
+        assert [(entry.qualified_class_name, entry.line_number, entry.kind) for entry in index.entries] == [
+            ("app.Accounts", 3, "operation"),
+            ("app.Orders", 5, "operation"),
+            ("app.Orders", 9, "operation"),
+            ("app.Orders", 9, "query"),
+        ]
+        assert [entry.model for entry in index.query(target="orderdatabean")[0]] == [PERSIST, FIND, SELECT]
+        assert [entry.model for entry in index.query(kind="query", operation_type="read")[0]] == [SELECT]
+        assert [entry.model for entry in index.query(qualified_class_name="app.Orders", method_signature="find(int)", kind="operation")[0]] == [FIND]
+        page, cursor = index.query(qualified_class_name="app.Orders", limit=2)
+        assert [entry.model for entry in page] == [PERSIST, FIND]
+        assert [entry.model for entry in index.query(qualified_class_name="app.Orders", limit=2, cursor=cursor)[0]] == [SELECT]
+        assert index.query(target="AccountDataBean") == ([], None)
+
+    def test_round_trip(self):
+        """Should read back a serialized index, with the methods read from the analysis."""
+        index = CrudIndex(ANALYSIS)
+        restored = CrudIndex.from_bytes(index.to_bytes(), ANALYSIS)
+        assert restored.entries == index.entries
+        assert restored.by_method() == index.by_method()
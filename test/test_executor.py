@@ -0,0 +1,43 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from cocoa.tools import with_timeout
+from cocoa.utils.executor import ToolExecutor
+
+
+class TestToolExecutor:
+    """Test the executor running the blocking part of the tools."""
+
+    @pytest.mark.asyncio
+    async def test_light_calls_are_not_starved_by_heavy_ones(self):
+        """Should run a cheap lookup while every heavy slot is busy."""
+        executor = ToolExecutor(max_workers=3, max_heavy=2)
+        release = threading.Event()
+        heavy = [asyncio.create_task(executor.run(release.wait, 5, heavy=True)) for _ in range(4)]
+        await asyncio.sleep(0.05)
+
+        start = time.monotonic()
+        assert await executor.run(lambda: threading.current_thread().name) != threading.current_thread().name
+        assert time.monotonic() - start < 1
+
+        release.set()
+        assert await asyncio.gather(*heavy) == [True] * 4
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_request_timeout(self):
+        """Should fail a tool call running longer than the request timeout, and leave the faster ones alone."""
+
+        async def sleep_tool(seconds: float):
+            await asyncio.sleep(seconds)
+            return "done"
+
+        tool = with_timeout(sleep_tool, 0.1)
+        assert tool.__name__ == "sleep_tool"
+        assert await tool(0) == "done"
+        with pytest.raises(TimeoutError, match="sleep_tool did not answer within 0.1 seconds"):
+            await tool(5)
+        assert with_timeout(sleep_tool, None) is sleep_tool
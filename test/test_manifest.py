@@ -0,0 +1,32 @@
+import sys
+import json
+import subprocess
+
+from cldk.analysis import AnalysisLevel
+
+from cocoa.cli import AnalysisLevelOption
+from cocoa.tools.manifest import MANIFEST_PATH, build_manifest, load_tools
+
+
+class TestToolManifest:
+    """Test the static manifest the server registers its tools from."""
+
+    def test_manifest_is_up_to_date(self):
+        """Should list every tool as its function describes it (regenerate it with `python -m cocoa.tools.manifest`)."""
+        assert json.loads(MANIFEST_PATH.read_text()) == json.loads(json.dumps(build_manifest()))
+
+    def test_load_tools(self):
+        """Should create the tools without their functions, with the schema of their parameters."""
+        tools = {tool.name: tool for tool in load_tools()}
+        assert tools["get_class_tool"].fn is None and tools["get_class_tool"].module == "cocoa.tools.tools"
+        assert tools["get_class_tool"].parameters["required"] == ["qualified_class_name"]
+        assert tools["JType_explainer"].module == "cocoa.tools.schema_explainer"
+
+    def test_cli_imports(self):
+        """Should import neither CLDK nor the server modules to parse the command line."""
+        code = "import sys, cocoa.cli; print(sorted({name.split('.')[0] for name in sys.modules} & {'cldk', 'fastmcp', 'networkx', 'numpy'}))"
+        assert subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip() == "[]"
+
+    def test_analysis_level_option(self):
+        """Should offer the analysis levels of CLDK."""
+        assert [level.value for level in AnalysisLevelOption] == [level.value for level in AnalysisLevel]
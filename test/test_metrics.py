@@ -0,0 +1,70 @@
+import pytest
+
+from cocoa.utils.metrics import LATENCY_BUCKETS, ServerMetrics, ToolStats
+
+
+class TestServerMetrics:
+    """Test the per-tool metrics of the server."""
+
+    @pytest.mark.asyncio
+    async def test_instrument(self):
+        """Should count the calls, errors and response bytes of a tool, keeping its name."""
+        metrics = ServerMetrics()
+
+        async def echo_tool(text: str):
+            if not text:
+                raise ValueError("empty")
+            return text
+
+        tool = metrics.instrument(echo_tool)
+        assert tool.__name__ == "echo_tool"
+        assert await tool("abc") == "abc"
+        assert await tool(text="é") == "é"
+        with pytest.raises(ValueError):
+            await tool("")
+
+        stats = metrics.stats("echo_tool")
+        assert (stats.calls, stats.errors, stats.in_flight) == (3, 1, 0)
+        assert (stats.response_bytes_sum, stats.response_bytes_max) == (5, 3)
+        assert sum(stats.latency_buckets) == 3
+        snapshot = metrics.snapshot()["tools"]["echo_tool"]
+        assert snapshot["calls"] == 3 and snapshot["cache_hit_rate"] is None
+        assert snapshot["latency_seconds"]["p50"] == LATENCY_BUCKETS[0]
+
+    @pytest.mark.asyncio
+    async def test_unserialized_response(self):
+        """Should count the calls of a tool returning unserialized data without encoding it to measure its size."""
+        metrics = ServerMetrics()
+
+        async def graph_tool():
+            return {"nodes": [], "links": []}
+
+        assert await metrics.instrument(graph_tool)() == {"nodes": [], "links": []}
+        stats = metrics.stats("graph_tool")
+        assert (stats.calls, stats.response_bytes_sum, stats.response_bytes_max) == (1, 0, 0)
+
+    def test_quantile(self):
+        """Should estimate latency quantiles from the histogram buckets."""
+        stats = ToolStats()
+        assert stats.quantile(0.5) is None
+        for latency in (0.001, 0.002, 0.3, 20.0):
+            stats.observe(latency)
+        assert stats.quantile(0.5) == 0.005
+        assert stats.quantile(0.75) == 0.5
+        assert stats.quantile(0.99) == 20.0
+
+    def test_prometheus(self):
+        """Should render cumulative latency buckets and the counters in the Prometheus text format."""
+        metrics = ServerMetrics()
+        stats = metrics.stats("a_tool")
+        stats.observe(0.02)
+        stats.observe(3.0)
+        stats.cache_hits = 1
+        text = metrics.prometheus()
+        assert "# TYPE cocoa_tool_latency_seconds histogram" in text
+        assert 'cocoa_tool_latency_seconds_bucket{tool="a_tool",le="0.025"} 1' in text
+        assert 'cocoa_tool_latency_seconds_bucket{tool="a_tool",le="+Inf"} 2' in text
+        assert 'cocoa_tool_latency_seconds_count{tool="a_tool"} 2' in text
+        assert 'cocoa_tool_calls_total{tool="a_tool"} 2' in text
+        assert 'cocoa_tool_cache_hits_total{tool="a_tool"} 1' in text
+        assert text.endswith("\n")
@@ -0,0 +1,37 @@
+import pytest
+
+from cocoa.utils.pagination import decode_cursor, encode_cursor, paginate, paginate_ids
+
+
+class TestPagination:
+    """Test the cursor-based pagination of whole-project tools."""
+
+    def test_pages_cover_all_keys_once(self):
+        """Should walk every key exactly once, in order, and end with a null cursor."""
+        keys = [("A", f"m{i}()") for i in range(10)]
+        pages, cursor = [], None
+        while True:
+            page, cursor = paginate(keys, 3, cursor)
+            pages.append(list(page))
+            if cursor is None:
+                break
+        assert [len(page) for page in pages] == [3, 3, 3, 1]
+        assert [key for page in pages for key in page] == keys
+
+    def test_cursor_is_stable_across_changes(self):
+        """Should resume after the last key of the previous page even if keys were added before it."""
+        page, cursor = paginate(["a", "c", "e"], 2, None)
+        assert decode_cursor(cursor) == "c"
+        assert list(paginate(["a", "b", "c", "d", "e"], 2, cursor)[0]) == ["d", "e"]
+
+    def test_rejects_malformed_cursor(self):
+        """Should raise a ValueError on a cursor it did not produce."""
+        with pytest.raises(ValueError):
+            paginate(["a"], 1, "not a cursor")
+
+    def test_rejects_cursor_of_another_listing(self):
+        """Should raise a ValueError on a cursor whose key cannot be compared with the keys."""
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            paginate([("A", "m()")], 1, encode_cursor(3))
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            paginate_ids([], 3, lambda _: True, 1, encode_cursor("a"))
@@ -0,0 +1,39 @@
+from cldk.models.java.models import JCallable, JType
+
+from cocoa.utils.projection import dump_options, field_spec
+
+
+class TestProjection:
+    """Test the field projection of model-returning tools."""
+
+    def test_field_spec(self):
+        """Should nest dotted paths, map `*` to every item, and let a whole field win over its sub-fields."""
+        assert field_spec(None) is None
+        assert field_spec(["callable_declarations.*.signature", "is_interface"]) == {"callable_declarations": {"__all__": {"signature": True}}, "is_interface": True}
+        assert field_spec(["comments", "comments.*.content"]) == {"comments": True}
+
+    def test_projects_nested_fields(self):
+        """Should only serialize the selected fields of a model."""
+        callable = JCallable(
+            signature="run()",
+            is_implicit=False,
+            is_constructor=False,
+            comments=[],
+            annotations=[],
+            modifiers=["public"],
+            declaration="public void run()",
+            parameters=[],
+            code="{}",
+            start_line=1,
+            end_line=1,
+            referenced_types=[],
+            accessed_fields=[],
+            call_sites=[],
+            variable_declarations=[],
+            crud_operations=[],
+            crud_queries=[],
+            cyclomatic_complexity=1,
+        )
+        typ = JType(parent_type="", callable_declarations={"run()": callable})
+        assert typ.model_dump(**dump_options(["callable_declarations.*.signature"])) == {"callable_declarations": {"run()": {"signature": "run()"}}}
+        assert "code" not in typ.model_dump(**dump_options(exclude=["callable_declarations.*.code"]))["callable_declarations"]["run()"]
@@ -0,0 +1,90 @@
+import copy
+
+import pytest
+
+from cocoa.analysis import CLDKAnalysis
+from cocoa.analysis_snapshot import AnalysisSnapshot
+from cocoa.indexes import ClassFilter, ClassIndex
+from cocoa.query_store import QueryStore
+from cocoa.utils.serialization import dumps
+
+CLASS = "com.ibm.websphere.samples.daytrader.util.Log"
+
+FILTERS = [
+    ClassFilter(inclusions=["Bean", "Log"], exclusions=["util"]),
+    ClassFilter(package="com.ibm.websphere.samples.daytrader.*.ejb3", annotation="@TransactionAttribute(TransactionAttributeType.REQUIRED)"),
+    ClassFilter(modifier="public", entrypoint=True, min_methods=5, max_complexity=40),
+    ClassFilter(extends="javax.servlet.http.HttpServlet", exclusions=["Ping"]),
+    ClassFilter(implements="java.io.Serializable", package="*.entities"),
+    ClassFilter(annotation="@javax.ejb.Stateless"),
+    ClassFilter(exclusions=["util"]),
+    ClassFilter(package="com.ibm.websphere.samples.daytrader.[!w]*", modifier="public"),
+    ClassFilter(),
+]
+
+
+@pytest.fixture(scope="module")
+def store_path(project, tmp_path_factory):
+    """A query store of the analysis of the project."""
+    store_path = tmp_path_factory.mktemp("store") / "daytrader8.cocoa.sqlite"
+    QueryStore.write(store_path, project)
+    return store_path
+
+
+class TestQueryStore:
+    """Test the SQLite query store the class lookups are answered from."""
+
+    def test_lookups(self, project, store_path):
+        """Should answer the lookups with the same JSON as CLDK."""
+        store, analysis = QueryStore(store_path), project.analysis_instance
+        super_type = next(name for typ in analysis.get_classes().values() for name in typ.implements_list if len(analysis.get_sub_classes(name)) > 1)
+        assert dumps(store.get_class(CLASS)) == dumps(analysis.get_class(CLASS))
+        assert dumps(store.get_class("no.such.Class")) == dumps(analysis.get_class("no.such.Class"))
+        assert dumps(store.get_methods_in_class(CLASS), 1) == dumps(analysis.get_methods_in_class(CLASS), 1)
+        assert dumps(store.get_sub_classes(super_type), 1) == dumps(analysis.get_sub_classes(super_type), 1)
+        fields = {"include": {"callable_declarations": {"__all__": {"signature": True}}}, "exclude": None}
+        assert dumps(store.get_class(CLASS), **fields) == dumps(analysis.get_class(CLASS), **fields)
+
+    def test_classes_by_criteria(self, project, store_path):
+        """Should select the same classes in SQL as the class index."""
+        store, index = QueryStore(store_path), project.derived(ClassIndex)
+        for criteria in FILTERS:
+            names = [index.names[class_id] for class_id in index.select(criteria)]
+            assert store.get_class_names_by_criteria(criteria) == names
+            assert store.count_classes_by_criteria(criteria) == len(names)
+            assert dumps(store.get_classes_by_criteria(criteria), 1) == dumps({name: index.types[index.names.index(name)] for name in names}, 1)
+
+    def test_duplicate_classes(self, project, tmp_path):
+        """Should answer like CLDK for a class declared in two files: get_class returns the first, get_classes lists the last."""
+        analysis = copy.copy(project.analysis_instance)
+        analysis.backend = copy.copy(analysis.backend)
+        symbol_table = analysis.backend.get_application_view().symbol_table
+        file_path = analysis.get_java_file(CLASS)
+        typ = symbol_table[file_path].type_declarations[CLASS]
+        duplicate = symbol_table[file_path].model_copy(update={"type_declarations": {CLASS: typ.model_copy(update={"implements_list": ["java.io.Serializable"]})}})
+        analysis.backend.application = analysis.backend.application.model_copy(update={"symbol_table": {**symbol_table, "Duplicate.java": duplicate}})
+        duplicated = CLDKAnalysis(project_path=project.project_path)
+        duplicated.analysis_instance = analysis
+        QueryStore.write(tmp_path / "store.sqlite", duplicated)
+        store, index = QueryStore(tmp_path / "store.sqlite"), ClassIndex(analysis)
+        assert dumps(store.get_class(CLASS)) == dumps(analysis.get_class(CLASS))
+        assert dumps(store.get_sub_classes("java.io.Serializable"), 1) == dumps(analysis.get_sub_classes("java.io.Serializable"), 1)
+        criteria = ClassFilter(implements="java.io.Serializable")
+        assert store.get_class_names_by_criteria(criteria) == [index.names[class_id] for class_id in index.select(criteria)]
+        assert CLASS in store.get_class_names_by_criteria(criteria)
+
+    def test_snapshot(self, project, store_path):
+        """Should be opened with the snapshot it was written with, and dropped once the analysis changes."""
+        snapshot_path = store_path.with_name("daytrader8.cocoa")
+        AnalysisSnapshot.write(snapshot_path, project, query_store=store_path)
+        restored = CLDKAnalysis(project_path=project.project_path, snapshot_path=snapshot_path)
+        restored.load()
+        assert restored.query_store is not None and restored.query_store.get_class(CLASS) is not None
+        restored.refresh([], [])
+        assert restored.query_store is None
+
+    def test_rejects_other_files(self, tmp_path):
+        """Should refuse files that are not query stores."""
+        (tmp_path / "store.sqlite").write_text("{}")
+        with pytest.raises(ValueError):
+            QueryStore(tmp_path / "store.sqlite")
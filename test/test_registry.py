@@ -0,0 +1,97 @@
+import os
+import asyncio
+
+import pytest
+
+from cocoa.analysis import CLDKAnalysis
+from cocoa.registry import ProjectRegistry
+from cocoa.utils.cache import AnalysisCache
+
+
+def loaded(registry: ProjectRegistry, name: str, size: int, phase: str = "ready") -> CLDKAnalysis:
+    """Register an analysis as if it had been loaded."""
+    _, project_path = registry.resolve(name)
+    analysis = CLDKAnalysis(project_path=project_path)
+    analysis.phase, analysis.size = phase, size
+    registry._loaded[name] = analysis
+    return analysis
+
+
+class TestProjectRegistry:
+    """Test the registry of the projects served by one server."""
+
+    def test_resolves_projects(self, tmp_path):
+        """Should find explicitly given projects and the sub-directories of the projects root, and nothing outside it."""
+        for name in ("a", "b", "root/c"):
+            (tmp_path / name).mkdir(parents=True)
+        registry = ProjectRegistry(project_paths=[tmp_path / "a", tmp_path / "b"], projects_root=tmp_path / "root")
+        assert registry.resolve(None) == ("a", tmp_path / "a")
+        assert registry.resolve(str(tmp_path / "b")) == ("b", tmp_path / "b")
+        assert registry.resolve("c") == ("c", tmp_path / "root" / "c")
+        assert registry.names() == ["a", "b", "c"]
+        for name in ("../a", ".", "d"):
+            with pytest.raises(ValueError):
+                registry.resolve(name)
+        with pytest.raises(ValueError):
+            ProjectRegistry(projects_root=tmp_path / "root").resolve(None)
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Should unload the least recently used ready analyses once the loaded ones outgrow the budget."""
+        for name in ("a", "b", "c", "d"):
+            (tmp_path / name).mkdir()
+        registry = ProjectRegistry(projects_root=tmp_path, memory_budget=250)
+        loaded(registry, "a", 100)
+        loaded(registry, "b", 100, phase="loading")
+        loaded(registry, "c", 100)
+        loaded(registry, "d", 100)
+        registry.evict()
+        # "b" is still loading and "d" was just used.
+        assert list(registry._loaded) == ["b", "d"]
+        loaded(registry, "c", 100)
+        registry._loaded.move_to_end("d")
+        registry.evict()
+        assert list(registry._loaded) == ["b", "d"]
+        assert registry.status()["loaded_bytes"] == 200
+
+    def test_retries_failed_analyses(self, tmp_path, monkeypatch):
+        """Should load a project again once its analysis failed, unless only its status is asked for."""
+        (tmp_path / "a").mkdir()
+        registry = ProjectRegistry(project_paths=[tmp_path / "a"])
+        failed = loaded(registry, "a", 0, phase="failed")
+        assert registry.get("a", retry=False) is failed
+        started = []
+        monkeypatch.setattr(CLDKAnalysis, "start", lambda self: started.append(self))
+        monkeypatch.setattr(CLDKAnalysis, "add_done_callback", lambda self, callback: None)
+        retried = registry.get("a")
+        assert retried is not failed and started == [retried] and registry._loaded["a"] is retried
+
+    def test_measures_size_with_a_budget(self, tmp_path):
+        """Should only measure the size of the analyses when there is a memory budget to keep them within."""
+        (tmp_path / "a" / "src").mkdir(parents=True)
+        (tmp_path / "a" / "src" / "A.java").write_text("class A {}")
+        (tmp_path / "a" / "README.md").write_text("not a source")
+        assert not ProjectRegistry(project_paths=[tmp_path / "a"])._create("a", tmp_path / "a").measure_size
+        analysis = ProjectRegistry(project_paths=[tmp_path / "a"], memory_budget=1 << 20)._create("a", tmp_path / "a")
+        assert analysis.measure_size and analysis._measure_size() == len("class A {}")
+
+    def test_warms_most_recently_used_first(self, tmp_path, monkeypatch):
+        """Should load the cached projects, least recently used last, and skip the ones not in the cache."""
+        for name in ("a", "b", "c", "d"):
+            (tmp_path / "root" / name).mkdir(parents=True)
+        cache = AnalysisCache(tmp_path / "cache", max_size=1 << 20)
+        registry = ProjectRegistry(projects_root=tmp_path / "root", cache=cache)
+        for name, last_used in (("a", 100), ("b", 300), ("d", 200)):
+            entry = cache.cache_dir / cache.key(tmp_path / "root" / name, analysis_level="symbol table")
+            entry.mkdir()
+            (entry / AnalysisCache.ANALYSIS_FILE).touch()
+            (entry / AnalysisCache.COMPLETE_MARKER).touch()
+            os.utime(entry / AnalysisCache.COMPLETE_MARKER, (last_used, last_used))
+        warmed = []
+
+        async def wait_until_ready(self, timeout):
+            pass
+
+        monkeypatch.setattr(registry, "get", lambda name: warmed.append(name) or loaded(registry, name, 100))
+        monkeypatch.setattr(CLDKAnalysis, "wait_until_ready", wait_until_ready)
+        asyncio.run(registry.warm())
+        assert warmed == ["b", "d", "a"]
@@ -0,0 +1,37 @@
+import sys
+
+from cocoa.utils.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """Test the in-memory cache of serialized tool responses."""
+
+    def test_hits_and_misses(self):
+        """Should serve a stored response and count hits and misses."""
+        cache = ResponseCache(max_size=1 << 20)
+        assert cache.get(("get_class_tool", "{}"), 0) is None
+        cache.put(("get_class_tool", "{}"), 0, "{}")
+        assert cache.get(("get_class_tool", "{}"), 0) == "{}"
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self):
+        """Should evict the least recently used responses to stay within its budget."""
+        response = "x" * 1000
+        cache = ResponseCache(max_size=3 * sys.getsizeof(response))
+        for key in "abc":
+            cache.put(key, 0, response)
+        cache.get("a", 0)
+        cache.put("d", 0, response)
+        assert cache.get("a", 0) == response
+        assert cache.get("b", 0) is None
+        assert cache.size <= cache.max_size
+        assert cache.stats()["evictions"] >= 1
+
+    def test_invalidates_on_new_generation(self):
+        """Should drop every response once the analysis changed, and ignore responses computed from an older one."""
+        cache = ResponseCache(max_size=1 << 20)
+        cache.put("a", 0, "old")
+        assert cache.get("a", 1) is None
+        cache.put("a", 0, "old")
+        assert cache.get("a", 1) is None
+        assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,63 @@
+import re
+
+from cocoa.indexes import SearchIndex
+from cocoa.indexes import search_index
+from cocoa.indexes.search_index import Document, _required_literals
+
+
+def brute_force(index: SearchIndex, pattern: re.Pattern) -> set[int]:
+    """Scan every document, without the index."""
+    return {doc_id for doc_id, document in enumerate(index.documents) if pattern.search(document.text)}
+
+
+class TestSearchIndex:
+    """Test the trigram index over the project source."""
+
+    def test_substring_search(self, analysis):
+        """Should find the same documents as a full scan, most matches first."""
+        index = SearchIndex(analysis)
+        for query in ("executeQuery", "log", "TradeConfig.getOrderProcessingMode", "no such code"):
+            hits = index.search(query)
+            assert {doc_id for (_, doc_id), _ in hits} == brute_force(index, re.compile(re.escape(query), re.IGNORECASE))
+            assert [key for key, _ in hits] == sorted(key for key, _ in hits)
+        (_, doc_id), positions = index.search("executeQuery", case_sensitive=True, kinds=["method"])[0]
+        hit = index.hit(doc_id, positions)
+        assert hit["kind"] == "method" and "executeQuery" in hit["snippets"][0]["text"]
+
+    def test_regex_search(self, analysis):
+        """Should narrow regular expressions down with their literal runs, and find the same documents as a full scan."""
+        index = SearchIndex(analysis)
+        for query in (r"log\(\"[A-Z]\w+", r"(select|update)\s+\w+", r"get\w+Connection"):
+            hits = index.search(query, regex=True)
+            assert {doc_id for (_, doc_id), _ in hits} == brute_force(index, re.compile(query, re.IGNORECASE))
+        assert _required_literals(r"abc(def)+gh?i[jk]lmn") == ["abc", "def", "g", "i", "lmn"]
+        assert _required_literals(r"abc|def") == []
+
+    def test_regex_search_without_parser(self, analysis, monkeypatch):
+        """Should scan every document when the private regular expression parser is missing."""
+        index = SearchIndex(analysis)
+        query = r"get\w+Connection"
+        hits = index.search(query, regex=True)
+        monkeypatch.setattr(search_index, "sre_parser", None)
+        assert _required_literals(query) == []
+        assert index.search(query, regex=True) == hits
+
+    def test_snippet_lines(self, monkeypatch):
+        """Should report the line of a match and its text with the same line breaks."""
+        document = Document("comment", "A.java", "app.A", None, 10, "first\rsecond\u2028needle here\r\nlast needle")
+        monkeypatch.setattr(search_index, "_documents", lambda analysis: [document])
+        index = SearchIndex(None)
+        (_, doc_id), positions = index.search("needle")[0]
+        hit = index.hit(doc_id, positions)
+        assert hit["snippets"] == [{"line": 12, "text": "needle here"}, {"line": 13, "text": "last needle"}]
+        assert hit["line"] == 12
+
+    def test_round_trip(self, analysis):
+        """Should find the same hits once written and read back."""
+        index = SearchIndex(analysis)
+        restored = SearchIndex.from_bytes(index.to_bytes())
+        assert restored.documents == index.documents
+        for query in ("executeQuery", "log"):
+            assert restored.search(query) == index.search(query)
+            (_, doc_id), positions = index.search(query)[0]
+            assert restored.hit(doc_id, positions) == index.hit(doc_id, positions)
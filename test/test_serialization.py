@@ -0,0 +1,24 @@
+import json
+
+from cldk.models.java.models import JComment
+
+from cocoa.utils.projection import field_spec
+from cocoa.utils.serialization import dumps, dumps_page
+
+
+class TestSerialization:
+    """Test the JSON serialization of tool responses."""
+
+    comment = JComment(content="// hello", start_line=1, end_line=1, start_column=1, end_column=9, is_javadoc=False)
+
+    def test_matches_model_dump(self):
+        """Should produce the same document as json.dumps over model_dump."""
+        response = {"A.java": [self.comment]}
+        assert json.loads(dumps(response)) == {"A.java": [self.comment.model_dump()]}
+
+    def test_projects_nested_models(self):
+        """Should apply the field projection to the models nested in containers and pages."""
+        response = {"A.java": [self.comment]}
+        assert json.loads(dumps(response, 2, include=field_spec(["content"]))) == {"A.java": [{"content": "// hello"}]}
+        page = json.loads(dumps_page(response, None, 2, exclude=field_spec(["content"])))
+        assert page["next_cursor"] is None and "content" not in page["items"]["A.java"][0]
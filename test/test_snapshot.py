@@ -0,0 +1,52 @@
+import json
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from cocoa.registry import ProjectRegistry
+from cocoa.tools import cached, tools
+from cocoa.tools.snapshot import SNAPSHOT_TOOLS, freeze_project
+from cocoa.utils.cache import AnalysisCache
+from cocoa.utils.snapshot import Snapshot
+
+
+class TestSnapshot:
+    """Test the memory-mapped snapshot files, and the snapshot of the whole-project responses shared by the pre-fork workers."""
+
+    @pytest.mark.parametrize("compression", [None, 6])
+    def test_round_trip(self, tmp_path, compression):
+        """Should read back every section written, and nothing else."""
+        responses = {"a_tool": "{}", "b_tool": json.dumps({"name": "é" * 1000})}
+        Snapshot.write(tmp_path / "snapshot", {**responses, "c_bytes": bytes(range(256))}, compression=compression)
+        snapshot = Snapshot(tmp_path / "snapshot")
+        assert len(snapshot) == 3 and "a_tool" in snapshot
+        assert {name: snapshot.get(name) for name in responses} == responses
+        assert snapshot.read("c_bytes") == bytes(range(256))
+        assert snapshot.get("c_tool") is None
+        snapshot.close()
+
+    def test_rejects_other_files(self, tmp_path):
+        """Should refuse files that are not snapshots."""
+        (tmp_path / "snapshot").write_text("{}")
+        with pytest.raises(ValueError):
+            Snapshot(tmp_path / "snapshot")
+
+    def test_freeze_project(self, project_path, cache_dir, tmp_path):
+        """Should serve the calls without arguments of the whole-project tools from the snapshot, and the others as before."""
+        registry = ProjectRegistry(project_paths=[project_path], cache=AnalysisCache(cache_dir, max_size=2048 * 1024 * 1024))
+        # Frozen before any event loop runs, like in the parent of the workers.
+        analysis = freeze_project(registry, project_path.name, tmp_path)
+        assert analysis.phase == "ready"
+        assert all(name in analysis.response_snapshot for name in SNAPSHOT_TOOLS)
+
+        async def check():
+            ctx = SimpleNamespace(request_context=SimpleNamespace(lifespan_context=registry))
+            classes = await tools.get_classes_tool(ctx)
+            assert analysis.response_snapshot.get("get_classes_tool") == classes
+            assert await cached(tools.get_classes_tool)(ctx) == classes
+            page = json.loads(await cached(tools.get_classes_tool)(ctx, limit=5))
+            assert len(page["items"]) == 5
+
+        asyncio.run(check())
+        registry.close()
@@ -0,0 +1,24 @@
+import json
+
+from cocoa.utils.projection import field_spec
+from cocoa.utils.streaming import ApplicationChunks
+
+
+class TestStreaming:
+    """Test the chunked delivery of the application view."""
+
+    def test_chunks_cover_symbol_table(self, analysis):
+        """Should plan one chunk per compilation unit, in file path order."""
+        chunks = ApplicationChunks(analysis)
+        lines = [json.loads(chunks.chunk(index)) for index in range(len(chunks))]
+        units = [line for line in lines if line["section"] == "symbol_table"]
+        assert [line["key"] for line in units] == sorted(analysis.get_symbol_table())
+        assert [line["chunk"] for line in lines] == list(range(len(chunks)))
+
+    def test_chunks_are_projected(self, analysis):
+        """Should apply JApplication field paths to each chunk, and skip the chunks they leave out entirely."""
+        chunks = ApplicationChunks(analysis)
+        line = json.loads(chunks.chunk(0, include=field_spec(["symbol_table.*.package_name"])))
+        assert list(line["items"]) == ["package_name"]
+        assert chunks.chunk(0, exclude=field_spec(["symbol_table"])) is None
+        assert chunks.chunk(0, include=field_spec(["call_graph"])) is None
@@ -0,0 +1,66 @@
+import os
+import shutil
+
+from typer.testing import CliRunner
+
+from cocoa.analysis import CLDKAnalysis
+from cocoa.cli import app
+from cocoa.indexes import CallIndex
+from cocoa.utils.watcher import SourceWatcher
+
+LOG = "com.ibm.websphere.samples.daytrader.util.Log"
+
+
+class TestSourceWatcher:
+    """Test the polling watcher and the incremental re-analysis of the toolbox watch mode."""
+
+    def test_poll_reports_changes(self, tmp_path):
+        """Should report created, modified and deleted Java files, and nothing else."""
+        kept, edited, deleted = (tmp_path / f"{name}.java" for name in ("Kept", "Edited", "Deleted"))
+        for path in (kept, edited, deleted):
+            path.write_text(f"class {path.stem} {{}}")
+        watcher = SourceWatcher(tmp_path)
+        assert watcher.poll() == ([], [])
+
+        edited.write_text("class Edited { int x; }")
+        os.utime(edited, ns=(0, 0))
+        deleted.unlink()
+        created = tmp_path / "Created.java"
+        created.write_text("class Created {}")
+        (tmp_path / "notes.txt").write_text("not a source file")
+
+        assert watcher.poll() == (sorted([created, edited]), [deleted])
+        assert watcher.poll() == ([], [])
+
+    def test_refresh(self, project_path, tmp_path):
+        """Should patch an edited file into a new analysis, whose classes, callers and callees reflect the edit."""
+        shutil.copytree(project_path, tmp_path / "real" / "daytrader8")
+        # Served through a symbolic link, while the edit is reported under the real path.
+        (tmp_path / "link").symlink_to(tmp_path / "real")
+        project = CLDKAnalysis(project_path=tmp_path / "link" / "daytrader8")
+        previous = project.load()
+        log = tmp_path / "real" / "daytrader8" / "src" / "main" / "java" / "com" / "ibm" / "websphere" / "samples" / "daytrader" / "util" / "Log.java"
+        source = log.read_text()
+        # Adds a method calling print, and drops stat.
+        source = source.replace(
+            "  public static void stat(String message) {", "  public static void audit(String message) {\n    print(message);\n  }\n\n  public static void unused(String message) {"
+        )
+        log.write_text(source)
+
+        project.refresh([log], [])
+        analysis = project.analysis_instance
+        assert analysis is not previous and project.generation == 1
+        assert previous.get_method(LOG, "audit(String)") is None and previous.get_method(LOG, "stat(String)") is not None
+        assert analysis.get_method(LOG, "audit(String)") is not None and analysis.get_method(LOG, "stat(String)") is None
+        assert len(analysis.get_classes()) == len(previous.get_classes())
+        calls = project.derived(CallIndex)
+        callees = calls.get_callees(LOG, "audit(String)")["callee_details"]
+        assert [(callee["callee_method"].klass, callee["callee_method"].method.signature) for callee in callees] == [(LOG, "print(String)")]
+        callers = calls.get_callers(LOG, "print(String)")["caller_details"]
+        assert "audit(String)" in [caller["caller_method"].method.signature for caller in callers]
+        assert calls.get_callers(LOG, "stat(String)") == {}
+
+    def test_watch_rejects_snapshot(self, tmp_path):
+        """Should refuse to watch the sources of a project served from a snapshot, which may be another checkout."""
+        result = CliRunner().invoke(app, ["toolbox", "--snapshot", str(tmp_path / "project.cocoa"), "--watch"])
+        assert result.exit_code == 2 and "combined with --snapshot" in result.output